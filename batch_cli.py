@@ -0,0 +1,288 @@
+"""
+Пакетная обработка изображений без графического интерфейса (лаб. №3).
+
+Пресет параметров или рецепт — цепочка операций (JSON, сохраняется
+кнопками «Пресет» и «Рецепт» в ImageProcessorApp или вручную, см.
+recipe.py) — применяется ко всем изображениям папки теми же функциями
+image_ops, что и в окне. Конвейер из трех стадий:
+    чтение  — пул потоков читает байты файлов с опережением;
+    обработка — пул процессов декодирует, обрабатывает и кодирует;
+    запись  — пул потоков записывает результат.
+Стадии работают одновременно, поэтому чтение и запись следующих файлов
+перекрываются с вычислениями. По каждому файлу печатается строка со
+временем стадий и скоростью (Мпикс/с), в конце — итоговая скорость.
+
+Примеры:
+    python batch_cli.py photos out --preset contrast.json
+    python batch_cli.py photos out --preset erode5.json --format png --workers 8 --report report.jsonl
+    python batch_cli.py photos out --preset tophat.json
+
+Пресет:
+    {"mode": "point", "contrast": 1.5, "brightness": -10, "invert": false}
+    {"mode": "morph", "morph_type": "Erosion", "kernel_shape": "Ellipse", "kernel_size": 5}
+    {"mode": "recipe", "steps": [{"mode": "point", ...}, {"mode": "morph", ...}]}
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+import image_ops
+import recipe
+from file_selection import EXECUTORS, list_image_files, make_path_filter
+
+INPUT_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+OUTPUT_FORMATS = ("png", "jpg", "bmp", "tif")
+IO_THREADS = 4
+
+
+def _read_file(path):
+    """Стадия чтения (поток): байты файла и время чтения."""
+    start = time.perf_counter()
+    data = np.fromfile(path, dtype=np.uint8)
+    return data, time.perf_counter() - start
+
+
+def _process_bytes(data, ext, params):
+    """
+    Стадия обработки (рабочий процесс): декодирование, операция, кодирование.
+    Возвращает (закодированные байты, мегапиксели, (decode, process, encode)).
+    """
+    t0 = time.perf_counter()
+    img = image_ops.decode_image(data)
+    if img is None:
+        raise ValueError("не удалось декодировать изображение")
+    t1 = time.perf_counter()
+    out = recipe.process(img, params)
+    t2 = time.perf_counter()
+    ok, buffer = cv2.imencode(ext, out)
+    if not ok:
+        raise ValueError(f"не удалось закодировать изображение в формат {ext}")
+    t3 = time.perf_counter()
+    return buffer, img.shape[0] * img.shape[1] / 1e6, (t1 - t0, t2 - t1, t3 - t2)
+
+
+def _write_file(path, buffer):
+    """Стадия записи (поток)."""
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    buffer.tofile(path)
+    return time.perf_counter() - start
+
+
+class BatchStats:
+    """Итоговые счетчики пакета: файлы, мегапиксели, байты и суммы времен стадий."""
+
+    STAGES = ("read", "decode", "process", "encode", "write")
+
+    def __init__(self):
+        self.files = 0
+        self.failed = 0
+        self.megapixels = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.stage_totals = dict.fromkeys(self.STAGES, 0.0)
+        self.start = time.perf_counter()
+
+    def add(self, record):
+        self.files += 1
+        self.megapixels += record["megapixels"]
+        self.bytes_in += record["bytes_in"]
+        self.bytes_out += record["bytes_out"]
+        for name in self.STAGES:
+            self.stage_totals[name] += record[f"{name}_s"]
+
+    def to_dict(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "elapsed_s": round(elapsed, 3),
+            "files_per_s": round(self.files / elapsed, 2),
+            "megapixels_per_s": round(self.megapixels / elapsed, 2),
+            "mb_in_per_s": round(self.bytes_in / elapsed / 1e6, 2),
+            "stage_totals_s": {name: round(t, 3) for name, t in self.stage_totals.items()},
+        }
+
+    def summary(self):
+        data = self.to_dict()
+        stages = ", ".join(f"{name} {t:.2f} с" for name, t in data["stage_totals_s"].items())
+        return (
+            f"Итого: {data['files']} файлов (ошибок: {data['failed']}) за {data['elapsed_s']:.1f} с — "
+            f"{data['files_per_s']:.1f} файлов/с, {data['megapixels_per_s']:.1f} Мпикс/с, "
+            f"{data['mb_in_per_s']:.1f} МБ/с на входе\n"
+            f"Сумма времен стадий: {stages}"
+        )
+
+
+def output_path(src, folder, output_dir, fmt=None):
+    """Путь результата: та же относительная структура папок, расширение — fmt или исходное."""
+    relative = os.path.relpath(src, folder)
+    if fmt is not None:
+        relative = os.path.splitext(relative)[0] + "." + fmt
+    return os.path.join(output_dir, relative)
+
+
+def run_batch(jobs, params, workers=None, executor="process", max_in_flight=None):
+    """
+    Конвейер для итерируемого набора пар (исходный путь, путь результата).
+    Генерирует словари-отчеты по файлам в порядке готовности; при ошибке
+    в отчете есть ключ "error".
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    max_in_flight = max_in_flight or workers * 2
+    jobs = iter(jobs)
+    if executor == "process":
+        compute_pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        compute_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+    io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="batch-io")
+
+    reading = deque()   # (src, dst, start, future) в порядке входа
+    active = {}         # future обработки или записи -> (стадия, record)
+    exhausted = False
+    try:
+        while True:
+            # Чтение с опережением: в работе не больше max_in_flight файлов
+            while not exhausted and len(reading) + len(active) < max_in_flight:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    break
+                src, dst = job
+                reading.append((src, dst, time.perf_counter(), io_pool.submit(_read_file, src)))
+            if not reading and not active:
+                return
+
+            waiting = set(active)
+            if reading:
+                waiting.add(reading[0][3])
+            wait(waiting, return_when=FIRST_COMPLETED)
+
+            while reading and reading[0][3].done():
+                src, dst, start, future = reading.popleft()
+                record = {"path": src, "output": dst, "start": start}
+                try:
+                    data, record["read_s"] = future.result()
+                except OSError as e:
+                    yield {**record, "error": str(e)}
+                    continue
+                record["bytes_in"] = data.nbytes
+                ext = os.path.splitext(dst)[1].lower() or ".png"
+                active[compute_pool.submit(_process_bytes, data, ext, params)] = ("process", record)
+
+            for future in [f for f in active if f.done()]:
+                stage, record = active.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield {**record, "error": str(e)}
+                    continue
+                if stage == "process":
+                    buffer, record["megapixels"], timings = result
+                    record["decode_s"], record["process_s"], record["encode_s"] = timings
+                    record["bytes_out"] = buffer.nbytes
+                    active[io_pool.submit(_write_file, record["output"], buffer)] = ("write", record)
+                else:
+                    record["write_s"] = result
+                    yield record
+    finally:
+        for future in list(active) + [item[3] for item in reading]:
+            future.cancel()
+        # Ждем только уже запущенные задачи: без ожидания пул процессов
+        # закрывается параллельно с выходом интерпретатора (Bad file descriptor)
+        compute_pool.shutdown(wait=True, cancel_futures=True)
+        io_pool.shutdown(wait=True)
+
+
+def _format_record(record):
+    if "error" in record:
+        return f"ОШИБКА {record['path']}: {record['error']}"
+    latency = time.perf_counter() - record["start"]
+    compute = record["decode_s"] + record["process_s"] + record["encode_s"]
+    return (
+        f"{record['path']} -> {record['output']}: {record['megapixels']:.1f} Мпикс, "
+        f"чтение {1000 * record['read_s']:.0f} мс, декод. {1000 * record['decode_s']:.0f} мс, "
+        f"обработка {1000 * record['process_s']:.0f} мс, код. {1000 * record['encode_s']:.0f} мс, "
+        f"запись {1000 * record['write_s']:.0f} мс — {record['megapixels'] / max(compute, 1e-9):.1f} Мпикс/с, "
+        f"в конвейере {latency:.2f} с"
+    )
+
+
+def run(args):
+    folder = os.path.abspath(args.folder)
+    output_dir = os.path.abspath(args.output_dir)
+    params = recipe.load_recipe(args.preset)
+    path_filter = make_path_filter(folder, args.include, args.exclude)
+    # Результаты, записанные в папку внутри исходной, не обрабатываются повторно
+    if output_dir.startswith(folder + os.sep):
+        inner = path_filter
+
+        def path_filter(path):
+            return not path.startswith(output_dir + os.sep) and (inner is None or inner(path))
+    files = sorted(list_image_files(folder, INPUT_EXTENSIONS, path_filter))
+    print(f"Файлов: {len(files)}, пресет: {json.dumps(params, ensure_ascii=False)}", file=sys.stderr, flush=True)
+
+    jobs = []
+    for src in files:
+        dst = output_path(src, folder, output_dir, args.format)
+        if args.skip_existing and os.path.exists(dst):
+            continue
+        jobs.append((src, dst))
+
+    stats = BatchStats()
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+    try:
+        for record in run_batch(jobs, params, args.workers, args.executor):
+            if "error" in record:
+                stats.failed += 1
+            else:
+                stats.add(record)
+            if not args.quiet:
+                print(_format_record(record), flush=True)
+            if report is not None:
+                item = {key: round(v, 6) if isinstance(v, float) else v for key, v in record.items() if key != "start"}
+                report.write(json.dumps(item, ensure_ascii=False) + "\n")
+    except KeyboardInterrupt:
+        print("Прервано; запустите с --skip-existing, чтобы продолжить.", file=sys.stderr)
+        return 130
+    finally:
+        if report is not None:
+            report.write(json.dumps({"summary": stats.to_dict()}, ensure_ascii=False) + "\n")
+            report.close()
+        print(stats.summary(), file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная обработка изображений по пресету (лаб. №3)")
+    parser.add_argument("folder", help="папка с исходными изображениями (рекурсивно)")
+    parser.add_argument("output_dir", help="папка для результатов (структура подпапок сохраняется)")
+    parser.add_argument("-p", "--preset", required=True, help="JSON-пресет параметров или рецепт")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, help="формат результата (по умолчанию исходный)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--executor", choices=EXECUTORS, default="process", help="тип пула обработки")
+    parser.add_argument("--include", action="append", default=[], help="glob относительного пути (можно повторять)")
+    parser.add_argument("--exclude", action="append", default=[], help="glob для исключения (можно повторять)")
+    parser.add_argument("--skip-existing", action="store_true", help="пропускать файлы, результат которых уже есть")
+    parser.add_argument("--report", metavar="JSONL", help="записать отчеты по файлам и итог в JSON Lines")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не печатать строку по каждому файлу")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        parser.error(f"папка не найдена: {args.folder}")
+    try:
+        recipe.load_recipe(args.preset)
+    except (OSError, ValueError) as e:
+        parser.error(f"некорректный пресет: {e}")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""Общие замеры времени для бенчмарков."""
+import time
+
+
+def best_time(func, repeat):
+    """Минимальное время из repeat запусков (секунды)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
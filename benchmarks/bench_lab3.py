@@ -0,0 +1,247 @@
+"""
+Бенчмарк операций лаб. №3 на синтетических изображениях разного размера.
+
+Для каждого размера (мегапиксели) и цветности (серое/BGR) измеряются:
+    point   — поэлементные операции image_ops (контраст, негатив, рецепт
+              из трех поэлементных шагов — одна общая таблица);
+    morph   — эрозия и дилатация каждой формой и размером ядра;
+    hist    — гистограммы: как в окне (большие изображения — по подвыборке
+              строк, см. image_ops.HIST_MAX_PIXELS), по всем пикселям и
+              вывод через LUT;
+    display — масштабирование под холст ImageView (scale_into) и LANCZOS.
+
+Время — лучшее из --repeat запусков, скорость — Мпикс/с исходного
+изображения. Пиковая память — прирост пикового RSS процесса за время
+случая (Linux: пик сбрасывается через /proc/self/clear_refs; на других
+системах — общий пик процесса). --json сохраняет результаты вместе с
+версиями библиотек и коммитом, --compare сравнивает с прошлым файлом,
+так что регрессии видны между коммитами.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_lab3 [--sizes 1 4 16] [--colors gray bgr] [--json bench.json]
+    python -m benchmarks.bench_lab3 --sizes 200 --cases point hist --repeat 1
+    python -m benchmarks.bench_lab3 --json new.json --compare old.json
+"""
+import argparse
+import ctypes
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import image_ops
+import recipe
+from benchmarks._timing import best_time
+from image_view import fit_size, lanczos, scale_into
+
+CASES = ("point", "morph", "hist", "display")
+SHAPES = ("Rect", "Ellipse", "Cross")
+# Размер холста ImageView в окне 1300x900
+DISPLAY_SIZE = (620, 420)
+# Во сколько раз шум мельче изображения (сглаживание при увеличении)
+NOISE_FACTOR = 8
+
+
+def _rss_kb(field):
+    """VmRSS/VmHWM процесса в КБ (Linux) или None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak():
+    """Сбрасывает пиковый RSS (VmHWM) до текущего; False, если система не позволяет."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_kb():
+    peak = _rss_kb("VmHWM")
+    if peak is None:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak //= 1024  # на macOS ru_maxrss в байтах
+    return peak
+
+
+def _release_free_memory():
+    """Возвращает системе освобожденную память, чтобы прирост RSS отражал сам случай."""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def measure(func, repeat):
+    """
+    (лучшее время в секундах, прирост пикового RSS в МБ) для func.
+    Первый запуск прогревает кэши таблиц и ядер: он не учитывается во
+    времени, но учитывается в пике памяти.
+    """
+    _release_free_memory()
+    base = _rss_kb("VmRSS") if _reset_peak() else _peak_kb()
+    func()
+    seconds = best_time(func, repeat)
+    return seconds, max(0, _peak_kb() - base) / 1024
+
+
+def synthetic_image(megapixels, gray, seed=0):
+    """
+    Изображение 3:2 заданной площади: сглаженный шум (случайный массив в
+    NOISE_FACTOR раз меньше, увеличенный INTER_LINEAR) — похоже на
+    фотографию больше, чем независимые пиксели, и создается быстро даже
+    для 200 Мпикс.
+    """
+    width = int(round((megapixels * 1e6 * 1.5) ** 0.5))
+    height = int(round(megapixels * 1e6 / width))
+    rng = np.random.default_rng(seed)
+    small_shape = (max(1, height // NOISE_FACTOR), max(1, width // NOISE_FACTOR))
+    small = rng.integers(0, 256, size=small_shape if gray else small_shape + (3,), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def _point_cases():
+    contrast = {"mode": image_ops.MODE_POINT, "contrast": 1.3, "brightness": 10.0, "invert": False}
+    negative = dict(contrast, invert=True)
+    chain = {"mode": recipe.MODE_RECIPE, "steps": [
+        contrast, dict(contrast, contrast=0.9, brightness=-5.0), negative,
+    ]}
+    return [("contrast", contrast), ("contrast+negative", negative), ("recipe 3 point", chain)]
+
+
+def _morph_cases(kernel_sizes):
+    return [
+        (f"{morph_type} {shape} {size}", {
+            "mode": image_ops.MODE_MORPH, "morph_type": morph_type, "kernel_shape": shape, "kernel_size": size,
+        })
+        for shape in SHAPES for size in kernel_sizes for morph_type in image_ops.MORPH_TYPES
+    ]
+
+
+def iter_cases(img, cases, kernel_sizes):
+    """(случай, операция, параметры, функция) для изображения img."""
+    if "point" in cases:
+        for name, params in _point_cases():
+            yield "point", name, params, lambda p=params: recipe.process(img, p)
+    if "morph" in cases:
+        for name, params in _morph_cases(kernel_sizes):
+            yield "morph", name, params, lambda p=params: recipe.process(img, p)
+    if "hist" in cases:
+        yield "hist", "histograms", None, lambda: image_ops.histograms(img)
+        pixels = img.shape[0] * img.shape[1]
+        yield "hist", "histograms (full)", None, lambda: image_ops.histograms(img, max_pixels=pixels)
+        if img.dtype == np.uint8:
+            point = _point_cases()[1][1]
+            hists = image_ops.histograms(img)
+            yield "hist", "derive (LUT)", point, lambda: recipe.derive_histograms(img, hists, point)
+    if "display" in cases:
+        size = fit_size(img.shape[1], img.shape[0], *DISPLAY_SIZE)
+        bgr = np.empty(size[::-1] + img.shape[2:], dtype=np.uint8)
+        rgba = np.empty(size[::-1] + (4,), dtype=np.uint8)
+        yield "display", "scale_into", {"size": list(size)}, lambda: scale_into(img, bgr, rgba)
+        yield "display", "lanczos", {"size": list(size)}, lambda: lanczos(img, size)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": _git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "opencv_threads": cv2.getNumThreads(),
+    }
+
+
+def _key(result):
+    return result["case"], result["op"], result["color"], result["megapixels"]
+
+
+def compare(results, old_path):
+    """Печатает отношение скоростей к результатам из old_path (больше 1 — быстрее)."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    previous = {_key(r): r for r in old["results"]}
+    print(f"\nСравнение с {old_path} (коммит {old['environment'].get('commit')}):")
+    print(f"{'случай':<34}{'было, Мпикс/с':>15}{'стало':>10}{'отношение':>11}")
+    for result in results:
+        before = previous.get(_key(result))
+        if before is None:
+            continue
+        ratio = result["mp_per_s"] / before["mp_per_s"] if before["mp_per_s"] else float("inf")
+        mark = "  <" if ratio < 0.9 else ""
+        label = f"{result['op']} {result['color']} {result['megapixels']:g}MP"
+        print(f"{label:<34}{before['mp_per_s']:>15.1f}{result['mp_per_s']:>10.1f}{ratio:>10.2f}x{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="размеры изображений, Мпикс")
+    parser.add_argument("--colors", nargs="+", choices=("gray", "bgr"), default=["gray", "bgr"])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--kernel-sizes", type=int, nargs="+", default=[3, 7, 15, 31])
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов (берется лучшее время)")
+    parser.add_argument("--json", metavar="PATH", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="PATH", help="сравнить со старым JSON-файлом результатов")
+    args = parser.parse_args(argv)
+
+    env = environment()
+    print(f"Коммит {env['commit']}, Python {env['python']}, NumPy {env['numpy']}, OpenCV {env['opencv']}, "
+          f"ядер {env['cpus']}, повторов {args.repeat}")
+    print(f"{'случай':<34}{'цвет':<6}{'Мпикс':>7}{'время, мс':>12}{'Мпикс/с':>12}{'пик, МБ':>10}")
+    results = []
+    for megapixels in args.sizes:
+        for color in args.colors:
+            img = synthetic_image(megapixels, color == "gray")
+            actual = img.shape[0] * img.shape[1] / 1e6
+            for case, op, params, func in iter_cases(img, args.cases, args.kernel_sizes):
+                seconds, peak_mb = measure(func, args.repeat)
+                results.append({
+                    "case": case, "op": op, "params": params, "color": color, "megapixels": megapixels,
+                    "width": img.shape[1], "height": img.shape[0], "seconds": round(seconds, 6),
+                    "mp_per_s": round(actual / seconds, 2), "peak_mb": round(peak_mb, 1),
+                })
+                print(f"{case + ': ' + op:<34}{color:<6}{megapixels:>7g}{seconds * 1000:>12.2f}"
+                      f"{actual / seconds:>12.1f}{peak_mb:>10.1f}", flush=True)
+            del img
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": env, "results": results}, f, ensure_ascii=False, indent=1)
+        print(f"\nРезультаты: {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Бенчмарк передаточной функции sRGB: степенные формулы против LUT.
+
+LUT используется только для линеаризации 8-битного входа. Прямая гамма
+измеряется для сравнения: таблица с интерполяцией была не быстрее
+np.power, поэтому xyz_to_rgb считает ее по формуле.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_srgb_lut [--pixels 4000000] [--repeat 5]
+"""
+import argparse
+
+import numpy as np
+
+import color_engine
+from benchmarks._timing import best_time
+
+
+def _pow_rgb_to_xyz(rgb):
+    """Исходный вариант: линеаризация возведением в степень."""
+    linear = color_engine.linearize(rgb / 255)
+    return color_engine.apply_matrix(color_engine.RGB_TO_XYZ, linear) * 100
+
+
+def _scalar_linearize(val):
+    return ((val + 0.055) / 1.055) ** 2.4 if val > 0.04045 else val / 12.92
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pixels", type=int, default=4_000_000, help="число пикселей в тестовом массиве")
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов (берется лучшее время)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, size=(args.pixels, 3), dtype=np.uint8)
+    rgb_float = rgb.astype(np.float64)
+    xyz = color_engine.rgb_to_xyz(rgb)
+
+    cases = [
+        ("linearize (pow)", lambda: color_engine.linearize(rgb_float / 255)),
+        ("linearize (LUT)", lambda: color_engine.linearize_8bit(rgb)),
+        ("rgb_to_xyz (pow)", lambda: _pow_rgb_to_xyz(rgb_float)),
+        ("rgb_to_xyz (LUT)", lambda: color_engine.rgb_to_xyz(rgb)),
+        ("gamma (pow)", lambda: np.clip(color_engine.gamma_correct(rgb_float / 255), 0, 1)),
+        ("xyz_to_rgb", lambda: color_engine.xyz_to_rgb(xyz)),
+    ]
+
+    print(f"Пикселей: {args.pixels:,}, повторов: {args.repeat}")
+    print(f"{'операция':<20}{'время, мс':>12}{'Мпикс/с':>12}")
+    timings = {}
+    for name, func in cases:
+        elapsed = best_time(func, args.repeat)
+        timings[name] = elapsed
+        print(f"{name:<20}{elapsed * 1000:>12.1f}{args.pixels / elapsed / 1e6:>12.1f}")
+
+    print()
+    for op in ("linearize", "rgb_to_xyz"):
+        speedup = timings[f"{op} (pow)"] / timings[f"{op} (LUT)"]
+        print(f"Ускорение {op}: x{speedup:.1f}")
+
+    # Скалярный путь GUI: одна линеаризация канала в чистом Python.
+    values = [v / 255 for v in range(256)] * 40
+    scalar_pow = best_time(lambda: [_scalar_linearize(v) for v in values], args.repeat)
+    lut = color_engine.LINEARIZE_LUT.tolist()
+    scalar_lut = best_time(lambda: [lut[v] for v in range(256) for _ in range(40)], args.repeat)
+    print(f"Скалярная линеаризация: pow {scalar_pow * 1e6 / len(values):.3f} мкс, "
+          f"LUT {scalar_lut * 1e6 / len(values):.3f} мкс на значение")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Необязательный кэш-куб 256³ для конвертации 8-битных цветов RGB -> XYZ/CMYK.
+
+Для каждой целевой модели все 16.7 млн результатов color_engine заранее
+вычисляются и сохраняются в .npy-файл (float16). Файл открывается через
+memory-map, поэтому поиск — это простая индексация без арифметики, а
+несколько рабочих процессов разделяют одни и те же страницы файла без
+копирования. Куб строится лениво при первом обращении и проверяется по
+аналитическим формулам.
+
+Предварительная сборка:
+    python color_cube.py [--dir ПАПКА] [xyz] [cmyk]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+import color_engine
+
+CUBE_DTYPE = np.float16
+CUBE_SIZE = 256
+# float16 хранит 11 значащих бит: относительная ошибка округления <= 2**-11.
+CUBE_RTOL = 2.0 ** -11
+CUBE_ATOL = 1e-4
+
+TARGETS = {
+    "xyz": (3, color_engine.rgb_to_xyz),
+    "cmyk": (4, color_engine.rgb_to_cmyk),
+}
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "COLOR_CUBE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "color_cube")
+)
+
+
+class ConversionCube:
+    """
+    Таблица RGB(uint8) -> target, отображенная в память.
+    Экземпляр дешев в создании: файл открывается (и при необходимости
+    строится) только при первом вызове lookup().
+    """
+
+    def __init__(self, target, cache_dir=None):
+        if target not in TARGETS:
+            raise ValueError(f"Неизвестная целевая модель: {target}")
+        self.target = target
+        self.channels, self._convert = TARGETS[target]
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self._cube = None
+
+    @property
+    def path(self):
+        return os.path.join(self.cache_dir, f"rgb_to_{self.target}_{CUBE_SIZE}.npy")
+
+    @property
+    def cube(self):
+        """Массив (256, 256, 256, C), открытый только на чтение."""
+        if self._cube is None:
+            if not os.path.exists(self.path):
+                self.build()
+            self._cube = np.load(self.path, mmap_mode="r")
+        return self._cube
+
+    def lookup(self, rgb):
+        """
+        Возвращает значения целевой модели для массива целых RGB формы (..., 3).
+        Результат имеет тип float16, как и хранимые данные.
+        """
+        rgb = np.asarray(rgb)
+        if rgb.shape[-1:] != (3,):
+            raise ValueError(f"Ожидался массив формы (..., 3), получено {rgb.shape}")
+        if rgb.dtype != np.uint8:
+            if rgb.size and (rgb.min() < 0 or rgb.max() > 255 or not np.all(rgb == np.floor(rgb))):
+                raise ValueError("Куб поддерживает только целые значения RGB 0..255")
+            rgb = rgb.astype(np.uint8)
+        return self.cube[rgb[..., 0], rgb[..., 1], rgb[..., 2]]
+
+    def build(self):
+        """
+        Вычисляет куб по плоскостям R и атомарно записывает его на диск.
+        Параллельные сборки в разных процессах безопасны: каждый пишет
+        во временный файл, а os.replace подменяет готовый файл целиком.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            out = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=CUBE_DTYPE,
+                shape=(CUBE_SIZE, CUBE_SIZE, CUBE_SIZE, self.channels)
+            )
+            gb = np.stack(np.meshgrid(np.arange(CUBE_SIZE), np.arange(CUBE_SIZE), indexing="ij"), axis=-1)
+            plane = np.empty((CUBE_SIZE, CUBE_SIZE, 3), dtype=np.uint8)
+            plane[..., 1:] = gb
+            for r in range(CUBE_SIZE):
+                plane[..., 0] = r
+                out[r] = self._convert(plane)
+            out.flush()
+            del out
+            self.verify(tmp_path)
+            os.chmod(tmp_path, 0o644)  # mkstemp создает файл 0600, а куб читают другие процессы
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._cube = None
+
+    def verify(self, path=None, samples=200_000, seed=0):
+        """
+        Сравнивает случайную выборку куба (и все углы куба) с аналитическими
+        формулами color_engine. Возвращает максимальную абсолютную ошибку;
+        при превышении допуска float16 поднимает ValueError.
+        """
+        cube = np.load(path or self.path, mmap_mode="r")
+        rng = np.random.default_rng(seed)
+        rgb = rng.integers(0, CUBE_SIZE, size=(samples, 3), dtype=np.uint8)
+        corners = np.array([[r, g, b] for r in (0, 255) for g in (0, 255) for b in (0, 255)], dtype=np.uint8)
+        rgb = np.concatenate([rgb, corners])
+
+        expected = self._convert(rgb)
+        actual = cube[rgb[:, 0], rgb[:, 1], rgb[:, 2]].astype(np.float64)
+        if not np.allclose(actual, expected, rtol=CUBE_RTOL, atol=CUBE_ATOL):
+            raise ValueError(f"Куб {self.target} не совпадает с аналитическими формулами")
+        return float(np.abs(actual - expected).max())
+
+
+_cubes = {}
+
+
+def get_cube(target, cache_dir=None):
+    """Возвращает общий для процесса экземпляр ConversionCube."""
+    key = (target, cache_dir or DEFAULT_CACHE_DIR)
+    if key not in _cubes:
+        _cubes[key] = ConversionCube(target, cache_dir)
+    return _cubes[key]
+
+
+def rgb_to_xyz(rgb, cache_dir=None):
+    """RGB (uint8) -> XYZ через кэш-куб."""
+    return get_cube("xyz", cache_dir).lookup(rgb)
+
+
+def rgb_to_cmyk(rgb, cache_dir=None):
+    """RGB (uint8) -> CMYK через кэш-куб."""
+    return get_cube("cmyk", cache_dir).lookup(rgb)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сборка и проверка кэш-кубов RGB -> XYZ/CMYK")
+    parser.add_argument("targets", nargs="*", help="целевые модели: xyz, cmyk (по умолчанию все)")
+    parser.add_argument("--dir", default=None, help="папка кэша (по умолчанию $COLOR_CUBE_DIR или ~/.cache)")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"неизвестные модели: {', '.join(sorted(unknown))}")
+
+    for name in args.targets or TARGETS:
+        cube = ConversionCube(name, args.dir)
+        if not os.path.exists(cube.path):
+            cube.build()
+        print(f"{name}: {cube.path}, макс. ошибка {cube.verify():.2e}")
@@ -0,0 +1,146 @@
+"""
+Векторизованное ядро конвертации цветовых моделей RGB, CMYK и XYZ (D65).
+
+Функции принимают массивы формы (..., 3) или (..., 4): одиночный цвет,
+палитру (N, C) или целое изображение (H, W, C) — и выполняют преобразование
+за один проход NumPy. Шкалы совпадают с ColorConverterApp (lab1.py):
+RGB 0..255, CMYK 0..100 (%), XYZ 0..~110.
+"""
+import numpy as np
+
+# Матрицы sRGB <-> XYZ (D65). Коэффициенты хранятся как float, чтобы
+# порядок и точность операций совпадали со скалярными формулами.
+RGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+XYZ_TO_RGB = (
+    (3.2404542, -1.5371385, -0.4985314),
+    (-0.9692660, 1.8760108, 0.0415560),
+    (0.0556434, -0.2040259, 1.0572252),
+)
+
+MODELS = ("rgb", "cmyk", "xyz")
+
+
+def _as_channels(values, channels, dtype=np.float64):
+    """Приводит вход к массиву (по умолчанию float64) и проверяет число каналов."""
+    arr = np.asarray(values, dtype=dtype)
+    if arr.shape[-1:] != (channels,):
+        raise ValueError(f"Ожидался массив формы (..., {channels}), получено {arr.shape}")
+    return arr
+
+
+def apply_matrix(matrix, values):
+    """Умножает каждый пиксель массива (..., 3) на матрицу 3x3 (покомпонентно, без BLAS)."""
+    c0, c1, c2 = values[..., 0], values[..., 1], values[..., 2]
+    return np.stack([c0 * row[0] + c1 * row[1] + c2 * row[2] for row in matrix], axis=-1)
+
+
+def linearize(values):
+    """Обратная гамма sRGB: значения 0..1 -> линейный свет 0..1."""
+    values = np.asarray(values, dtype=np.float64)
+    curve = ((np.maximum(values, 0.04045) + 0.055) / 1.055) ** 2.4
+    return np.where(values > 0.04045, curve, values / 12.92)
+
+
+def gamma_correct(values):
+    """Прямая гамма sRGB: линейный свет -> значения sRGB (без ограничения)."""
+    values = np.asarray(values, dtype=np.float64)
+    curve = 1.055 * np.maximum(values, 0.0031308) ** (1 / 2.4) - 0.055
+    return np.where(values > 0.0031308, curve, 12.92 * values)
+
+
+# --- Таблица (LUT) передаточной функции sRGB ---
+# Для 8-битного входа существует всего 256 линеаризованных значений, поэтому
+# они вычисляются один раз при импорте. Прямая гамма (XYZ -> RGB) считается
+# по формуле: вход там вещественный, а интерполируемая таблица не быстрее
+# np.power (см. benchmarks/bench_srgb_lut.py) и менее точна.
+LINEARIZE_LUT = linearize(np.arange(256) / 255)
+
+
+def _is_8bit(values):
+    """True, если все значения массива — целые числа из диапазона 0..255."""
+    if values.size == 0:
+        return False
+    if np.issubdtype(values.dtype, np.integer):
+        return bool(values.min() >= 0 and values.max() <= 255)
+    return bool(np.all((values >= 0) & (values <= 255) & (values == np.floor(values))))
+
+
+def linearize_8bit(rgb):
+    """Линеаризация целых RGB 0..255 через LUT (индексация вместо степени)."""
+    rgb = np.asarray(rgb)
+    if rgb.dtype != np.uint8:
+        rgb = rgb.astype(np.intp)
+    return LINEARIZE_LUT[rgb]
+
+
+def rgb_to_cmyk(rgb):
+    """RGB (0..255) -> CMYK (0..100 %). Черный цвет дает (0, 0, 0, 100)."""
+    rgb = _as_channels(rgb, 3) / 255
+    k = 1 - rgb.max(axis=-1)
+    denom = 1 - k
+    is_black = denom == 0
+    safe = np.where(is_black, 1.0, denom)[..., None]
+    cmy = np.where(is_black[..., None], 0.0, (1 - rgb - k[..., None]) / safe)
+    k = np.where(is_black, 1.0, k)
+    return np.concatenate([cmy, k[..., None]], axis=-1) * 100
+
+
+def cmyk_to_rgb(cmyk):
+    """CMYK (0..100 %) -> RGB (0..255)."""
+    cmyk = _as_channels(cmyk, 4) / 100
+    return 255 * (1 - cmyk[..., :3]) * (1 - cmyk[..., 3:4])
+
+
+def rgb_to_xyz(rgb):
+    """RGB (0..255) -> XYZ (D65, Y белого = 100)."""
+    rgb = _as_channels(rgb, 3, dtype=None)
+    if _is_8bit(rgb):
+        linear = linearize_8bit(rgb)
+    else:
+        linear = linearize(rgb.astype(np.float64) / 255)
+    return apply_matrix(RGB_TO_XYZ, linear) * 100
+
+
+def xyz_to_linear_rgb(xyz):
+    """XYZ (D65, 0..100) -> линейный RGB без ограничения охвата."""
+    return apply_matrix(XYZ_TO_RGB, _as_channels(xyz, 3) / 100)
+
+
+def xyz_to_rgb(xyz):
+    """
+    XYZ (D65, 0..100) -> RGB (0..255).
+    Возвращает пару (rgb, out_of_gamut), где out_of_gamut — булева маска
+    формы (...,): True, если хотя бы один канал был обрезан до [0, 255].
+    """
+    linear = xyz_to_linear_rgb(xyz)
+    out_of_gamut = ((linear < 0) | (linear > 1)).any(axis=-1)
+    return np.clip(gamma_correct(linear), 0, 1) * 255, out_of_gamut
+
+
+def convert(values, source, target):
+    """
+    Конвертирует массив цветов из модели source в модель target
+    ('rgb', 'cmyk', 'xyz'). Промежуточной моделью служит RGB; при переходе
+    через XYZ -> RGB цвета вне охвата sRGB обрезаются.
+    """
+    if source not in MODELS or target not in MODELS:
+        raise ValueError(f"Неизвестная цветовая модель: {source} -> {target}")
+    if source == target:
+        return np.asarray(values, dtype=np.float64)
+
+    if source == "rgb":
+        rgb = _as_channels(values, 3)
+    elif source == "cmyk":
+        rgb = cmyk_to_rgb(values)
+    else:
+        rgb, _ = xyz_to_rgb(values)
+
+    if target == "rgb":
+        return rgb
+    if target == "cmyk":
+        return rgb_to_cmyk(rgb)
+    return rgb_to_xyz(rgb)
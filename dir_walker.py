@@ -0,0 +1,135 @@
+"""
+Параллельный потоковый обход папки для сканирования метаданных (lab2.py)
+и пакетных режимов (file_selection).
+
+Каждая папка читается через os.scandir отдельной задачей пула потоков,
+поэтому на сетевых дисках и в глубоких деревьях задержки чтения каталогов
+перекрываются. Найденные файлы отдаются сразу, порциями по мере чтения
+каталога, а не после обхода всего дерева; по ходу обхода оценивается
+общее число файлов для индикатора прогресса.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 8
+# Сколько файлов каталога копится перед отправкой порции
+CHUNK_FILES = 256
+# Как часто обновлять оценку общего числа файлов
+ESTIMATE_INTERVAL_S = 0.2
+# Сколько ждать результатов обхода, прежде чем сообщить о простое
+IDLE_TIMEOUT_S = 0.05
+
+
+class DirectoryWalker:
+    """
+    Обходчик дерева папок.
+
+    extensions:      отбираемые расширения (в нижнем регистре);
+    path_filter:     необязательная функция path -> bool;
+    workers:         число потоков, читающих каталоги;
+    follow_symlinks: заходить ли в символические ссылки на папки. Каждая
+                     папка посещается один раз по (st_dev, st_ino), поэтому
+                     циклы из ссылок не приводят к зацикливанию.
+    """
+
+    def __init__(self, folder_path, extensions, path_filter=None,
+                 workers=DEFAULT_WORKERS, follow_symlinks=False):
+        self.folder_path = folder_path
+        self.extensions = extensions
+        self.path_filter = path_filter
+        self.workers = max(1, workers)
+        self.follow_symlinks = follow_symlinks
+
+    def _scan_dir(self, path, results, stop):
+        """Задача пула: читает один каталог и кладет в results порции файлов и подпапки."""
+        files, subdirs = [], []
+        start = time.perf_counter()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if stop.is_set():
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                            key = None
+                            if self.follow_symlinks:
+                                st = entry.stat()
+                                key = (st.st_dev, st.st_ino)
+                            subdirs.append((entry.path, key))
+                        elif entry.name.lower().endswith(self.extensions) and entry.is_file():
+                            if self.path_filter is None or self.path_filter(entry.path):
+                                files.append(entry.path)
+                                if len(files) >= CHUNK_FILES:
+                                    results.put(("files", files))
+                                    files = []
+                    except OSError:
+                        continue  # Битая ссылка или нет прав — как и os.walk, пропускаем
+        except OSError:
+            pass
+        finally:
+            results.put(("dir", files, subdirs, time.perf_counter() - start))
+
+    def walk(self, cancel_event=None, profile=None):
+        """
+        Генератор событий обхода:
+            ("file", path)         — найденный файл;
+            ("total", n, exact)    — оценка общего числа файлов (exact=True в конце);
+            ("idle",)              — новых файлов пока нет (обход ждет диск).
+        В profile (scan_profile.ScanProfile) записывается время чтения каждого каталога.
+        """
+        results = queue.Queue()
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="walk")
+        visited = set()
+        if self.follow_symlinks:
+            st = os.stat(self.folder_path)
+            visited.add((st.st_dev, st.st_ino))
+
+        outstanding = 1
+        dirs_done = found = 0
+        last_estimate = None
+        last_time = 0.0
+        pool.submit(self._scan_dir, self.folder_path, results, stop)
+        try:
+            while outstanding:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    kind, files, *rest = results.get(timeout=IDLE_TIMEOUT_S)
+                except queue.Empty:
+                    yield ("idle",)
+                    continue
+
+                found += len(files)
+                for path in files:
+                    yield ("file", path)
+                if kind != "dir":
+                    continue
+
+                subdirs, elapsed = rest
+                if profile is not None:
+                    profile.add_stage("walk", elapsed)
+                outstanding -= 1
+                dirs_done += 1
+                for path, key in subdirs:
+                    if key is not None:
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                    outstanding += 1
+                    pool.submit(self._scan_dir, path, results, stop)
+
+                # Оценка: в каждой непрочитанной папке столько же файлов, сколько в среднем в прочитанных
+                estimate = found + round(outstanding * found / dirs_done)
+                now = time.perf_counter()
+                if outstanding and estimate != last_estimate and now - last_time >= ESTIMATE_INTERVAL_S:
+                    last_estimate, last_time = estimate, now
+                    yield ("total", estimate, False)
+
+            yield ("total", found, True)
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
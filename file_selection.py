@@ -0,0 +1,44 @@
+"""
+Отбор файлов папки для режимов без графического интерфейса.
+
+Общие для scan_cli (лаб. №2) и batch_cli (лаб. №3): список файлов с
+нужными расширениями (параллельный обход dir_walker), фильтр путей по
+шаблонам --include/--exclude и варианты пула обработки --executor.
+Модуль не зависит от кода лабораторных: его можно импортировать, не
+загружая разбор метаданных, хэши и индекс.
+"""
+import fnmatch
+import os
+
+from dir_walker import DirectoryWalker
+
+EXECUTORS = ("process", "thread")
+
+
+def list_image_files(folder_path, extensions, path_filter=None):
+    """
+    Рекурсивно собирает пути файлов папки с расширениями extensions.
+    path_filter — необязательная функция path -> bool для отбора файлов.
+    """
+    walker = DirectoryWalker(folder_path, extensions, path_filter)
+    return [event[1] for event in walker.walk() if event[0] == "file"]
+
+
+def make_path_filter(folder, include=(), exclude=(), skip=()):
+    """
+    Строит фильтр путей для обхода папки. Шаблоны сравниваются с путем
+    относительно папки (разделитель '/'); '*' совпадает и с '/'.
+    Возвращает None, если фильтровать нечего.
+    """
+    if not (include or exclude or skip):
+        return None
+
+    def path_filter(path):
+        if path in skip:
+            return False
+        relative = os.path.relpath(path, folder).replace(os.sep, "/")
+        if include and not any(fnmatch.fnmatch(relative, p) for p in include):
+            return False
+        return not any(fnmatch.fnmatch(relative, p) for p in exclude)
+
+    return path_filter
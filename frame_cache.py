@@ -0,0 +1,84 @@
+"""
+Кэш обработанных кадров для ImageProcessorApp (lab3.py).
+
+Хранит результат обработки превью и его гистограммы по ключу
+(номер изображения, параметры операции). Объем ограничен в байтах:
+при переполнении вытесняются давно не использованные кадры (LRU).
+Кэш общий для потока Tk (проверка перед отправкой в фон) и фонового
+исполнителя (сохранение готовых кадров), поэтому защищен блокировкой.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def frame_key(image_id, params):
+    """Ключ кадра: номер изображения и параметры или рецепт (уже квантованные, см. image_ops.quantize_params)."""
+    return (image_id, json.dumps(params, sort_keys=True))
+
+
+def _frame_size(frame):
+    img, hists = frame
+    return img.nbytes + sum(h.nbytes for h in hists)
+
+
+class FrameCache:
+    """LRU-кэш кадров (изображение, гистограммы) с ограничением по байтам."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        """Кадр по ключу (и отметка «недавно использован») или None."""
+        with self._lock:
+            frame = self._items.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        """Сохраняет кадр; кадр больше всего бюджета не кэшируется."""
+        size = _frame_size(frame)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= _frame_size(old)
+            self._items[key] = frame
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= _frame_size(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (
+            f"Кэш: {len(self._items)} кадров, {self.bytes / 1e6:.0f}/{self.max_bytes / 1e6:.0f} МБ, "
+            f"попаданий {self.hits}/{self.hits + self.misses} ({100 * self.hit_rate:.0f} %), "
+            f"вытеснено {self.evictions}"
+        )
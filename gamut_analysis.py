@@ -0,0 +1,174 @@
+"""
+Анализ охвата sRGB для целых изображений в XYZ или линейном RGB (например, HDR).
+
+Изображение обрабатывается полосами строк, поэтому кадры в 100+ Мпикс,
+открытые через np.load(..., mmap_mode="r"), анализируются в ограниченной
+памяти. Матрица XYZ -> sRGB берется из color_engine (те же константы,
+что и в ColorConverterApp).
+"""
+import math
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import color_engine
+
+DEFAULT_CHUNK_PIXELS = 4_000_000
+CHANNELS = ("R", "G", "B")
+
+
+class AnalysisCancelled(Exception):
+    """Анализ прерван через cancel (см. analyze_gamut)."""
+
+
+@dataclass
+class GamutReport:
+    """Итог анализа: счетчики по пикселям и величина обрезки."""
+    total_pixels: int = 0
+    out_of_gamut_pixels: int = 0
+    below_zero: list = field(default_factory=lambda: [0, 0, 0])
+    above_one: list = field(default_factory=lambda: [0, 0, 0])
+    clip_error_sum: float = 0.0
+    clip_error_max: float = 0.0
+    mask: np.ndarray = None
+    preview: np.ndarray = None
+
+    @property
+    def preserved_pixels(self):
+        return self.total_pixels - self.out_of_gamut_pixels
+
+    @property
+    def out_of_gamut_percent(self):
+        return 100.0 * self.out_of_gamut_pixels / self.total_pixels if self.total_pixels else 0.0
+
+    @property
+    def clip_error_mean(self):
+        """Средняя величина обрезки (в линейном свете) среди обрезанных пикселей."""
+        return self.clip_error_sum / self.out_of_gamut_pixels if self.out_of_gamut_pixels else 0.0
+
+    def summary(self):
+        lines = [
+            f"Пикселей: {self.total_pixels:,}",
+            f"Вне охвата sRGB: {self.out_of_gamut_pixels:,} ({self.out_of_gamut_percent:.2f} %)",
+            f"Сохранено без изменений: {self.preserved_pixels:,}",
+            f"Обрезка (линейный свет): средняя {self.clip_error_mean:.4f}, макс. {self.clip_error_max:.4f}",
+        ]
+        for name, low, high in zip(CHANNELS, self.below_zero, self.above_one):
+            lines.append(f"{name}: < 0 — {low:,}, > 1 — {high:,}")
+        return "\n".join(lines)
+
+
+def _to_linear_rgb(chunk, space, scale):
+    chunk = chunk.astype(np.float64) / scale
+    if space == "xyz":
+        return color_engine.apply_matrix(color_engine.XYZ_TO_RGB, chunk)
+    return chunk
+
+
+def analyze_gamut(image, space="xyz", scale=None, chunk_pixels=DEFAULT_CHUNK_PIXELS,
+                  mask_out=None, return_mask=True, preview_size=None, progress=None, cancel=None):
+    """
+    Анализирует изображение (H, W, 3) или массив цветов (N, 3).
+
+    space:        'xyz' (Y белого = scale, по умолчанию 100) или
+                  'linear_rgb' (линейный sRGB, белый = scale, по умолчанию 1).
+    mask_out:     готовый булев массив (H, W) для маски, например np.memmap;
+                  иначе маска создается в памяти, если return_mask=True.
+    preview_size: максимальная сторона уменьшенной маски для показа;
+                  блок превью помечается, если в нем есть хоть один пиксель вне охвата.
+    progress:     необязательная функция fraction -> None, вызывается после каждой полосы.
+    cancel:       необязательный threading.Event; если он установлен, перед
+                  следующей полосой поднимается AnalysisCancelled.
+    """
+    if space not in ("xyz", "linear_rgb"):
+        raise ValueError(f"Неизвестное пространство: {space}")
+    if scale is None:
+        scale = 100.0 if space == "xyz" else 1.0
+    if image.shape[-1] != 3 or image.ndim not in (2, 3):
+        raise ValueError(f"Ожидался массив (H, W, 3) или (N, 3), получено {image.shape}")
+
+    frame = image if image.ndim == 3 else image[:, None, :]
+    height, width = frame.shape[:2]
+
+    report = GamutReport(total_pixels=height * width)
+    mask = mask_out
+    if mask is None and return_mask:
+        mask = np.empty((height, width), dtype=bool)
+
+    step = 1
+    if preview_size:
+        step = max(1, math.ceil(max(height, width) / preview_size))
+        report.preview = np.zeros((math.ceil(height / step), math.ceil(width / step)), dtype=bool)
+
+    # Высота полосы кратна шагу превью, чтобы блоки превью не делились между полосами.
+    rows = max(1, chunk_pixels // max(width, 1))
+    rows = max(step, rows - rows % step)
+
+    for top in range(0, height, rows):
+        if cancel is not None and cancel.is_set():
+            raise AnalysisCancelled()
+        linear = _to_linear_rgb(frame[top:top + rows], space, scale)
+        below = linear < 0
+        above = linear > 1
+        chunk_mask = (below | above).any(axis=-1)
+
+        report.out_of_gamut_pixels += int(chunk_mask.sum())
+        for c in range(3):
+            report.below_zero[c] += int(below[..., c].sum())
+            report.above_one[c] += int(above[..., c].sum())
+
+        if chunk_mask.any():
+            error = np.abs(linear[chunk_mask] - np.clip(linear[chunk_mask], 0.0, 1.0)).max(axis=-1)
+            report.clip_error_sum += float(error.sum())
+            report.clip_error_max = max(report.clip_error_max, float(error.max()))
+
+        if mask is not None:
+            mask[top:top + rows] = chunk_mask
+        if report.preview is not None:
+            report.preview[top // step:(top + rows + step - 1) // step] = _block_any(chunk_mask, step)
+        if progress is not None:
+            progress(min(top + rows, height) / height)
+
+    report.mask = mask
+    return report
+
+
+def _block_any(mask, step):
+    """Уменьшает маску в step раз: блок True, если в нем есть хоть один True."""
+    if step == 1:
+        return mask
+    h, w = mask.shape
+    ph, pw = -h % step, -w % step
+    padded = np.pad(mask, ((0, ph), (0, pw)))
+    return padded.reshape(padded.shape[0] // step, step, padded.shape[1] // step, step).any(axis=(1, 3))
+
+
+def load_image(path):
+    """
+    Загружает изображение для анализа. Возвращает пару (массив, пространство).
+    .npy — массив XYZ (Y белого = 100), открывается через memory-map;
+    .exr/.hdr/.tif/.tiff с плавающей точкой — линейный RGB (через OpenCV).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        return np.load(path, mmap_mode="r"), "xyz"
+
+    import cv2  # OpenCV нужен только для HDR-форматов
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED | cv2.IMREAD_ANYDEPTH | cv2.IMREAD_ANYCOLOR)
+    if img is None:
+        raise ValueError(f"Не удалось прочитать изображение: {path}")
+    if not np.issubdtype(img.dtype, np.floating):
+        raise ValueError("Ожидалось изображение с плавающей точкой (линейный свет)")
+    if img.ndim != 3 or img.shape[2] < 3:
+        raise ValueError("Ожидалось цветное изображение")
+    return cv2.cvtColor(img[..., :3], cv2.COLOR_BGR2RGB), "linear_rgb"
+
+
+def mask_to_ppm(mask, in_color=(40, 40, 40), out_color=(255, 165, 0)):
+    """Кодирует маску в бинарный PPM (P6), который tk.PhotoImage читает без Pillow."""
+    h, w = mask.shape
+    rgb = np.empty((h, w, 3), dtype=np.uint8)
+    rgb[...] = in_color
+    rgb[mask] = out_color
+    return f"P6 {w} {h} 255 ".encode("ascii") + rgb.tobytes()
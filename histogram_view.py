@@ -0,0 +1,98 @@
+"""
+Виджет гистограммы для ImageProcessorApp (lab3.py).
+
+Рисует прямо на tk.Canvas: оси, сетка и линии каналов создаются один раз,
+а при обновлении у существующих линий меняются только координаты
+(canvas.coords). Это заменяет пересоздание matplotlib.Figure и
+FigureCanvasTkAgg на каждое движение ползунка.
+"""
+import tkinter as tk
+
+import numpy as np
+
+# Цвета matplotlib 'b', 'g', 'r', которыми гистограмма рисовалась раньше
+CHANNEL_COLORS = ("#0000ff", "#008000", "#ff0000")
+GRAY_LINE = "black"
+GRAY_FILL = "#d9d9d9"
+GRID_COLOR = "#eeeeee"
+AXIS_COLOR = "#888888"
+GRID_STEPS = 4
+
+
+class HistogramView(tk.Canvas):
+    """Гистограмма 256 корзин для одного (серое) или трех (B, G, R) каналов."""
+
+    def __init__(self, master, title="Гистограмма", bg="#f0f2f5", **kwargs):
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(master, bg=bg, **kwargs)
+        self.margin = (34, 22, 8, 18)  # слева, сверху, справа, снизу
+        self._hists = None
+
+        self._title = self.create_text(0, 4, text=title, anchor="n", font=("Segoe UI", 9, "bold"))
+        self._plot = self.create_rectangle(0, 0, 0, 0, fill="white", outline=AXIS_COLOR)
+        self._grid = [self.create_line(0, 0, 0, 0, fill=GRID_COLOR) for _ in range(2 * (GRID_STEPS - 1))]
+        self._x_labels = [self.create_text(0, 0, text=str(v), anchor="n", font=("Segoe UI", 7))
+                          for v in (0, 64, 128, 192, 256)]
+        self._y_label = self.create_text(0, 0, text="", anchor="e", font=("Segoe UI", 7))
+        self._fill = self.create_polygon(0, 0, 0, 0, 0, 0, fill=GRAY_FILL, outline="", state="hidden")
+        self._lines = [self.create_line(0, 0, 0, 0, fill=color, width=1, state="hidden")
+                       for color in (GRAY_LINE,) + CHANNEL_COLORS]
+        self._x = np.arange(256, dtype=np.float64)
+
+        self.bind("<Configure>", lambda e: self._layout())
+
+    def _plot_box(self):
+        left, top, right, bottom = self.margin
+        w, h = max(self.winfo_width(), 60), max(self.winfo_height(), 60)
+        return left, top, w - right, h - bottom
+
+    def _layout(self):
+        """Перерасчет осей и сетки при изменении размера; линии перерисовываются из сохраненных данных."""
+        x0, y0, x1, y1 = self._plot_box()
+        self.coords(self._title, (x0 + x1) / 2, 4)
+        self.coords(self._plot, x0, y0, x1, y1)
+        for i in range(1, GRID_STEPS):
+            x = x0 + (x1 - x0) * i / GRID_STEPS
+            y = y0 + (y1 - y0) * i / GRID_STEPS
+            self.coords(self._grid[2 * i - 2], x, y0 + 1, x, y1 - 1)
+            self.coords(self._grid[2 * i - 1], x0 + 1, y, x1 - 1, y)
+        for i, label in enumerate(self._x_labels):
+            self.coords(label, x0 + (x1 - x0) * i / 4, y1 + 2)
+        self.coords(self._y_label, x0 - 3, y0)
+        self._redraw()
+
+    def set_data(self, hists):
+        """
+        hists — список массивов по 256 значений: один для серого изображения,
+        три (B, G, R) для цветного; None очищает график.
+        """
+        self._hists = None if hists is None else [np.asarray(h, dtype=np.float64).ravel() for h in hists]
+        self._redraw()
+
+    def _redraw(self):
+        for item in self._lines + [self._fill]:
+            self.itemconfigure(item, state="hidden")
+        if not self._hists:
+            self.itemconfigure(self._y_label, text="")
+            return
+
+        x0, y0, x1, y1 = self._plot_box()
+        peak = max(float(h.max()) for h in self._hists) or 1.0
+        self.itemconfigure(self._y_label, text=f"{peak:,.0f}".replace(",", " "))
+        xs = x0 + self._x * ((x1 - x0) / 256)
+        points = np.empty((256, 2))
+        points[:, 0] = xs
+
+        if len(self._hists) == 1:
+            points[:, 1] = y1 - self._hists[0] * ((y1 - y0) / peak)
+            flat = points.ravel().tolist()
+            self.coords(self._fill, xs[0], y1, *flat, xs[-1], y1)
+            self.coords(self._lines[0], *flat)
+            self.itemconfigure(self._fill, state="normal")
+            self.itemconfigure(self._lines[0], state="normal")
+            return
+
+        for line, hist in zip(self._lines[1:], self._hists):
+            points[:, 1] = y1 - hist * ((y1 - y0) / peak)
+            self.coords(line, *points.ravel().tolist())
+            self.itemconfigure(line, state="normal")
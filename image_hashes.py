@@ -0,0 +1,132 @@
+"""
+Хэши содержимого и перцептивные хэши для поиска дубликатов (lab2.py).
+
+content_hash читает файл через memory-map порциями и считает BLAKE2b:
+одинаковые байты — одинаковый хэш. perceptual_hash (dHash, 64 бита)
+строится по уменьшенной копии изображения; для JPEG декодирование сразу
+идет в уменьшенном масштабе (draft). Похожие изображения (пересжатые,
+уменьшенные копии) дают хэши с малым расстоянием Хэмминга.
+"""
+import hashlib
+import mmap
+import os
+
+import numpy as np
+from PIL import Image
+
+HASH_MODES = ("content", "perceptual")
+CHUNK_SIZE = 1 << 20
+PHASH_SIZE = 8
+# Максимальное расстояние Хэмминга между dHash похожих изображений
+PHASH_THRESHOLD = 6
+
+
+def content_hash(path, chunk_size=CHUNK_SIZE):
+    """BLAKE2b-128 содержимого файла (hex)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:  # Пустой файл нельзя отобразить в память
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, size, chunk_size):
+                        digest.update(view[start:start + chunk_size])
+                finally:
+                    view.release()
+    return digest.hexdigest()
+
+
+def perceptual_hash(path, size=PHASH_SIZE):
+    """
+    dHash: знаки разностей соседних пикселей уменьшенной до (size+1)x size
+    копии в оттенках серого. Возвращает hex-строку или None, если файл не
+    декодируется.
+    """
+    try:
+        with Image.open(path) as img:
+            img.draft("L", (size * 4, size * 4))
+            small = img.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR)
+    except Exception:
+        return None
+    pixels = np.asarray(small, dtype=np.int16)
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1]).tobytes().hex()
+
+
+def hamming(a, b):
+    """Расстояние Хэмминга между двумя hex-хэшами одинаковой длины."""
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+
+class DuplicateGroups:
+    """
+    Собирает хэши файлов сканирования и группирует:
+      - точные дубликаты — одинаковый content_hash;
+      - похожие изображения — dHash на расстоянии <= threshold (по одному
+        представителю от каждой группы точных дубликатов).
+    Похожие ищутся без попарного сравнения: биты хэша делятся на
+    threshold + 1 частей, и при расстоянии <= threshold хотя бы одна
+    часть совпадает.
+    """
+
+    def __init__(self, threshold=PHASH_THRESHOLD):
+        self.threshold = threshold
+        self.by_content = {}
+        self.phashes = {}
+
+    def add(self, path, content, phash=None):
+        paths = self.by_content.setdefault(content, [])
+        paths.append(path)
+        if phash is not None and content not in self.phashes:
+            self.phashes[content] = phash
+
+    def exact(self):
+        """Группы путей с одинаковым содержимым (только группы из 2+ файлов)."""
+        return [sorted(paths) for paths in self.by_content.values() if len(paths) > 1]
+
+    def similar(self):
+        """Группы путей похожих, но не идентичных изображений."""
+        contents = list(self.phashes)
+        parent = list(range(len(contents)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        parts = self.threshold + 1
+        buckets = {}
+        for i, content in enumerate(contents):
+            phash = self.phashes[content]
+            value, bits = int(phash, 16), len(phash) * 4
+            bounds = [bits * p // parts for p in range(parts + 1)]
+            for p in range(parts):
+                segment = (value >> bounds[p]) & ((1 << (bounds[p + 1] - bounds[p])) - 1)
+                buckets.setdefault((p, segment), []).append(i)
+
+        for members in buckets.values():
+            for n, i in enumerate(members):
+                for j in members[n + 1:]:
+                    a, b = find(i), find(j)
+                    if a != b and hamming(self.phashes[contents[i]], self.phashes[contents[j]]) <= self.threshold:
+                        parent[b] = a
+
+        groups = {}
+        for i, content in enumerate(contents):
+            groups.setdefault(find(i), []).append(content)
+        return [
+            sorted(path for content in members for path in self.by_content[content])
+            for members in groups.values() if len(members) > 1
+        ]
+
+    def summary(self):
+        exact = self.exact()
+        redundant = sum(len(group) - 1 for group in exact)
+        lines = [f"Групп точных дубликатов: {len(exact)} (лишних копий: {redundant})"]
+        lines += ["  " + ", ".join(group) for group in exact]
+        if self.phashes:
+            similar = self.similar()
+            lines.append(f"Групп похожих изображений: {len(similar)}")
+            lines += ["  " + ", ".join(group) for group in similar]
+        return "\n".join(lines)
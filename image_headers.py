@@ -0,0 +1,402 @@
+"""
+Быстрый разбор заголовков изображений для image_metadata (lab2.py).
+
+Вместо Image.open читаются только начальные байты файла: маркеры SOF/APP/DQT
+в JPEG, чанки IHDR/pHYs/gAMA/sRGB в PNG, логический экран GIF, заголовки
+BMP и PCX, IFD0 в TIFF. Результат — HeaderInfo, который повторяет ровно те
+атрибуты объекта Pillow, что читают помощники image_metadata, поэтому
+колонки таблицы формируются одним и тем же кодом.
+
+Разбор повторяет правила соответствующих плагинов Pillow. Если файл
+содержит что-то необычное (неподдерживаемый режим, повреждения, MPO,
+XMP-ориентация и т.п.), read_header возвращает None и вызывающий код
+открывает файл через Pillow.
+"""
+import os
+import struct
+import zlib
+
+from PIL import ExifTags, GifImagePlugin, Image, TiffImagePlugin
+
+import scan_profile
+
+
+class HeaderInfo:
+    """Минимальная замена объекта Pillow для помощников image_metadata."""
+
+    def __init__(self, fmt, size, mode, info=None, quantization=None, palette_size=None, exif=None,
+                 sample_bits=8):
+        self.format = fmt
+        self.width, self.height = size
+        self.mode = mode
+        self.info = info or {}
+        self.bits = 8
+        # Бит на отсчет по заголовку файла: у 16-битных PNG/TIFF режим Pillow
+        # ("RGB", "RGBA") этого не показывает
+        self.sample_bits = sample_bits
+        self.quantization = quantization or {}
+        self._palette_size = palette_size
+        self._exif = exif
+
+    def getbands(self):
+        return Image.getmodebands(self.mode) * ("",)
+
+    def getpalette(self):
+        return [0] * (3 * self._palette_size) if self._palette_size else None
+
+    def _getexif(self):
+        return self._exif
+
+
+def read_header(file_path, profile=None):
+    """
+    Возвращает HeaderInfo для файла или None, если нужен разбор через Pillow.
+    profile — необязательный scan_profile.FileProfile для замеров этапов.
+    """
+    with scan_profile.stage(profile, "open"):
+        fp = open(file_path, "rb")
+        prefix = fp.read(16)
+    with fp:
+        if profile is not None:
+            profile.size = os.fstat(fp.fileno()).st_size
+        for accept, parse in _PARSERS:
+            if accept(prefix):
+                fp.seek(0)
+                with scan_profile.stage(profile, "header"):
+                    try:
+                        return parse(fp)
+                    except (struct.error, IndexError, ValueError, KeyError, TypeError, SyntaxError, OSError):
+                        return None
+    return None
+
+
+def _read_exact(fp, n):
+    data = fp.read(n)
+    if len(data) != n:
+        raise ValueError("Файл обрезан")
+    return data
+
+
+# --- JPEG ---
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF, 0xDE}
+_JPEG_NO_SEGMENT = set(range(0xD0, 0xDA)) | {0xC8} | set(range(0xF0, 0xFE))
+_JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+
+
+def _parse_jpeg(fp):
+    fp.seek(2)
+    info, quantization = {}, {}
+    size = mode = None
+    exif_data = None
+    has_xmp = has_mpf = False
+
+    while True:
+        byte = _read_exact(fp, 1)[0]
+        if byte != 0xFF:
+            continue  # мусор между маркерами Pillow тоже пропускает
+        marker = _read_exact(fp, 1)[0]
+        while marker == 0xFF:  # байты-заполнители перед маркером
+            marker = _read_exact(fp, 1)[0]
+        if marker == 0x00:
+            continue
+        if marker < 0xC0:
+            return None
+        if marker == 0xDA:
+            break  # начало сжатых данных: заголовок закончился
+        if marker in _JPEG_NO_SEGMENT or marker == 0xD8:
+            continue
+
+        length = struct.unpack(">H", _read_exact(fp, 2))[0] - 2
+        if marker in _JPEG_SOF or marker == 0xDB or 0xE0 <= marker <= 0xEF:
+            s = _read_exact(fp, length)
+        else:
+            fp.seek(length, 1)
+            continue
+
+        if marker in _JPEG_SOF:
+            if s[0] != 8 or s[5] not in _JPEG_MODES:
+                return None  # Pillow отвергнет файл — пусть сообщит ошибку сам
+            size = struct.unpack(">H", s[3:5])[0], struct.unpack(">H", s[1:3])[0]
+            mode = _JPEG_MODES[s[5]]
+        elif marker == 0xDB:
+            while s:
+                table_length = 1 + (64 if s[0] < 16 else 128)
+                if len(s) < table_length:
+                    return None
+                quantization[s[0] & 15] = True
+                s = s[table_length:]
+        elif marker == 0xE0 and s.startswith(b"JFIF") and len(s) >= 12:
+            unit = s[7]
+            density = struct.unpack(">HH", s[8:12])
+            if unit == 1:
+                info["dpi"] = density
+            elif unit == 2:
+                info["dpi"] = tuple(d * 2.54 for d in density)
+            info["jfif_unit"] = unit
+            info["jfif_density"] = density
+        elif marker == 0xE1 and s.startswith(b"Exif\0\0"):
+            exif_data = s if exif_data is None else exif_data + s[6:]
+        elif marker == 0xE1 and s.startswith(b"http://ns.adobe.com/xap/1.0/\x00"):
+            has_xmp = True
+        elif marker == 0xE2 and s.startswith(b"MPF\0"):
+            has_mpf = True
+
+    if mode is None or has_mpf or (exif_data is not None and has_xmp):
+        return None
+
+    exif = None
+    if exif_data is not None:
+        exif_obj = Image.Exif()
+        exif_obj.load(exif_data)
+        exif = exif_obj._get_merged_dict()
+        if "dpi" not in info:
+            info["dpi"] = _exif_dpi(exif_obj)
+
+    return HeaderInfo("JPEG", size, mode, info, quantization=quantization, exif=exif)
+
+
+def _exif_dpi(exif):
+    """DPI из EXIF по правилам JpegImagePlugin._read_dpi_from_exif."""
+    try:
+        resolution_unit = exif[ExifTags.Base.ResolutionUnit]
+        x_resolution = exif[ExifTags.Base.XResolution]
+        try:
+            dpi = float(x_resolution[0]) / x_resolution[1]
+        except TypeError:
+            dpi = x_resolution
+        if dpi != dpi:
+            raise ValueError("DPI is not a number")
+        if resolution_unit == 3:
+            dpi *= 2.54
+        return dpi, dpi
+    except (struct.error, KeyError, SyntaxError, TypeError, ValueError, ZeroDivisionError):
+        return 72, 72
+
+
+# --- PNG ---
+
+_PNG_MODES = {
+    (1, 0): "1", (2, 0): "L", (4, 0): "L", (8, 0): "L", (16, 0): "I;16",
+    (8, 2): "RGB", (16, 2): "RGB",
+    (1, 3): "P", (2, 3): "P", (4, 3): "P", (8, 3): "P",
+    (8, 4): "LA", (16, 4): "RGBA",
+    (8, 6): "RGBA", (16, 6): "RGBA",
+}
+
+
+_PNG_INFO_KEYS = {b"dpi", b"gamma", b"sRGB", b"srgb", b"compression"}
+
+
+def _parse_png(fp):
+    fp.seek(8)
+    info = {}
+    size = mode = None
+    sample_bits = 8
+    while True:
+        length, ctype = struct.unpack(">I4s", _read_exact(fp, 8))
+        if ctype == b"IDAT":
+            break
+        if ctype == b"eXIf" or not ctype.isalpha():
+            return None  # EXIF влияет на поиск DPI — разбирает Pillow
+        s = _read_exact(fp, length)
+        crc = struct.unpack(">I", _read_exact(fp, 4))[0]
+        if zlib.crc32(ctype + s) != crc:
+            return None
+
+        if ctype in (b"tEXt", b"zTXt", b"iTXt"):
+            # Текстовые чанки Pillow кладет в info по ключевому слову
+            if s.split(b"\0", 1)[0] in _PNG_INFO_KEYS:
+                return None
+        elif ctype == b"IHDR":
+            if length < 13 or s[11] or (s[8], s[9]) not in _PNG_MODES:
+                return None
+            size = struct.unpack(">II", s[:8])
+            mode = _PNG_MODES[(s[8], s[9])]
+            sample_bits = s[8]
+        elif ctype == b"pHYs":
+            if length < 9:
+                return None
+            px, py = struct.unpack(">II", s[:8])
+            if s[8] == 1:
+                info["dpi"] = px * 0.0254, py * 0.0254
+        elif ctype == b"gAMA":
+            info["gamma"] = struct.unpack(">I", s[:4])[0] / 100000.0
+        elif ctype == b"sRGB":
+            if length < 1:
+                return None
+            info["srgb"] = s[0]
+
+    if mode is None:
+        return None
+    return HeaderInfo("PNG", size, mode, info, sample_bits=sample_bits)
+
+
+# --- GIF ---
+
+def _parse_gif(fp):
+    s = _read_exact(fp, 13)
+    size = struct.unpack("<HH", s[6:10])
+    flags = s[10]
+    palette = None
+    if flags & 128:
+        p = _read_exact(fp, 3 << ((flags & 7) + 1))
+        if any(not (i // 3 == p[i] == p[i + 1] == p[i + 2]) for i in range(0, len(p), 3)):
+            palette = p
+
+    # Первый кадр: пропускаем расширения до дескриптора изображения
+    while True:
+        block = _read_exact(fp, 1)
+        if block == b"!":
+            fp.seek(1, 1)
+            while True:
+                n = _read_exact(fp, 1)[0]
+                if not n:
+                    break
+                fp.seek(n, 1)
+        elif block == b",":
+            descriptor = _read_exact(fp, 9)
+            if descriptor[8] & 128:
+                return None  # локальная палитра кадра — режим определяет Pillow
+            break
+        else:
+            return None
+
+    if palette is None:
+        return HeaderInfo("GIF", size, "L")
+    if GifImagePlugin.LOADING_STRATEGY == GifImagePlugin.LoadingStrategy.RGB_ALWAYS:
+        return None
+    return HeaderInfo("GIF", size, "P", palette_size=len(palette) // 3)
+
+
+# --- BMP ---
+
+def _parse_bmp(fp):
+    fp.seek(14)
+    header_size = struct.unpack("<I", _read_exact(fp, 4))[0]
+    if header_size not in (40, 52, 56, 64, 108, 124):
+        return None
+    h = _read_exact(fp, header_size - 4)
+    width, height = struct.unpack("<II", h[:8])
+    if h[7] == 0xFF:
+        height = 2 ** 32 - height
+    bits, compression = struct.unpack("<HI", h[10:16])
+    ppm = struct.unpack("<II", h[20:28])
+    colors = struct.unpack("<I", h[28:32])[0] or (1 << bits)
+    if compression != 0:
+        return None  # RLE и битовые маски оставляем Pillow
+
+    info = {"dpi": tuple(x / 39.3701 for x in ppm), "compression": compression}
+    if bits in (24, 32):
+        return HeaderInfo("BMP", (width, height), "RGB", info)
+    if bits not in (1, 4, 8) or not 0 < colors <= 65536:
+        return None
+
+    palette = _read_exact(fp, 4 * colors)
+    indices = (0, 255) if colors == 2 else range(colors)
+    grayscale = all(palette[i * 4:i * 4 + 3] == bytes((val,)) * 3 for i, val in enumerate(indices))
+    if grayscale:
+        mode = "1" if colors == 2 else "L"
+    else:
+        mode = "P"
+    return HeaderInfo("BMP", (width, height), mode, info)
+
+
+# --- PCX ---
+
+def _parse_pcx(fp):
+    s = _read_exact(fp, 68)
+    x0, y0, x1, y1, hdpi, vdpi = struct.unpack("<6H", s[4:16])
+    if x1 + 1 <= x0 or y1 + 1 <= y0:
+        return None
+    version, bits, planes = s[1], s[3], s[65]
+    if bits == 1 and planes == 1:
+        mode = "1"
+    elif bits == 1 and planes in (2, 4):
+        mode = "P"
+    elif version == 5 and bits == 8 and planes == 1:
+        # Палитра — в последних 769 байтах файла; серая палитра дает "L"
+        fp.seek(-769, os.SEEK_END)
+        s = fp.read(769)
+        mode = "L"
+        if len(s) == 769 and s[0] == 12 and any(s[i * 3 + 1:i * 3 + 4] != bytes((i,)) * 3 for i in range(256)):
+            mode = "P"
+    elif version == 5 and bits == 8 and planes == 3:
+        mode = "RGB"
+    else:
+        return None
+    return HeaderInfo("PCX", (x1 + 1 - x0, y1 + 1 - y0), mode, {"dpi": (hdpi, vdpi)})
+
+
+# --- TIFF ---
+
+def _parse_tiff(fp):
+    prefix = _read_exact(fp, 8)
+    ifd = TiffImagePlugin.ImageFileDirectory_v2(prefix)
+    fp.seek(ifd.next)
+    ifd.load(fp)
+    tags = ifd
+
+    if 0xBC01 in tags:
+        return None
+    if TiffImagePlugin.STRIPOFFSETS not in tags and TiffImagePlugin.TILEOFFSETS not in tags:
+        return None
+    compression = TiffImagePlugin.COMPRESSION_INFO[tags.get(TiffImagePlugin.COMPRESSION, 1)]
+    planar = tags.get(TiffImagePlugin.PLANAR_CONFIGURATION, 1)
+    photo = 6 if compression == "tiff_jpeg" else tags.get(TiffImagePlugin.PHOTOMETRIC_INTERPRETATION, 0)
+    fillorder = tags.get(TiffImagePlugin.FILLORDER, 1)
+
+    xsize = tags[TiffImagePlugin.IMAGEWIDTH]
+    ysize = tags[TiffImagePlugin.IMAGELENGTH]
+    if not isinstance(xsize, int) or not isinstance(ysize, int):
+        return None
+    if tags.get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        xsize, ysize = ysize, xsize
+
+    sample_format = tags.get(TiffImagePlugin.SAMPLEFORMAT, (1,))
+    if len(sample_format) > 1 and max(sample_format) == min(sample_format):
+        sample_format = (sample_format[0],)
+    bps = tags.get(TiffImagePlugin.BITSPERSAMPLE, (1,))
+    extra = tags.get(TiffImagePlugin.EXTRASAMPLES, ())
+    samples = tags.get(
+        TiffImagePlugin.SAMPLESPERPIXEL,
+        3 if compression == "tiff_jpeg" and photo in (2, 6) else 1,
+    )
+    if planar == 2 and extra and max(extra) == 0:
+        bps = bps[:-len(extra)]
+        samples -= len(extra)
+        extra = ()
+    if samples < len(bps):
+        bps = bps[:samples]
+    elif samples > len(bps) == 1:
+        bps = bps * samples
+    if len(bps) != samples:
+        return None
+
+    key = (ifd.prefix, photo, sample_format, fillorder, bps, extra)
+    if key not in TiffImagePlugin.OPEN_INFO:
+        return None
+    mode = TiffImagePlugin.OPEN_INFO[key][0]
+    if mode in ("P", "PA") and TiffImagePlugin.COLORMAP not in tags:
+        return None  # Pillow не откроет палитровое изображение без палитры
+
+    info = {"compression": compression}
+    xres = tags.get(TiffImagePlugin.X_RESOLUTION, 1)
+    yres = tags.get(TiffImagePlugin.Y_RESOLUTION, 1)
+    if xres and yres:
+        unit = tags.get(TiffImagePlugin.RESOLUTION_UNIT)
+        if unit == 2 or unit is None:
+            info["dpi"] = (xres, yres)
+        elif unit == 3:
+            info["dpi"] = (xres * 2.54, yres * 2.54)
+    return HeaderInfo("TIFF", (xsize, ysize), mode, info, sample_bits=max(bps))
+
+
+_PARSERS = (
+    (lambda p: p[:3] == b"\xff\xd8\xff", _parse_jpeg),
+    (lambda p: p[:8] == b"\x89PNG\r\n\x1a\n", _parse_png),
+    (lambda p: p[:6] in (b"GIF87a", b"GIF89a"), _parse_gif),
+    (lambda p: p[:2] == b"BM", _parse_bmp),
+    (lambda p: p[:4] in (b"II*\0", b"MM\0*"), _parse_tiff),
+    (lambda p: len(p) >= 2 and p[0] == 10 and p[1] in (0, 2, 3, 5), _parse_pcx),
+)
@@ -0,0 +1,403 @@
+"""
+Операции обработки изображений для ImageProcessorApp (lab3.py).
+
+Функции не зависят от Tk, поэтому одни и те же параметры применяются
+к уменьшенной копии (превью) в окне и к полному изображению при
+сохранении — в фоновом потоке или без графического интерфейса.
+
+Параметры операции — обычный словарь:
+    {"mode": "point", "contrast": 1.0, "brightness": 0, "invert": False}
+    {"mode": "morph", "morph_type": "Erosion", "kernel_shape": "Rect", "kernel_size": 3}
+"""
+import functools
+import json
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import image_headers
+import morphology
+
+MODE_POINT = "point"
+MODE_MORPH = "morph"
+
+# Максимальная сторона превью: с запасом больше холста окна
+PREVIEW_MAX_SIDE = 1600
+# Коэффициенты уменьшения, которые декодер умеет применять сам (для JPEG — через DCT)
+_REDUCED_FLAGS = {
+    2: (cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    4: (cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    8: (cv2.IMREAD_REDUCED_COLOR_8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+}
+# Режимы Pillow, для которых уменьшенное 8-битное декодирование дает тот же
+# результат, если в отсчете 8 бит (16-битные PNG/TIFF тоже бывают "RGB")
+_GRAY_MODES = ("1", "L")
+_COLOR_MODES = ("P", "RGB", "RGBA", "RGBX", "CMYK", "YCbCr", "LA", "PA")
+
+# Больше этого числа пикселей гистограмма считается по подвыборке строк
+HIST_MAX_PIXELS = 4_000_000
+# Сколько таблиц поэлементных операций хранить (перетаскивание ползунка дает новые значения)
+LUT_CACHE_SIZE = 256
+
+KERNEL_SHAPES = {"Rect": cv2.MORPH_RECT, "Ellipse": cv2.MORPH_ELLIPSE, "Cross": cv2.MORPH_CROSS}
+MORPH_TYPES = ("Erosion", "Dilation")
+
+# Шаг округления параметров ползунков: меньшие изменения на глаз не видны
+PARAM_STEPS = {"contrast": 0.01, "brightness": 0.5}
+
+# Параметры режимов по умолчанию (как у ползунков окна); задают и состав пресета
+DEFAULT_PARAMS = {
+    MODE_POINT: {"contrast": 1.0, "brightness": 0.0, "invert": False},
+    MODE_MORPH: {"morph_type": "Erosion", "kernel_shape": "Rect", "kernel_size": 3},
+}
+
+# Форматы, в которых отсчет всегда 8-битный, — когда заголовок разбирает Pillow
+_8BIT_FORMATS = ("JPEG", "MPO", "GIF", "BMP", "PCX")
+
+# Форматы, которые открываются через memory-map, а не декодируются в память целиком
+MAPPED_EXTENSIONS = (".npy", ".tif", ".tiff")
+# Сколько пикселей превью-уменьшения обрабатывается за один проход по строкам
+PREVIEW_BAND_PIXELS = 16_000_000
+
+
+def _read_bytes(path):
+    # np.fromfile + imdecode вместо imread: imread не открывает пути с кириллицей в Windows
+    return np.fromfile(path, dtype=np.uint8)
+
+
+def _normalize(img):
+    """Приводит декодированное изображение к BGR или оттенкам серого (без альфа-канала)."""
+    if img is not None and img.ndim == 3 and img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img
+
+
+def decode_image(data):
+    """Декодирует байты файла в BGR или оттенки серого (None, если формат не распознан)."""
+    return _normalize(cv2.imdecode(data, cv2.IMREAD_UNCHANGED))
+
+
+def load_full(path):
+    """Декодирует изображение в полном разрешении (None, если формат не распознан)."""
+    return decode_image(_read_bytes(path))
+
+
+def open_mapped(path):
+    """
+    Открывает 8-битное изображение без чтения в память: .npy — через
+    np.load(mmap_mode="r") (порядок каналов BGR, как у OpenCV), TIFF — через
+    tifffile.memmap (RGB). Сжатый или плиточный TIFF распаковывается во
+    временный файл на диске, а не в память. Возвращает (массив, rgb) или
+    None, если файл так не открыть (тогда его декодирует OpenCV).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        arr, rgb = np.load(path, mmap_mode="r"), False
+    elif ext in (".tif", ".tiff"):
+        try:
+            import tifffile  # нужен только для гигапиксельных TIFF
+        except ImportError:
+            return None
+        try:
+            with tifffile.TiffFile(path) as tif:
+                series = tif.series[0]
+                if series.dtype != np.uint8:
+                    return None
+                if series.dataoffset is not None:
+                    arr = tifffile.memmap(path, mode="r")
+                else:  # сжатые или плиточные данные нельзя отобразить напрямую
+                    arr = series.asarray(out="memmap")
+        except Exception:
+            return None
+        rgb = True
+    else:
+        return None
+    if arr.dtype != np.uint8 or arr.ndim not in (2, 3) or (arr.ndim == 3 and arr.shape[2] not in (1, 3, 4)):
+        return None
+    if arr.ndim == 3 and arr.shape[2] == 1:
+        arr = arr[..., 0]
+    return arr, rgb
+
+
+def _to_bgr(img, rgb):
+    """Приводит фрагмент отображенного массива к BGR или оттенкам серого."""
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_RGBA2BGR if rgb else cv2.COLOR_BGRA2BGR)
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR) if rgb else np.ascontiguousarray(img)
+
+
+def _preview_mapped(arr, rgb, max_side):
+    """
+    Уменьшает отображенный массив полосами строк: в памяти одновременно
+    только полоса исходника и готовая часть превью.
+    """
+    h, w = arr.shape[:2]
+    factor = max(1, -(-max(h, w) // max_side))
+    out_w, out_h = max(1, w // factor), max(1, h // factor)
+    # Полоса — целое число блоков factor x factor, чтобы INTER_AREA не зависел от разбиения
+    band = max(1, PREVIEW_BAND_PIXELS // (w * factor)) * factor
+    parts = []
+    for y in range(0, out_h * factor, band):
+        chunk = _to_bgr(arr[y:min(y + band, out_h * factor), :out_w * factor], rgb)
+        parts.append(cv2.resize(chunk, (out_w, chunk.shape[0] // factor), interpolation=cv2.INTER_AREA))
+    img = np.concatenate(parts) if len(parts) > 1 else parts[0]
+    return img, out_w / w, (w, h)
+
+
+def load_preview(path, max_side=PREVIEW_MAX_SIDE):
+    """
+    Декодирует уменьшенную копию изображения для интерактивной работы.
+    Возвращает (превью, масштаб, (ширина, высота) оригинала) или None.
+
+    Размеры берутся из заголовка; для изображений с 8 битами на отсчет
+    декодер сразу уменьшает в 2/4/8 раз (IMREAD_REDUCED_*), а то, что
+    осталось больше max_side, досжимается INTER_AREA. Остальные (16 бит и
+    т.п.) декодируются как есть (IMREAD_UNCHANGED), как при сохранении. .npy и TIFF (open_mapped) уменьшаются
+    полосами прямо из памяти на диске.
+    """
+    mapped = open_mapped(path)
+    if mapped is not None:
+        return _preview_mapped(*mapped, max_side)
+
+    # Заголовок разбирается без Image.open: Pillow отказывается открывать
+    # изображения больше MAX_IMAGE_PIXELS даже ради размеров
+    header = image_headers.read_header(path)
+    if header is not None:
+        full_size, mode, bits = (header.width, header.height), header.mode, header.sample_bits
+    else:
+        try:
+            with Image.open(path) as img:
+                full_size, mode = img.size, img.mode
+                bits = 8 if img.format in _8BIT_FORMATS else None
+        except Exception:
+            full_size, mode, bits = None, None, None
+
+    data = _read_bytes(path)
+    img = None
+    if full_size is not None and bits is not None and bits <= 8 and (mode in _GRAY_MODES or mode in _COLOR_MODES):
+        # Наибольшее уменьшение, после которого сторона не меньше половины max_side
+        factor = 1
+        for f in (8, 4, 2):
+            if max(full_size) / f >= max_side / 2:
+                factor = f
+                break
+        if factor > 1:
+            color_flag, gray_flag = _REDUCED_FLAGS[factor]
+            # Полное декодирование (IMREAD_UNCHANGED) не поворачивает по EXIF — и превью тоже
+            flags = (gray_flag if mode in _GRAY_MODES else color_flag) | cv2.IMREAD_IGNORE_ORIENTATION
+            img = cv2.imdecode(data, flags)
+    if img is None:
+        img = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            return None
+        full_size = (img.shape[1], img.shape[0])
+    img = _normalize(img)
+
+    h, w = img.shape[:2]
+    if max(h, w) > max_side:
+        ratio = max_side / max(h, w)
+        img = cv2.resize(img, (max(1, round(w * ratio)), max(1, round(h * ratio))), interpolation=cv2.INTER_AREA)
+    return img, img.shape[1] / full_size[0], full_size
+
+
+def kernel_shape(name):
+    """Тип структурного элемента OpenCV по подписи ('Rect (Прямоугольник)' -> MORPH_RECT)."""
+    for key, shape in KERNEL_SHAPES.items():
+        if key in name:
+            return shape
+    return cv2.MORPH_RECT
+
+
+def kernel_size(size, scale=1.0):
+    """
+    Нечетный размер ядра. Для превью с масштабом scale ядро уменьшается
+    пропорционально, чтобы эффект выглядел так же, как на полном изображении.
+    """
+    size = max(1, round(int(size) * scale))
+    return size if size % 2 else size + 1
+
+
+def _frozen(lut):
+    lut.flags.writeable = False  # таблицы кэшируются и разделяются между вызовами
+    return lut
+
+
+IDENTITY_LUT = _frozen(np.arange(256, dtype=np.uint8))
+INVERT_LUT = _frozen(255 - IDENTITY_LUT)
+
+
+def compose_luts(*luts):
+    """Одна таблица, равная последовательному применению luts слева направо."""
+    result = luts[0]
+    for lut in luts[1:]:
+        result = lut[result]
+    return result
+
+
+@functools.lru_cache(maxsize=LUT_CACHE_SIZE)
+def linear_lut(contrast, brightness):
+    """
+    Таблица линейного контрастирования. Строится тем же convertScaleAbs,
+    примененным ко всем 256 значениям, поэтому округление и насыщение
+    совпадают с обработкой изображения напрямую.
+    """
+    return _frozen(cv2.convertScaleAbs(IDENTITY_LUT, alpha=contrast, beta=brightness).ravel())
+
+
+@functools.lru_cache(maxsize=LUT_CACHE_SIZE)
+def point_lut(contrast, brightness, invert):
+    """Таблица всей поэлементной операции: контрастирование, затем негатив."""
+    lut = linear_lut(contrast, brightness)
+    return _frozen(compose_luts(lut, INVERT_LUT)) if invert else lut
+
+
+def apply_point(img, contrast, brightness, invert):
+    """
+    Линейное контрастирование (alpha, beta) и негатив. С негативом 8-битное
+    изображение проходится один раз cv2.LUT по кэшированной таблице всей
+    операции; без него convertScaleAbs и так делает один проход, а
+    векторная арифметика быстрее выборки из таблицы.
+    """
+    if not invert:
+        return cv2.convertScaleAbs(img, alpha=contrast, beta=brightness)
+    if img.dtype != np.uint8:
+        return cv2.bitwise_not(cv2.convertScaleAbs(img, alpha=contrast, beta=brightness))
+    return cv2.LUT(img, point_lut(float(contrast), float(brightness), True))
+
+
+def apply_morphology(img, morph_type, shape, size):
+    """
+    Эрозия или дилатация структурным элементом shape x size: кэшированное
+    ядро и разложение на линии (morphology), результат как у cv2.erode/dilate.
+    """
+    return morphology.apply(img, morph_type, shape, size)
+
+
+def process_image(img, params, scale=1.0):
+    """
+    Применяет операцию params к изображению. scale — масштаб изображения
+    относительно оригинала (для превью < 1); влияет только на размер ядра.
+    Исходный массив не изменяется.
+    """
+    mode = params["mode"]
+    if mode == MODE_POINT:
+        return apply_point(img, params["contrast"], params["brightness"], params["invert"])
+    if mode == MODE_MORPH:
+        size = kernel_size(params["kernel_size"], scale)
+        return apply_morphology(img, params["morph_type"], kernel_shape(params["kernel_shape"]), size)
+    raise ValueError(f"Неизвестный режим обработки: {mode}")
+
+
+def normalize_params(params):
+    """
+    Проверяет параметры операции и приводит их к каноническому виду:
+    недостающие ключи берутся из DEFAULT_PARAMS, подпись формы ядра
+    ('Rect (Прямоугольник)') сокращается до ключа KERNEL_SHAPES.
+    """
+    mode = params.get("mode")
+    if mode not in DEFAULT_PARAMS:
+        raise ValueError(f"Неизвестный режим обработки: {mode}")
+    result = {"mode": mode, **DEFAULT_PARAMS[mode]}
+    result.update((key, params[key]) for key in DEFAULT_PARAMS[mode] if key in params)
+    if mode == MODE_POINT:
+        result["contrast"] = float(result["contrast"])
+        result["brightness"] = float(result["brightness"])
+        result["invert"] = bool(result["invert"])
+        return result
+
+    morph_type = str(result["morph_type"]).split()[0]
+    if morph_type not in MORPH_TYPES:
+        raise ValueError(f"Неизвестная морфологическая операция: {result['morph_type']}")
+    shape = next((key for key in KERNEL_SHAPES if key in str(result["kernel_shape"])), None)
+    if shape is None:
+        raise ValueError(f"Неизвестная форма ядра: {result['kernel_shape']}")
+    size = int(float(result["kernel_size"]))  # как kernel_size(): дробная часть ползунка отбрасывается
+    if size < 1:
+        raise ValueError(f"Размер ядра должен быть положительным: {size}")
+    result.update(morph_type=morph_type, kernel_shape=shape, kernel_size=size)
+    return result
+
+
+def quantize_params(params):
+    """
+    Округляет значения ползунков до PARAM_STEPS (и размер ядра до целого).
+    Обработка идет с округленными параметрами, поэтому кадры с одинаковыми
+    округленными значениями совпадают и могут браться из кэша.
+    """
+    result = dict(params)
+    for key, step in PARAM_STEPS.items():
+        if key in result:
+            result[key] = round(round(float(result[key]) / step) * step, 6)
+    if "kernel_size" in result:
+        result["kernel_size"] = int(float(result["kernel_size"]))
+    if "invert" in result:
+        result["invert"] = bool(result["invert"])
+    return result
+
+
+def load_preset(path):
+    """Читает пресет параметров (JSON) и проверяет его через normalize_params."""
+    with open(path, encoding="utf-8") as f:
+        params = json.load(f)
+    if not isinstance(params, dict):
+        raise ValueError(f"Пресет должен быть JSON-объектом: {path}")
+    return normalize_params(params)
+
+
+def save_preset(path, params):
+    """Сохраняет параметры операции как пресет (JSON)."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(normalize_params(params), f, ensure_ascii=False, indent=2)
+
+
+def histograms(img, max_pixels=HIST_MAX_PIXELS):
+    """
+    Гистограммы каналов (256 корзин): одна для серого, три (B, G, R) для цветного.
+    Для изображений больше max_pixels считается по каждой k-й строке (строки
+    остаются непрерывными в памяти), а счетчики умножаются на k.
+    """
+    step = max(1, -(-img.shape[0] * img.shape[1] // max_pixels))
+    sample = img[::step] if step > 1 else img
+    channels = 1 if sample.ndim == 2 else sample.shape[2]
+    hists = [cv2.calcHist([sample], [i], None, [256], [0, 256]).ravel() for i in range(channels)]
+    if step > 1:
+        hists = [h * step for h in hists]
+    return hists
+
+
+def map_histograms(hists, lut):
+    """Гистограммы после применения таблицы lut: счетчик значения v переходит в lut[v]."""
+    return [np.bincount(lut, weights=h, minlength=256) for h in hists]
+
+
+def derive_histograms(src, src_hists, params):
+    """
+    Гистограммы результата поэлементной операции, полученные из гистограмм
+    исходника без повторного прохода по пикселям. None, если операция не
+    сводится к таблице (морфология, не 8-битный исходник).
+    """
+    if src_hists is None or params["mode"] != MODE_POINT or src.dtype != np.uint8:
+        return None
+    lut = point_lut(float(params["contrast"]), float(params["brightness"]), bool(params["invert"]))
+    return map_histograms(src_hists, lut)
+
+
+def save_image(path, img):
+    """Кодирует изображение по расширению пути (по умолчанию PNG) и записывает файл."""
+    ext = os.path.splitext(path)[1].lower() or ".png"
+    ok, buffer = cv2.imencode(ext, img)
+    if not ok:
+        raise ValueError(f"Не удалось закодировать изображение в формат {ext}")
+    buffer.tofile(path)
+
+
+def process_file(src_path, dst_path, params):
+    """Обрабатывает файл в полном разрешении и сохраняет результат."""
+    img = load_full(src_path)
+    if img is None:
+        raise ValueError(f"Не удалось прочитать изображение: {src_path}")
+    save_image(dst_path, process_image(img, params))
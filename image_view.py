@@ -0,0 +1,137 @@
+"""
+Виджет показа изображения для ImageProcessorApp (lab3.py).
+
+На холсте один элемент изображения и один ImageTk.PhotoImage, которые
+создаются заново только при изменении размера картинки на экране. При
+каждом обновлении кадр масштабируется cv2.resize (INTER_AREA) прямо из
+BGR-буфера в заранее выделенный массив размера экрана, переводится в RGBA
+во второй такой же массив, и PhotoImage обновляется на месте через
+paste: Pillow-изображение разделяет память с этим массивом (paste лишь
+копирует его в блок того же режима — размера экрана, а не кадра).
+Полноценный LANCZOS считается один раз, когда обновления прекращаются
+на REFINE_DELAY_MS.
+"""
+import tkinter as tk
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+# Через сколько миллисекунд без обновлений кадр перерисовывается с LANCZOS
+REFINE_DELAY_MS = 250
+# Размер холста, пока окно еще не разложено
+DEFAULT_CANVAS_SIZE = (400, 300)
+
+
+def fit_size(width, height, canvas_width, canvas_height):
+    """Размер изображения, вписанного в холст с сохранением пропорций."""
+    scale = min(canvas_width / width, canvas_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _to_8bit_scale(dtype):
+    """
+    Множитель перевода в 0..255: целые типы (16-битные PNG/TIFF) — по
+    максимуму типа, вещественные — из диапазона 0..1.
+    """
+    if dtype == np.uint8:
+        return 1.0
+    if np.issubdtype(dtype, np.integer):
+        return 255 / np.iinfo(dtype).max
+    if np.issubdtype(dtype, np.floating):
+        return 255.0
+    raise ValueError(f"Неподдерживаемый тип изображения: {dtype}")
+
+
+def scale_into(src, bgr_buffer, rgba_buffer):
+    """
+    Быстрое масштабирование src (BGR или серое) в 8-битные буферы размера
+    экрана: INTER_AREA при уменьшении, INTER_LINEAR при увеличении. Для
+    8-битного src новых массивов не создается; src другой глубины сначала
+    уменьшается в своем типе, затем переводится в 0..255 в bgr_buffer.
+    """
+    h, w = rgba_buffer.shape[:2]
+    interpolation = cv2.INTER_AREA if w <= src.shape[1] else cv2.INTER_LINEAR
+    if src.dtype == np.uint8:
+        cv2.resize(src, (w, h), dst=bgr_buffer, interpolation=interpolation)
+    else:
+        # resize пишет в dst только того же типа, что и src
+        small = cv2.resize(src, (w, h), interpolation=interpolation)
+        cv2.convertScaleAbs(small, dst=bgr_buffer, alpha=_to_8bit_scale(src.dtype))
+    code = cv2.COLOR_GRAY2RGBA if bgr_buffer.ndim == 2 else cv2.COLOR_BGR2RGBA
+    cv2.cvtColor(bgr_buffer, code, dst=rgba_buffer)
+
+
+def lanczos(src, size):
+    """Качественное уменьшение (Pillow LANCZOS) — для кадра после окончания взаимодействия."""
+    if src.dtype != np.uint8:
+        src = cv2.convertScaleAbs(src, alpha=_to_8bit_scale(src.dtype))
+    rgba = cv2.cvtColor(src, cv2.COLOR_GRAY2RGBA if src.ndim == 2 else cv2.COLOR_BGR2RGBA)
+    return Image.fromarray(rgba).resize(size, Image.Resampling.LANCZOS)
+
+
+class ImageView(tk.Canvas):
+    """Холст, показывающий изображение OpenCV по центру с вписыванием в размер."""
+
+    def __init__(self, master, refine_delay_ms=REFINE_DELAY_MS, **kwargs):
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(master, **kwargs)
+        self.refine_delay_ms = refine_delay_ms
+        self._src = None
+        self._photo = None
+        self._pil = None
+        self._bgr = self._rgba = None
+        self._refine_job = None
+        self._item = self.create_image(0, 0, anchor="center", state="hidden")
+        self.bind("<Configure>", lambda e: self._redraw())
+
+    def _canvas_size(self):
+        w, h = self.winfo_width(), self.winfo_height()
+        return (w, h) if w > 10 and h > 10 else DEFAULT_CANVAS_SIZE
+
+    def set_image(self, cv_img):
+        """Показывает кадр (массив не копируется и не должен меняться после передачи)."""
+        self._src = cv_img
+        self._redraw()
+
+    def clear(self):
+        self._src = None
+        self._cancel_refine()
+        self.itemconfigure(self._item, state="hidden")
+
+    def _cancel_refine(self):
+        if self._refine_job is not None:
+            self.after_cancel(self._refine_job)
+            self._refine_job = None
+
+    def _prepare(self, size):
+        """Буферы и PhotoImage нужного размера; пересоздаются только при его изменении."""
+        channels = () if self._src.ndim == 2 else (3,)
+        w, h = size
+        if self._photo is None or self._rgba.shape[:2] != (h, w) or self._bgr.shape[2:] != channels:
+            self._bgr = np.empty((h, w) + channels, dtype=np.uint8)
+            # RGBA, а не RGB: Pillow хранит RGB по 4 байта и не может разделить 3-байтовый буфер
+            self._rgba = np.empty((h, w, 4), dtype=np.uint8)
+            self._pil = Image.frombuffer("RGBA", size, self._rgba, "raw", "RGBA", 0, 1)
+            self._photo = ImageTk.PhotoImage("RGBA", size)
+            self.itemconfigure(self._item, image=self._photo)
+
+    def _redraw(self):
+        if self._src is None:
+            return
+        cw, ch = self._canvas_size()
+        size = fit_size(self._src.shape[1], self._src.shape[0], cw, ch)
+        self._prepare(size)
+        scale_into(self._src, self._bgr, self._rgba)
+        self._photo.paste(self._pil)
+        self.coords(self._item, cw // 2, ch // 2)
+        self.itemconfigure(self._item, state="normal")
+
+        self._cancel_refine()
+        if size != (self._src.shape[1], self._src.shape[0]):
+            self._refine_job = self.after(self.refine_delay_ms, self._refine)
+
+    def _refine(self):
+        self._refine_job = None
+        if self._src is not None and self._photo is not None:
+            self._photo.paste(lanczos(self._src, (self._photo.width(), self._photo.height())))
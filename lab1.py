@@ -1,5 +1,11 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, colorchooser
+from tkinter import ttk, colorchooser, filedialog, messagebox
+
+import color_engine
+import gamut_analysis
+from latest_worker import LatestRequestWorker
 
 
 class ColorConverterApp(tk.Tk):
@@ -7,6 +13,9 @@ class ColorConverterApp(tk.Tk):
     GUI-приложение для конвертации цветов между моделями RGB, CMYK и XYZ.
     """
 
+    # Минимальный интервал между пересчетами при перетаскивании ползунков (~60 кадров/с)
+    UPDATE_INTERVAL_MS = 16
+
     def __init__(self):
         super().__init__()
         self.title("Конвертер цветовых моделей")
@@ -16,6 +25,13 @@ class ColorConverterApp(tk.Tk):
         self.minsize(500, 450)
 
         self._is_updating = False
+        self._pending_model = None
+        self._update_job = None
+        self._gamut_warning_visible = False
+        # Анализ охвата изображения идет в фоне; поток создается при первом анализе
+        self._gamut_worker = None
+        self._gamut_cancel = None
+        self._gamut_progress = 0.0
 
         # Стилизация виджетов
         style = ttk.Style(self)
@@ -51,6 +67,9 @@ class ColorConverterApp(tk.Tk):
         self.color_preview = tk.Label(left_panel, bg="#4287f5", relief="groove", borderwidth=1)
         self.color_preview.pack(fill="both", expand=True, pady=(0, 15))
         ttk.Button(left_panel, text="Выбрать цвет из палитры", command=self._open_color_picker).pack(fill="x")
+        self.gamut_button = ttk.Button(left_panel, text="Анализ охвата изображения...",
+                                       command=self._analyze_image_gamut)
+        self.gamut_button.pack(fill="x", pady=(5, 0))
 
         right_panel_container = ttk.Frame(content_frame, style="Main.TFrame")
         right_panel_container.grid(row=0, column=1, sticky="nsew")
@@ -103,7 +122,7 @@ class ColorConverterApp(tk.Tk):
             ttk.Label(row, text=comp, width=4).pack(side="left")
             var = self.vars[model_name][comp.lower()]
             slider = ttk.Scale(row, from_=min_val, to=max_val, variable=var, orient="horizontal",
-                               command=lambda e, m=model_name: self.update_all(m))
+                               command=lambda e, m=model_name: self._schedule_update(m))
             slider.pack(side="left", fill="x", expand=True, padx=10)
             entry = ttk.Entry(row, textvariable=var, width=8)
             entry.pack(side="left")
@@ -115,68 +134,130 @@ class ColorConverterApp(tk.Tk):
         if hex_color:
             self.update_all("hex", hex_color)
 
+    def _analyze_image_gamut(self):
+        """
+        Загружает XYZ/HDR-изображение и в фоновом потоке строит маску цветов
+        вне охвата sRGB; пока анализ идет, кнопка показывает ход и отменяет его.
+        """
+        if self._gamut_cancel is not None:
+            self._gamut_cancel.set()
+            return
+        path = filedialog.askopenfilename(
+            title="Выберите изображение в XYZ или линейном RGB",
+            filetypes=[("XYZ / HDR", "*.npy *.exr *.hdr *.tif *.tiff")]
+        )
+        if not path:
+            return
+
+        if self._gamut_worker is None:
+            self._gamut_worker = LatestRequestWorker("gamut")
+        self._gamut_cancel = threading.Event()
+        self._gamut_progress = 0.0
+        self._gamut_worker.submit(self._run_gamut_analysis, path, self._gamut_cancel, self._set_gamut_progress)
+        self.gamut_button.config(text="Отменить анализ")
+        self._poll_gamut()
+
+    @staticmethod
+    def _run_gamut_analysis(path, cancel, progress):
+        """Фоновая задача: загрузка изображения и анализ полосами (Tk не трогает)."""
+        image, space = gamut_analysis.load_image(path)
+        return gamut_analysis.analyze_gamut(
+            image, space=space, return_mask=False, preview_size=600, progress=progress, cancel=cancel
+        )
+
+    def _set_gamut_progress(self, fraction):
+        # Вызывается из фонового потока: только запоминает значение, окно опрашивает его само
+        self._gamut_progress = fraction
+
+    def _poll_gamut(self):
+        """Ждет результат анализа через after(), обновляя ход на кнопке."""
+        try:
+            _, report, error = self._gamut_worker.results.get_nowait()
+        except queue.Empty:
+            self.gamut_button.config(text=f"Отменить анализ ({self._gamut_progress:.0%})")
+            self.after(100, self._poll_gamut)
+            return
+
+        self._gamut_cancel = None
+        self.gamut_button.config(text="Анализ охвата изображения...")
+        if isinstance(error, gamut_analysis.AnalysisCancelled):
+            return
+        if error is not None:
+            messagebox.showerror("Ошибка", f"Не удалось проанализировать изображение: {error}")
+            return
+        self._show_gamut_report(report)
+
+    def _show_gamut_report(self, report):
+        window = tk.Toplevel(self)
+        window.title("Маска цветов вне охвата sRGB")
+        mask_image = tk.PhotoImage(data=gamut_analysis.mask_to_ppm(report.preview), format="PPM")
+        label = ttk.Label(window, image=mask_image)
+        label.image = mask_image
+        label.pack(padx=10, pady=10)
+        ttk.Label(window, text=report.summary(), justify="left", padding=10).pack(fill="x")
+
     @staticmethod
     def _rgb_to_cmyk(r, g, b):
-        if r == 0 and g == 0 and b == 0: return 0, 0, 0, 100
-        r_, g_, b_ = r / 255, g / 255, b / 255
-        k = 1 - max(r_, g_, b_)
-        if k == 1: return 0, 0, 0, 100
-        c = (1 - r_ - k) / (1 - k)
-        m = (1 - g_ - k) / (1 - k)
-        y = (1 - b_ - k) / (1 - k)
-        return c * 100, m * 100, y * 100, k * 100
+        return tuple(color_engine.rgb_to_cmyk((r, g, b)).tolist())
 
     @staticmethod
     def _cmyk_to_rgb(c, m, y, k):
-        c, m, y, k = c / 100, m / 100, y / 100, k / 100
-        r = 255 * (1 - c) * (1 - k)
-        g = 255 * (1 - m) * (1 - k)
-        b = 255 * (1 - y) * (1 - k)
-        return r, g, b
+        return tuple(color_engine.cmyk_to_rgb((c, m, y, k)).tolist())
 
     @staticmethod
     def _rgb_to_xyz(r, g, b):
-        r, g, b = r / 255, g / 255, b / 255
-
-        def linearize(val):
-            return ((val + 0.055) / 1.055) ** 2.4 if val > 0.04045 else val / 12.92
-
-        r_lin, g_lin, b_lin = map(linearize, [r, g, b])
-        x = r_lin * 0.4124564 + g_lin * 0.3575761 + b_lin * 0.1804375
-        y = r_lin * 0.2126729 + g_lin * 0.7151522 + b_lin * 0.0721750
-        z = r_lin * 0.0193339 + g_lin * 0.1191920 + b_lin * 0.9503041
-        return x * 100, y * 100, z * 100
+        return tuple(color_engine.rgb_to_xyz((r, g, b)).tolist())
 
     def _xyz_to_rgb(self, x, y, z):
-        x, y, z = x / 100, y / 100, z / 100
-        r_lin = x * 3.2404542 - y * 1.5371385 - z * 0.4985314
-        g_lin = x * -0.9692660 + y * 1.8760108 + z * 0.0415560
-        b_lin = x * 0.0556434 - y * 0.2040259 + z * 1.0572252
-
-        def correct_gamma(val):
-            return (1.055 * val ** (1 / 2.4) - 0.055) if val > 0.0031308 else 12.92 * val
-
-        r, g, b = map(correct_gamma, [r_lin, g_lin, b_lin])
-        is_out_of_gamut = False
-
-        def clamp(val):
-            nonlocal is_out_of_gamut
-            if val < 0: is_out_of_gamut = True; return 0
-            if val > 1: is_out_of_gamut = True; return 1
-            return val
-
-        r, g, b = map(clamp, [r, g, b])
-        if is_out_of_gamut:
+        rgb, is_out_of_gamut = color_engine.xyz_to_rgb((x, y, z))
+        self._set_gamut_warning(bool(is_out_of_gamut))
+        return tuple(rgb.tolist())
+
+    def _set_gamut_warning(self, visible):
+        """Показывает/скрывает предупреждение, трогая раскладку только при смене состояния."""
+        if visible == self._gamut_warning_visible:
+            return
+        self._gamut_warning_visible = visible
+        if visible:
             self.gamut_warning.pack(pady=10, fill="x")
         else:
             self.gamut_warning.pack_forget()
-        return r * 255, g * 255, b * 255
 
     @staticmethod
     def _hex_to_rgb(hex_color):
         hex_color = hex_color.lstrip('#')
         return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
 
+    def _schedule_update(self, source_model):
+        """
+        Объединяет поток событий ползунка в один пересчет за кадр.
+        Если за кадр сменилась исходная модель, накопленный пересчет
+        выполняется сразу, чтобы не потерять изменения предыдущей модели.
+        """
+        if self._pending_model not in (None, source_model):
+            self._flush_update()
+        self._pending_model = source_model
+        if self._update_job is None:
+            self._update_job = self.after(self.UPDATE_INTERVAL_MS, self._flush_update)
+
+    def _flush_update(self):
+        if self._update_job is not None:
+            self.after_cancel(self._update_job)
+            self._update_job = None
+        source_model, self._pending_model = self._pending_model, None
+        if source_model is not None:
+            self.update_all(source_model)
+
+    @staticmethod
+    def _set_var(var, value):
+        """Записывает значение в переменную, только если оно изменилось."""
+        try:
+            if var.get() == value:
+                return
+        except tk.TclError:
+            pass  # В поле ввода некорректный текст — просто перезаписываем
+        var.set(value)
+
     def update_all(self, source_model, source_value=None):
         if self._is_updating: return
         self._is_updating = True
@@ -201,22 +282,23 @@ class ColorConverterApp(tk.Tk):
             rgb = self._xyz_to_rgb(*xyz)
             cmyk = self._rgb_to_cmyk(*rgb)
 
-        self.vars['rgb']['r'].set(round(rgb[0]))
-        self.vars['rgb']['g'].set(round(rgb[1]))
-        self.vars['rgb']['b'].set(round(rgb[2]))
-        self.vars['cmyk']['c'].set(round(cmyk[0]))
-        self.vars['cmyk']['m'].set(round(cmyk[1]))
-        self.vars['cmyk']['y'].set(round(cmyk[2]))
-        self.vars['cmyk']['k'].set(round(cmyk[3]))
-        self.vars['xyz']['x'].set(round(xyz[0], 2))
-        self.vars['xyz']['y'].set(round(xyz[1], 2))
-        self.vars['xyz']['z'].set(round(xyz[2], 2))
+        self._set_var(self.vars['rgb']['r'], round(rgb[0]))
+        self._set_var(self.vars['rgb']['g'], round(rgb[1]))
+        self._set_var(self.vars['rgb']['b'], round(rgb[2]))
+        self._set_var(self.vars['cmyk']['c'], round(cmyk[0]))
+        self._set_var(self.vars['cmyk']['m'], round(cmyk[1]))
+        self._set_var(self.vars['cmyk']['y'], round(cmyk[2]))
+        self._set_var(self.vars['cmyk']['k'], round(cmyk[3]))
+        self._set_var(self.vars['xyz']['x'], round(xyz[0], 2))
+        self._set_var(self.vars['xyz']['y'], round(xyz[1], 2))
+        self._set_var(self.vars['xyz']['z'], round(xyz[2], 2))
 
         hex_color = f"#{int(rgb[0]):02x}{int(rgb[1]):02x}{int(rgb[2]):02x}"
-        self.color_preview.config(bg=hex_color)
+        if self.color_preview.cget("bg") != hex_color:
+            self.color_preview.config(bg=hex_color)
 
         if source_model != 'xyz':
-            self.gamut_warning.pack_forget()
+            self._set_gamut_warning(False)
         self._is_updating = False
 
 if __name__ == "__main__":
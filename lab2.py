@@ -2,13 +2,15 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import threading
+import time
 import queue
-from PIL import Image, ExifTags
 
-# Подавляем ошибку о слишком большом изображении (DecompressionBombError),
-# так как мы работаем с доверенными файлами для лабы.
-# В реальном приложении это требует осторожности.
-Image.MAX_IMAGE_PIXELS = None
+import image_metadata
+from image_hashes import DuplicateGroups
+from metadata_index import MetadataIndex
+from result_table import RowStore, VirtualTable, text_key
+from scan_engine import ExtractionEngine, scan_folder
+from scan_profile import ScanProfile
 
 
 class ImageMetadataApp(tk.Tk):
@@ -16,6 +18,14 @@ class ImageMetadataApp(tk.Tk):
     GUI-приложение для анализа метаданных изображений из выбранной папки.
     """
 
+    # Время на разбор очереди за один тик, чтобы окно оставалось отзывчивым
+    QUEUE_BUDGET_MS = 30
+    QUEUE_POLL_MS = 100
+    # Как часто пересортировывать таблицу, пока идут новые строки
+    RESORT_INTERVAL_S = 1.0
+    # Как часто обновлять панель профилирования во время сканирования
+    PROFILE_INTERVAL_S = 0.5
+
     def __init__(self):
         super().__init__()
         self.title("Анализатор метаданных изображений (Лаб. работа №2)")
@@ -26,20 +36,36 @@ class ImageMetadataApp(tk.Tk):
         # --- Переменные состояния ---
         self.data_queue = queue.Queue()
         self.current_scan_thread = None
-        self.supported_extensions = (
-            '.jpg', '.jpeg', '.gif', '.tif', '.tiff', '.bmp', '.png', '.pcx'
+        self.cancel_event = threading.Event()
+        self.supported_extensions = image_metadata.SUPPORTED_EXTENSIONS
+        self.index_path = None  # None — индекс по умолчанию (см. metadata_index)
+        self.store = RowStore(
+            image_metadata.COLUMNS, unique=("filename", "extra"),
+            keys={"filename": text_key, "compression": text_key, "extra": text_key}
         )
+        self._last_resort = 0.0
+        self._filter_job = None
+
+        # --- Настройки пула извлечения ---
+        self.pool_types = {"Процессы": "process", "Потоки": "thread"}
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        self.pool_type_var = tk.StringVar(value="Процессы")
+        self.hash_modes = {"Без хэшей": None, "Дубликаты": "content", "Дубликаты и похожие": "perceptual"}
+        self.hash_mode_var = tk.StringVar(value="Без хэшей")
+        self.duplicates = None
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile = None
 
         # --- Стили ---
         style = ttk.Style(self)
         style.configure("Treeview.Heading", font=("Arial", 10, "bold"))
+        style.configure("Treeview", rowheight=22)
         style.configure("TButton", font=("Arial", 10))
         style.configure("TLabel", background="#f0f0f0", font=("Arial", 10))
         style.configure("TFrame", background="#f0f0f0")
 
         # --- Создание виджетов ---
         self._create_widgets()
-        self._check_queue()
 
     def _create_widgets(self):
         """Создает и размещает все виджеты в главном окне."""
@@ -55,48 +81,69 @@ class ImageMetadataApp(tk.Tk):
         )
         self.select_button.pack(side="left", padx=(0, 10))
 
+        self.cancel_button = ttk.Button(
+            control_frame,
+            text="Отмена",
+            command=self._cancel_scan,
+            state="disabled"
+        )
+        self.cancel_button.pack(side="left", padx=(0, 10))
+
+        ttk.Label(control_frame, text="Рабочих:").pack(side="left")
+        ttk.Spinbox(
+            control_frame, from_=1, to=256, width=4, textvariable=self.workers_var
+        ).pack(side="left", padx=(5, 10))
+        ttk.Combobox(
+            control_frame, textvariable=self.pool_type_var, values=list(self.pool_types),
+            state="readonly", width=10
+        ).pack(side="left", padx=(0, 10))
+        ttk.Combobox(
+            control_frame, textvariable=self.hash_mode_var, values=list(self.hash_modes),
+            state="readonly", width=20
+        ).pack(side="left", padx=(0, 10))
+        self.duplicates_button = ttk.Button(
+            control_frame, text="Дубликаты...", command=self._show_duplicates, state="disabled"
+        )
+        self.duplicates_button.pack(side="left", padx=(0, 10))
+
+        ttk.Label(control_frame, text="Фильтр:").pack(side="left")
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self._schedule_filter())
+        ttk.Entry(control_frame, textvariable=self.filter_var, width=20).pack(side="left", padx=(5, 10))
+
         self.scan_label = ttk.Label(control_frame, text="Для начала выберите папку.")
         self.scan_label.pack(side="left", fill="x", expand=True)
 
-        # --- Фрейм для таблицы с прокруткой ---
-        table_frame = ttk.Frame(self, padding=(10, 0, 10, 0))
-        table_frame.pack(fill="both", expand=True)
-        table_frame.rowconfigure(0, weight=1)
-        table_frame.columnconfigure(0, weight=1)
-
-        # --- Определение колонок таблицы ---
-        columns = ("filename", "size", "dpi", "depth", "compression", "extra")
-
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
-
-        # Настройка заголовков
-        self.tree.heading("filename", text="Имя файла", anchor="w")
-        self.tree.heading("size", text="Размер (ШxВ)", anchor="center")
-        self.tree.heading("dpi", text="Разрешение (DPI)", anchor="center")
-        self.tree.heading("depth", text="Глубина цвета (бит)", anchor="center")
-        self.tree.heading("compression", text="Сжатие", anchor="w")
-        self.tree.heading("extra", text="Доп. инфо (для доп. баллов)", anchor="w")
-
-        # Настройка ширины колонок
-        self.tree.column("filename", width=250, stretch=True)
-        self.tree.column("size", width=120, stretch=False, anchor="center")
-        self.tree.column("dpi", width=120, stretch=False, anchor="center")
-        self.tree.column("depth", width=150, stretch=False, anchor="center")
-        self.tree.column("compression", width=150, stretch=False)
-        self.tree.column("extra", width=300, stretch=True)
-
-        # --- Скроллбары ---
-        v_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        h_scroll = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        v_scroll.grid(row=0, column=1, sticky="ns")
-        h_scroll.grid(row=1, column=0, sticky="ew")
+        # --- Таблица: в Treeview живут только видимые строки, данные — в self.store ---
+        headings = [
+            ("filename", "Имя файла", 250, True, "w"),
+            ("size", "Размер (ШxВ)", 120, False, "center"),
+            ("dpi", "Разрешение (DPI)", 120, False, "center"),
+            ("depth", "Глубина цвета (бит)", 150, False, "center"),
+            ("compression", "Сжатие", 150, False, "w"),
+            ("extra", "Доп. инфо (для доп. баллов)", 300, True, "w"),
+        ]
+        self.table = VirtualTable(self, self.store, headings, padding=(10, 0, 10, 0))
+        self.table.pack(fill="both", expand=True)
+        self.tree = self.table.tree
 
         # --- Нижняя панель (статус и прогресс) ---
         status_frame = ttk.Frame(self, padding=10)
         status_frame.pack(fill="x")
+        self.status_frame = status_frame
+
+        # --- Панель профилирования (показывается, когда включено профилирование) ---
+        self.profile_frame = ttk.LabelFrame(self, text="Профилирование сканирования", padding=5)
+        self.profile_text = tk.Text(self.profile_frame, height=12, wrap="none", font=("Courier", 9))
+        self.profile_text.pack(side="left", fill="both", expand=True)
+        self.profile_export_button = ttk.Button(
+            self.profile_frame, text="Экспорт JSON...", command=self._export_profile, state="disabled"
+        )
+        self.profile_export_button.pack(side="right", anchor="n", padx=(5, 0))
+
+        ttk.Checkbutton(
+            status_frame, text="Профилирование", variable=self.profile_var, command=self._toggle_profile_panel
+        ).pack(side="left", padx=(0, 10))
 
         self.status_label = ttk.Label(status_frame, text="Готов к работе.")
         self.status_label.pack(side="left", fill="x", expand=True)
@@ -111,56 +158,132 @@ class ImageMetadataApp(tk.Tk):
             return
 
         # Очистка предыдущих результатов
-        self.tree.delete(*self.tree.get_children())
+        self.table.clear()
         self.scan_label.config(text=f"Сканирование папки: {folder_path}")
         self.status_label.config(text="Подготовка к сканированию...")
         self.progress_bar['value'] = 0
         self.select_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+
+        try:
+            workers = max(1, self.workers_var.get())
+        except tk.TclError:
+            workers = os.cpu_count() or 1
+        engine = ExtractionEngine(
+            workers=workers, executor=self.pool_types[self.pool_type_var.get()],
+            hashing=self.hash_modes[self.hash_mode_var.get()]
+        )
+        self.duplicates = None
+        self.duplicates_button.config(state="disabled")
+        self.profile = ScanProfile() if self.profile_var.get() else None
+        self.profile_export_button.config(state="disabled")
+        self.cancel_event = threading.Event()
 
         # Запуск сканирования в отдельном потоке
         self.current_scan_thread = threading.Thread(
             target=self._scan_folder_thread,
-            args=(folder_path,),
+            args=(folder_path, engine, self.cancel_event, self.profile),
             daemon=True
         )
         self.current_scan_thread.start()
+        self._check_queue()  # Опрос очереди до сообщения "done"
+
+    def _schedule_filter(self):
+        """Применяет фильтр после паузы в наборе текста."""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(200, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.table.set_filter(self.filter_var.get())
+        self._update_counter()
+
+    def _update_counter(self):
+        if self.store.filter_text:
+            self.scan_label.config(text=f"Показано {len(self.store)} из {self.store.count} строк.")
+
+    def _show_duplicates(self):
+        """Показывает группы дубликатов и похожих изображений последнего сканирования."""
+        if self.duplicates is None:
+            return
+        window = tk.Toplevel(self)
+        window.title("Дубликаты изображений")
+        window.geometry("800x400")
+        text = tk.Text(window, wrap="none")
+        scroll = ttk.Scrollbar(window, orient="vertical", command=text.yview)
+        text.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        text.pack(fill="both", expand=True)
+        text.insert("1.0", self.duplicates.summary())
+        text.config(state="disabled")
+
+    def _toggle_profile_panel(self):
+        """Показывает или скрывает панель профилирования (действует со следующего сканирования)."""
+        if self.profile_var.get():
+            self.profile_frame.pack(fill="x", padx=10, before=self.status_frame)
+        else:
+            self.profile_frame.pack_forget()
+
+    def _export_profile(self):
+        """Сохраняет профиль последнего сканирования в JSON."""
+        if self.profile is None:
+            return
+        path = filedialog.asksaveasfilename(
+            title="Сохранить профиль", defaultextension=".json", filetypes=[("JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            self.profile.save_json(path)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить профиль: {e}")
 
-    def _scan_folder_thread(self, folder_path):
+    def _cancel_scan(self):
+        """Просит поток сканирования остановиться после текущих задач."""
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+        self.status_label.config(text="Отмена сканирования...")
+
+    def _scan_folder_thread(self, folder_path, engine, cancel_event, profile=None):
         """
-        Рабочая функция потока. Рекурсивно сканирует папку
-        и помещает результаты в очередь.
+        Рабочая функция потока. Рекурсивно сканирует папку, раздает файлы
+        пулу извлечения и помещает результаты в очередь.
         """
         try:
-            # Сбор всех файлов
-            file_paths = []
-            for root, _, files in os.walk(folder_path):
-                for file in files:
-                    if file.lower().endswith(self.supported_extensions):
-                        file_paths.append(os.path.join(root, file))
-
-            total_files = len(file_paths)
-            if total_files == 0:
-                self.data_queue.put(
-                    ("status", f"В папке {folder_path} не найдено поддерживаемых изображений.")
-                )
-                self.data_queue.put(("progress", 0, 0))  # Обновить статус
-                self.data_queue.put(("done",))  # Завершить
-                return
-
-            # Анализ каждого файла
-            for i, file_path in enumerate(file_paths):
-                try:
-                    data = self._extract_metadata(file_path)
+            # Неизмененные файлы приходят из индекса, остальные — из пула извлечения
+            with MetadataIndex(self.index_path) as index:
+                processed = total_files = 0
+                exact = False
+                duplicates = DuplicateGroups() if engine.hashing else None
+                last_profile = time.perf_counter()
+                for event in scan_folder(
+                        folder_path, engine, index, cancel_event, self.supported_extensions, profile=profile):
+                    if profile is not None and time.perf_counter() - last_profile >= self.PROFILE_INTERVAL_S:
+                        last_profile = time.perf_counter()
+                        self.data_queue.put(("profile", profile.summary()))
+                    if event[0] == "total":
+                        _, total_files, exact = event
+                        if exact and total_files == 0:
+                            self.data_queue.put(
+                                ("status", f"В папке {folder_path} не найдено поддерживаемых изображений.")
+                            )
+                        continue
+                    if event[0] == "hash":
+                        duplicates.add(*event[1:])
+                        continue
+
+                    _, _, data = event
+                    processed += 1
                     self.data_queue.put(("data", data))
-                except Exception as e:
-                    # Ошибка чтения конкретного файла
-                    error_data = (
-                        os.path.basename(file_path),
-                        f"Ошибка: {e}", "N/A", "N/A", "N/A", "N/A"
-                    )
-                    self.data_queue.put(("data", error_data))
+                    # Пока обход идет, total_files — оценка и может быть меньше processed
+                    self.data_queue.put(("progress", processed, max(total_files, processed), exact))
 
-                self.data_queue.put(("progress", i + 1, total_files))
+                if duplicates is not None:
+                    self.data_queue.put(("duplicates", duplicates))
+                if profile is not None:
+                    profile.finish()
+                    self.data_queue.put(("profile", profile.summary()))
 
         except Exception as e:
             # Глобальная ошибка потока
@@ -171,20 +294,24 @@ class ImageMetadataApp(tk.Tk):
     def _check_queue(self):
         """
         Проверяет очередь данных из потока и обновляет GUI.
-        Вызывается циклично через self.after().
+        Вызывается циклично через self.after(). За один вызов очередь
+        разбирается не дольше QUEUE_BUDGET_MS; строки складываются в
+        хранилище, а таблица и прогресс перерисовываются один раз.
         """
+        deadline = time.perf_counter() + self.QUEUE_BUDGET_MS / 1000
+        progress = None
+        added = done = False
         try:
-            while True:
+            while time.perf_counter() < deadline:
                 message = self.data_queue.get_nowait()
                 msg_type, *payload = message
 
                 if msg_type == "data":
-                    self.tree.insert("", "end", values=payload[0])
+                    self.store.append(payload[0])
+                    added = True
 
                 elif msg_type == "progress":
-                    current, total = payload
-                    self.progress_bar['value'] = (current / total) * 100
-                    self.status_label.config(text=f"Обработано {current} из {total} файлов...")
+                    progress = payload
 
                 elif msg_type == "status":
                     self.status_label.config(text=payload[0])
@@ -192,132 +319,59 @@ class ImageMetadataApp(tk.Tk):
                 elif msg_type == "error":
                     messagebox.showerror("Ошибка", payload[0])
 
+                elif msg_type == "profile":
+                    self.profile_text.delete("1.0", "end")
+                    self.profile_text.insert("1.0", payload[0])
+
+                elif msg_type == "duplicates":
+                    self.duplicates = payload[0]
+                    self.duplicates_button.config(state="normal")
+
                 elif msg_type == "done":
-                    self.status_label.config(text="Сканирование завершено.")
-                    self.scan_label.config(text="Выберите новую папку для анализа.")
-                    self.select_button.config(state="normal")
-                    self.progress_bar['value'] = 100  # Убедиться, что 100%
-                    return  # Прекратить проверку до следующего сканирования
+                    done = True
+                    break
 
         except queue.Empty:
             pass  # Очередь пуста, ничего не делаем
 
-        # Перепланируем проверку очереди
-        self.after(100, self._check_queue)
+        if progress is not None:
+            current, total, exact = progress
+            self.progress_bar['value'] = (current / total) * 100
+            approx = "" if exact else "~"
+            self.status_label.config(text=f"Обработано {current} из {approx}{total} файлов...")
+
+        now = time.perf_counter()
+        if self.store.stale and (done or now - self._last_resort >= self.RESORT_INTERVAL_S):
+            self.store.refresh()
+            self._last_resort = now
+            added = True
+        if added:
+            self.table.refresh()
+            self._update_counter()
+
+        if done:
+            if self.cancel_event.is_set():
+                self.status_label.config(text="Сканирование отменено.")
+            else:
+                self.status_label.config(text="Сканирование завершено.")
+                self.progress_bar['value'] = 100  # Убедиться, что 100%
+            self.scan_label.config(text="Выберите новую папку для анализа.")
+            self._update_counter()
+            self.select_button.config(state="normal")
+            self.cancel_button.config(state="disabled")
+            if self.profile is not None:
+                self.profile_export_button.config(state="normal")
+            return  # Прекратить проверку до следующего сканирования
+
+        # Если бюджет исчерпан, в очереди еще есть данные — продолжаем сразу
+        busy = time.perf_counter() >= deadline
+        self.after(1 if busy else self.QUEUE_POLL_MS, self._check_queue)
 
     def _extract_metadata(self, file_path):
         """
-        Извлекает метаданные из одного файла с помощью Pillow.
+        Извлекает метаданные из одного файла (см. image_metadata.extract_metadata).
         """
-        with Image.open(file_path) as img:
-            filename = os.path.basename(file_path)
-            size = f"{img.width} x {img.height}"
-            dpi = self._get_dpi(img)
-            depth = self._get_color_depth(img)
-            compression = self._get_compression(img)
-            extra = self._get_extra_info(img)
-
-            return (filename, size, dpi, depth, compression, extra)
-
-    def _get_dpi(self, img):
-        """Помощник: получает DPI из разных источников."""
-        if 'dpi' in img.info:
-            dpi = img.info['dpi']
-            return f"{int(dpi[0])} x {int(dpi[1])}"
-
-        # Для JPEG (JFIF)
-        if 'jfif_density' in img.info:
-            density = img.info['jfif_density']
-            unit = img.info.get('jfif_unit')
-            if unit == 1:  # 1 = DPI, 2 = DPC
-                return f"{int(density[0])} x {int(density[1])}"
-            elif unit == 2:  # Конвертируем DPC в DPI
-                return f"{int(density[0] * 2.54)} x {int(density[1] * 2.54)}"
-
-        # Для TIFF (может быть в тегах)
-        try:
-            # Ищем теги EXIF (Tiff использует их)
-            x_res_tag = 282
-            y_res_tag = 283
-            if hasattr(img, '_getexif') and img._getexif():
-                exif = img._getexif()
-                if x_res_tag in exif and y_res_tag in exif:
-                    # Разрешение хранится как (числитель, знаменатель)
-                    x_res = exif[x_res_tag][0][0] / exif[x_res_tag][0][1]
-                    y_res = exif[y_res_tag][0][0] / exif[y_res_tag][0][1]
-                    return f"{int(x_res)} x {int(y_res)}"
-        except Exception:
-            pass  # Не удалось прочитать EXIF/TIFF теги
-
-        return "N/A"  # Не найдено
-
-    def _get_color_depth(self, img):
-        """Помощник: определяет глубину цвета."""
-        mode = img.mode
-        if mode == '1':
-            return 1  # 1-битный, черно-белый
-        elif mode == 'P':
-            # 'P' (Палитра). Обычно 8 бит на пиксель (индекс в палитре).
-            return 8
-        elif mode in ('L', 'LA'):
-            # 'L' (Grayscale)
-            return 8 * len(img.getbands())
-        elif mode in ('RGB', 'RGBA', 'CMYK', 'YCbCr'):
-            # img.bits * кол-во каналов (img.bits обычно 8)
-            return img.bits * len(img.getbands())
-        else:
-            return f"Неизв. ({mode})"
-
-    def _get_compression(self, img):
-        """Помощник: определяет тип сжатия."""
-        # Общий тег 'compression' (особенно для TIFF)
-        if 'compression' in img.info:
-            return str(img.info['compression'])
-
-        # Специфичные для формата
-        fmt = img.format
-        if fmt == 'JPEG':
-            return "JPEG (DCT)"
-        if fmt == 'PNG':
-            return "Deflate"
-        if fmt == 'GIF':
-            return "LZW"
-        if fmt == 'BMP':
-            # BMP может быть не сжат или RLE
-            return img.info.get('compression', 'None (uncompressed)')
-        if fmt == 'PCX':
-            return "RLE (PackBits)"
-
-        return "N/A"
-
-    def _get_extra_info(self, img):
-        """Помощник: извлекает доп. информацию для доп. баллов."""
-        fmt = img.format
-        extra = []
-
-        # Для GIF: кол-во цветов в палитре
-        if fmt == 'GIF' and img.mode == 'P':
-            try:
-                palette_size = len(img.getpalette()) // 3
-                extra.append(f"Палитра: {palette_size} цветов")
-            except Exception:
-                pass
-
-        if fmt == 'JPEG':
-            if 'quantization' in img.info:
-                qt_count = len(img.info['quantization'])
-                extra.append(f"Таблицы квантования: {qt_count} шт.")
-
-            if hasattr(img, '_getexif') and img._getexif():
-                exif_count = len(img._getexif())
-                extra.append(f"EXIF-тегов: {exif_count}")
-
-        if 'gamma' in img.info:
-            extra.append(f"Gamma: {img.info['gamma']}")
-        if 'sRGB' in img.info:
-            extra.append(f"Профиль: sRGB (intent {img.info['sRGB']})")
-
-        return "; ".join(extra) if extra else "N/A"
+        return image_metadata.extract_metadata(file_path)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,16 @@
+import queue
 import tkinter as tk
-from tkinter import ttk, filedialog
-import cv2
-import numpy as np
-from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-plt.ioff()
+from tkinter import ttk, filedialog, messagebox
+from concurrent.futures import ThreadPoolExecutor
+
+import image_ops
+import recipe
+import tiled_engine
+import video_engine
+from frame_cache import FrameCache, frame_key
+from histogram_view import HistogramView
+from image_view import ImageView
+from latest_worker import LatestRequestWorker
 
 class ImageProcessorApp(tk.Tk):
     """
@@ -25,9 +29,33 @@ class ImageProcessorApp(tk.Tk):
         self.bg_color = "#f0f2f5"
         self.configure(bg=self.bg_color)
 
+        # original_cv_image — уменьшенная копия (превью); полное изображение
+        # декодируется только при сохранении, в фоновом потоке
         self.original_cv_image = None
+        self.original_hists = None
         self.processed_cv_image = None
+        self.image_path = None
+        self.preview_scale = 1.0
+        self.full_size = None
         self.params = {}
+        self.save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self.save_future = None
+        # Обработка превью идет в фоне; показывается только результат последнего запроса
+        self.worker = LatestRequestWorker("preview")
+        self._poll_job = None
+        self._shown_request = 0
+        # Обработанные кадры превью по (номер изображения, параметры)
+        self.frame_cache = FrameCache()
+        self._image_id = 0
+        # Рецепт — цепочка шагов; элементы управления редактируют шаг edit_index.
+        # Промежуточные этапы кэширует recipe_runner (используется только фоновым исполнителем)
+        self.recipe_steps = []
+        self.edit_index = None
+        self.recipe_runner = recipe.RecipeRunner()
+        self._loading_controls = False
+        # Обработка видео (video_engine.VideoPipeline) и опрос его кадров для просмотра
+        self.video = None
+        self._video_job = None
 
         style = ttk.Style(self)
         style.theme_use('clam')
@@ -52,7 +80,12 @@ class ImageProcessorApp(tk.Tk):
         btn_frame = ttk.Frame(top_bar)
         btn_frame.pack(side="left")
         ttk.Button(btn_frame, text="📂 Открыть", command=self._load_image).pack(side="left", padx=5)
-        ttk.Button(btn_frame, text="💾 Сохранить", command=self._save_image).pack(side="left", padx=5)
+        self.save_button = ttk.Button(btn_frame, text="💾 Сохранить", command=self._save_image)
+        self.save_button.pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Пресет ⬇", command=self._load_preset).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Пресет ⬆", command=self._save_preset).pack(side="left", padx=5)
+        self.video_button = ttk.Button(btn_frame, text="🎞 Видео", command=self._toggle_video)
+        self.video_button.pack(side="left", padx=5)
 
         mode_frame = ttk.Frame(top_bar)
         mode_frame.pack(side="left", padx=30)
@@ -67,12 +100,23 @@ class ImageProcessorApp(tk.Tk):
                                        width=35)
         self.mode_combo.pack(side="left", padx=5)
         self.mode_combo.bind("<<ComboboxSelected>>", self._on_mode_change)
+        self.mode_keys = dict(zip(self.modes, (image_ops.MODE_POINT, image_ops.MODE_MORPH)))
+        self.kernel_shapes = ["Rect (Прямоугольник)", "Ellipse (Эллипс)", "Cross (Крест)"]
+
+        self.info_label = ttk.Label(top_bar, text="")
+        self.info_label.pack(side="right", padx=5)
 
         self.settings_frame = ttk.LabelFrame(self, text="Параметры", padding=10)
         self.settings_frame.pack(side="top", fill="x", padx=10, pady=5)
+        self._create_recipe_panel()
         self.controls_container = ttk.Frame(self.settings_frame)
         self.controls_container.pack(fill="x", expand=True)
 
+        status_bar = ttk.Frame(self, padding=(15, 0, 15, 5))
+        status_bar.pack(side="bottom", fill="x")
+        self.cache_label = ttk.Label(status_bar, text="", font=("Segoe UI", 8))
+        self.cache_label.pack(side="right")
+
         work_area = ttk.Frame(self)
         work_area.pack(fill="both", expand=True, padx=10, pady=5)
 
@@ -80,24 +124,41 @@ class ImageProcessorApp(tk.Tk):
         left_col.pack(side="left", fill="both", expand=True, padx=5)
         ttk.Label(left_col, text="Исходное изображение", style="Header.TLabel").pack(pady=(0, 5))
 
-        self.canvas_orig = tk.Canvas(left_col, bg="#e1e4e8", height=300, highlightthickness=0)
+        self.canvas_orig = ImageView(left_col, bg="#e1e4e8", height=300)
         self.canvas_orig.pack(side="top", fill="both", expand=True)
 
         self.hist_frame_orig = ttk.Frame(left_col, height=400)
         self.hist_frame_orig.pack(side="bottom", fill="both", expand=True, pady=5)
+        self.hist_view_orig = HistogramView(self.hist_frame_orig, bg=self.bg_color)
+        self.hist_view_orig.pack(fill="both", expand=True)
 
         right_col = ttk.Frame(work_area)
         right_col.pack(side="right", fill="both", expand=True, padx=5)
         ttk.Label(right_col, text="Результат обработки", style="Header.TLabel").pack(pady=(0, 5))
 
-        self.canvas_proc = tk.Canvas(right_col, bg="#e1e4e8", height=300, highlightthickness=0)
+        self.canvas_proc = ImageView(right_col, bg="#e1e4e8", height=300)
         self.canvas_proc.pack(side="top", fill="both", expand=True)
 
         self.hist_frame_proc = ttk.Frame(right_col, height=400)
         self.hist_frame_proc.pack(side="bottom", fill="both", expand=True, pady=5)
+        self.hist_view_proc = HistogramView(self.hist_frame_proc, bg=self.bg_color)
+        self.hist_view_proc.pack(fill="both", expand=True)
 
         self._update_controls_ui()
 
+    def _create_recipe_panel(self):
+        frame = ttk.LabelFrame(self.settings_frame, text="Рецепт", padding=5)
+        frame.pack(side="right", fill="y")
+        self.recipe_list = tk.Listbox(frame, height=5, width=36, exportselection=False, font=("Segoe UI", 9))
+        self.recipe_list.pack(side="left", fill="y")
+        self.recipe_list.bind("<<ListboxSelect>>", self._on_step_select)
+        buttons = ttk.Frame(frame)
+        buttons.pack(side="left", fill="y", padx=(5, 0))
+        ttk.Button(buttons, text="+ Шаг", command=self._add_step).pack(fill="x")
+        ttk.Button(buttons, text="− Шаг", command=self._remove_step).pack(fill="x")
+        ttk.Button(buttons, text="Рецепт ⬇", command=self._load_recipe).pack(fill="x")
+        ttk.Button(buttons, text="Рецепт ⬆", command=self._save_recipe).pack(fill="x")
+
     def _update_controls_ui(self):
         for widget in self.controls_container.winfo_children():
             widget.destroy()
@@ -120,10 +181,10 @@ class ImageProcessorApp(tk.Tk):
             self._add_radio(g1, "morph_type", "Erosion", ["Erosion (Сужение)", "Dilation (Расширение)"])
 
             g2 = self._create_control_group("Структурный элемент")
-            self._add_combo(g2, "kernel_shape", "Rect", ["Rect (Прямоугольник)", "Ellipse (Эллипс)", "Cross (Крест)"])
+            self._add_combo(g2, "kernel_shape", "Rect", self.kernel_shapes)
             self._add_slider(g2, "kernel_size", "Размер ядра (px)", 3, 1, 31)
 
-        if self.original_cv_image is not None:
+        if not self._loading_controls:
             self._apply_processing()
 
     def _create_control_group(self, title):
@@ -166,127 +227,337 @@ class ImageProcessorApp(tk.Tk):
         self._update_controls_ui()
 
     def _load_image(self):
-        path = filedialog.askopenfilename(filetypes=[("Images", "*.jpg *.jpeg *.png *.bmp")])
+        path = filedialog.askopenfilename(filetypes=[("Images", "*.jpg *.jpeg *.png *.bmp *.tif *.tiff *.npy")])
         if not path: return
 
-        stream = open(path, "rb")
-        bytes = bytearray(stream.read())
-        numpyarray = np.asarray(bytes, dtype=np.uint8)
-        img = cv2.imdecode(numpyarray, cv2.IMREAD_UNCHANGED)
-        stream.close()
-
-        if img is None: return
-
-        if len(img.shape) == 3 and img.shape[2] == 4:
-            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        # Для интерактивной работы декодируется только уменьшенная копия
+        loaded = image_ops.load_preview(path)
+        if loaded is None: return
+        img, self.preview_scale, self.full_size = loaded
 
+        self.image_path = path
+        self._image_id += 1
+        self.frame_cache.clear()
         self.original_cv_image = img
-        self._show_image(self.canvas_orig, img)
-        self._draw_histogram(img, self.hist_frame_orig)
+        self.original_hists = image_ops.histograms(img)
+        self._update_info()
+        self.canvas_orig.set_image(img)
+        self._draw_histogram(img, self.hist_view_orig, self.original_hists)
         self._apply_processing()
 
-    def _save_image(self):
-        if self.processed_cv_image is None: return
-        path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG", "*.png"), ("JPG", "*.jpg")])
-        if path:
-            is_success, im_buf = cv2.imencode(".png", self.processed_cv_image)
-            if is_success: im_buf.tofile(path)
-
-    def _show_image(self, canvas, cv_img):
-        if cv_img is None: return
+    def _toggle_video(self):
+        """
+        Запускает обработку видео или последовательности кадров текущими
+        параметрами (рецептом) либо останавливает идущую.
+        """
+        if self.video is not None:
+            self.video.stop()
+            return
+        source = filedialog.askopenfilename(
+            title="Видео или первый кадр последовательности",
+            filetypes=[("Видео и кадры", "*.mp4 *.avi *.mov *.mkv *.m4v *.png *.jpg *.jpeg *.bmp *.tif *.tiff")]
+        )
+        if not source: return
+        # Отмена выбора файла результата — только просмотр
+        output = filedialog.asksaveasfilename(
+            title="Сохранить результат (Отмена — только просмотр)", defaultextension=".mp4",
+            filetypes=[("MP4", "*.mp4"), ("AVI", "*.avi")]
+        ) or None
+        try:
+            self.video = video_engine.VideoPipeline(source, self._render_params(), output).start()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось открыть видео: {e}")
+            return
+        self.video_button.config(text="⏹ Стоп")
+        self.save_button.config(state="disabled")
+        # Гистограммы во время видео не пересчитываются
+        self._draw_histogram(None, self.hist_view_orig)
+        self._draw_histogram(None, self.hist_view_proc)
+        self._poll_video()
+
+    def _poll_video(self):
+        """Показывает самый новый обработанный кадр и скорость; по окончании возвращает изображение."""
+        self._video_job = None
+        video = self.video
+        preview = video.take_preview()
+        if preview is not None:
+            _, frame, out = preview
+            self.canvas_orig.set_image(frame)
+            self.canvas_proc.set_image(out)
+        self.cache_label.config(text=video.stats.summary())
+        if not video.done:
+            self._update_info(f"Видео: кадр {video.stats.processed}")
+            self._video_job = self.after(30, self._poll_video)
+            return
+
+        self.video = None
+        self.video_button.config(text="🎞 Видео")
+        self.save_button.config(state="normal")
+        self._update_info()
+        if video.error is not None:
+            messagebox.showerror("Ошибка", f"Ошибка обработки видео: {video.error}")
+        if self.original_cv_image is not None:
+            self.canvas_orig.set_image(self.original_cv_image)
+            self._draw_histogram(self.original_cv_image, self.hist_view_orig, self.original_hists)
+            self._apply_processing()
 
-        if len(cv_img.shape) == 3:
-            img_rgb = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        else:
-            img_rgb = cv2.cvtColor(cv_img, cv2.COLOR_GRAY2RGB)
+    def _update_info(self, text=None):
+        if text is None and self.full_size is not None:
+            w, h = self.full_size
+            if self.preview_scale < 1:
+                ph, pw = self.original_cv_image.shape[:2]
+                text = f"Превью {pw}x{ph} (оригинал {w}x{h})"
+            else:
+                text = f"{w}x{h}"
+        self.info_label.config(text=text or "")
+
+    def _current_params(self):
+        """Снимок параметров текущего режима для image_ops.process_image (округленный для кэша)."""
+        params = {key: var.get() for key, var in self.params.items()}
+        params["mode"] = self.mode_keys[self.mode_var.get()]
+        return image_ops.quantize_params(params)
+
+    def _render_params(self):
+        """
+        Параметры для обработки: текущая операция или рецепт, в котором
+        шаг edit_index заменен текущими значениями элементов управления.
+        """
+        params = self._current_params()
+        if not self.recipe_steps:
+            return params
+        if self.edit_index is not None:
+            step = image_ops.normalize_params(params)
+            if step != self.recipe_steps[self.edit_index]:
+                self.recipe_steps[self.edit_index] = step
+                self._refresh_recipe_list()
+        return {"mode": recipe.MODE_RECIPE, "steps": list(self.recipe_steps)}
+
+    @staticmethod
+    def _step_label(step):
+        if step["mode"] == image_ops.MODE_POINT:
+            text = f"Контраст ×{step['contrast']:g}, яркость {step['brightness']:+g}"
+            return text + (", негатив" if step["invert"] else "")
+        if step["mode"] == image_ops.MODE_MORPH:
+            return f"{step['morph_type']} {step['kernel_shape']} {step['kernel_size']}"
+        return f"{step['op']} с этапом {step['with']}"
+
+    def _refresh_recipe_list(self):
+        self.recipe_list.delete(0, "end")
+        for i, step in enumerate(self.recipe_steps, 1):
+            self.recipe_list.insert("end", f"{i}. {self._step_label(step)}")
+        if self.edit_index is not None:
+            self.recipe_list.selection_set(self.edit_index)
+            self.recipe_list.see(self.edit_index)
+
+    def _set_controls(self, params):
+        """Выставляет режим и значения элементов управления по параметрам операции."""
+        params = dict(params)
+        mode = params.pop("mode")
+        self._loading_controls = True
+        try:
+            self.mode_var.set(next(label for label, key in self.mode_keys.items() if key == mode))
+            self._update_controls_ui()
+            for key, value in params.items():
+                if key == "kernel_shape":
+                    # В списке формы ядра — подписи вида 'Rect (Прямоугольник)'
+                    value = next(label for label in self.kernel_shapes if label.startswith(value))
+                self.params[key].set(value)
+        finally:
+            self._loading_controls = False
+
+    def _edit_step(self, index):
+        """Делает шаг index редактируемым; шаги-объединения элементами управления не редактируются."""
+        step = self.recipe_steps[index] if index is not None else None
+        if step is not None and step["mode"] == recipe.MODE_COMBINE:
+            index = None
+        self.edit_index = None  # пока элементы управления перестраиваются, шаг не перезаписывается
+        if index is not None:
+            self._set_controls(step)
+        self.edit_index = index
+        self._refresh_recipe_list()
+
+    def _on_step_select(self, event):
+        selection = self.recipe_list.curselection()
+        if selection:
+            self._edit_step(selection[0])
+            self._apply_processing()
 
-        h, w = img_rgb.shape[:2]
+    def _add_step(self):
+        """Добавляет текущую операцию в конец рецепта; дальше редактируется новый шаг."""
+        self.recipe_steps.append(image_ops.normalize_params(self._current_params()))
+        self._edit_step(len(self.recipe_steps) - 1)
+        self._apply_processing()
 
-        cw = canvas.winfo_width() if canvas.winfo_width() > 10 else 400
-        ch = canvas.winfo_height() if canvas.winfo_height() > 10 else 300
+    def _remove_step(self):
+        if self.edit_index is None: return
+        del self.recipe_steps[self.edit_index]
+        # Ссылки объединений на удаленный и последующие шаги становятся неверными
+        try:
+            self.recipe_steps = recipe.normalize({"mode": recipe.MODE_RECIPE, "steps": self.recipe_steps})["steps"]
+        except ValueError:
+            self.recipe_steps = [s for s in self.recipe_steps if s["mode"] != recipe.MODE_COMBINE]
+        self._edit_step(min(self.edit_index, len(self.recipe_steps) - 1) if self.recipe_steps else None)
+        self._apply_processing()
 
-        scale = min(cw / w, ch / h)
-        new_w, new_h = int(w * scale), int(h * scale)
+    def _save_recipe(self):
+        """Сохраняет рецепт (или текущую операцию) в JSON для batch_cli.py и tiled_engine.py."""
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Рецепт", "*.json")])
+        if not path: return
+        params = self._render_params()
+        if params.get("mode") != recipe.MODE_RECIPE:
+            params = {"mode": recipe.MODE_RECIPE, "steps": [params]}
+        try:
+            recipe.save_recipe(path, params)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить рецепт: {e}")
 
-        pil_img = Image.fromarray(img_rgb).resize((new_w, new_h), Image.Resampling.LANCZOS)
-        img_tk = ImageTk.PhotoImage(pil_img)
+    def _load_recipe(self):
+        path = filedialog.askopenfilename(filetypes=[("Рецепт", "*.json")])
+        if not path: return
+        try:
+            params = recipe.load_recipe(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить рецепт: {e}")
+            return
+
+        self.recipe_steps = list(recipe.steps_of(params))
+        editable = [i for i, step in enumerate(self.recipe_steps) if step["mode"] != recipe.MODE_COMBINE]
+        self._edit_step(editable[-1] if editable else None)
+        self._apply_processing()
 
-        canvas.delete("all")
-        canvas.create_image(cw // 2, ch // 2, image=img_tk, anchor="center")
-        canvas.image = img_tk
+    def _save_preset(self):
+        """Сохраняет текущие параметры в JSON-пресет для batch_cli.py."""
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Пресет", "*.json")])
+        if not path: return
+        try:
+            image_ops.save_preset(path, self._current_params())
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить пресет: {e}")
 
-    def _draw_histogram(self, cv_img, frame):
-        for widget in frame.winfo_children():
-            widget.destroy()
-        if cv_img is None: return
+    def _load_preset(self):
+        path = filedialog.askopenfilename(filetypes=[("Пресет", "*.json")])
+        if not path: return
+        try:
+            params = image_ops.load_preset(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить пресет: {e}")
+            return
 
-        fig = plt.Figure(figsize=(5, 4), dpi=80)
-        ax = fig.add_subplot(111)
-        fig.patch.set_facecolor(self.bg_color)
-        ax.set_facecolor('#ffffff')
+        self._set_controls(params)
+        self._apply_processing()
 
-        if len(cv_img.shape) == 2:
-            hist = cv2.calcHist([cv_img], [0], None, [256], [0, 256])
-            ax.plot(hist, color='black')
-            ax.fill_between(range(256), hist.ravel(), color='gray', alpha=0.3)
+    def _save_image(self):
+        if self.video is not None: return
+        if self.processed_cv_image is None or self.image_path is None: return
+        if self.save_future is not None and not self.save_future.done(): return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".png",
+            filetypes=[("PNG", "*.png"), ("JPG", "*.jpg"), ("TIFF", "*.tif"), ("NumPy", "*.npy")]
+        )
+        if path:
+            # Полное разрешение с теми же параметрами — в фоне, плитками (tiled_engine),
+            # окно остается отзывчивым
+            self.save_future = self.save_executor.submit(
+                tiled_engine.process_path, self.image_path, path, self._render_params()
+            )
+            self.save_button.config(state="disabled")
+            self._update_info("Сохранение в полном разрешении...")
+            self._check_save()
+
+    def _check_save(self):
+        if not self.save_future.done():
+            self.after(100, self._check_save)
+            return
+        self.save_button.config(state="normal")
+        self._update_info()
+        error = self.save_future.exception()
+        if error is not None:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить изображение: {error}")
+
+    def _draw_histogram(self, cv_img, view, hists=None):
+        """Обновляет данные постоянного виджета гистограммы (без пересоздания графика)."""
+        if cv_img is None:
+            view.set_data(None)
+            return
+        if hists is None:
+            hists = image_ops.histograms(cv_img)
+        view.set_data(hists)
+
+    @staticmethod
+    def _render(src, params, scale, src_hists=None, cache=None, key=None, runner=None, source_key=None):
+        """
+        Фоновая задача: обработка превью и гистограммы (масштабирует под
+        холст ImageView в потоке Tk). Рецепт выполняется через runner —
+        неизмененные начальные этапы берутся из его кэша. Для поэлементных
+        операций гистограмма выводится из исходной через LUT. Готовый кадр
+        сохраняется в cache.
+        """
+        if runner is not None:
+            img = runner.run(src, params, source_key, scale)
         else:
-            colors = ('b', 'g', 'r')
-            for i, color in enumerate(colors):
-                hist = cv2.calcHist([cv_img], [i], None, [256], [0, 256])
-                ax.plot(hist, color=color, linewidth=1)
-
-        ax.set_xlim([0, 256])
-        ax.set_title("Гистограмма", fontsize=10)
-        ax.grid(True, alpha=0.2)
-
-        fig.tight_layout()
-
-        canvas = FigureCanvasTkAgg(fig, master=frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+            img = recipe.process(src, params, scale)
+        hists = recipe.derive_histograms(src, src_hists, params)
+        if hists is None:
+            hists = image_ops.histograms(img)
+        if cache is not None:
+            cache.put(key, (img, hists))
+        return img, hists
 
     def _apply_processing(self):
+        """
+        Показывает кадр из кэша сразу или отправляет обработку текущего
+        превью в фон; более ранний запрос отменяется.
+        """
+        if self._loading_controls: return
+        if self.video is not None:
+            # Во время видео параметры применяются к следующим кадрам
+            self.video.set_params(self._render_params())
+            return
         if self.original_cv_image is None: return
 
-        img = self.original_cv_image.copy()
-        mode = self.mode_var.get()
-
+        params = self._render_params()
+        key = frame_key(self._image_id, params)
+        frame = self.frame_cache.get(key)
+        if frame is not None:
+            # Кадры запросов, отправленных раньше, уже устарели
+            self._shown_request = self.worker.latest
+            self._show_frame(frame)
+            return
+
+        self.worker.submit(
+            self._render, self.original_cv_image, params, self.preview_scale, self.original_hists,
+            self.frame_cache, key, self.recipe_runner, self._image_id
+        )
+        if self._poll_job is None:
+            self._poll_job = self.after(10, self._poll_worker)
+
+    def _show_frame(self, frame):
+        img, hists = frame
+        self.processed_cv_image = img
+        self.canvas_proc.set_image(img)
+        self._draw_histogram(img, self.hist_view_proc, hists)
+        self.cache_label.config(text=self.frame_cache.summary())
+
+    def _poll_worker(self):
+        """Показывает самый новый готовый кадр; опрашивает очередь, пока фон занят."""
+        self._poll_job = None
+        result = None
         try:
-            if mode == "Поэлементные операции (Контраст)":
-                alpha = self.params['contrast'].get()
-                beta = self.params['brightness'].get()
-                img = cv2.convertScaleAbs(img, alpha=alpha, beta=beta)
-
-                if self.params['invert'].get():
-                    img = cv2.bitwise_not(img)
-
-            elif mode == "Морфологическая обработка":
-                op = self.params['morph_type'].get()
-                shape_str = self.params['kernel_shape'].get()
-                k_size = int(self.params['kernel_size'].get())
-
-                if k_size % 2 == 0: k_size += 1
-
-                if "Ellipse" in shape_str:
-                    shape = cv2.MORPH_ELLIPSE
-                elif "Cross" in shape_str:
-                    shape = cv2.MORPH_CROSS
-                else:
-                    shape = cv2.MORPH_RECT
-
-                kernel = cv2.getStructuringElement(shape, (k_size, k_size))
-
-                if op == "Erosion":
-                    img = cv2.erode(img, kernel, iterations=1)
-                else:
-                    img = cv2.dilate(img, kernel, iterations=1)
-
-            self.processed_cv_image = img
-            self._show_image(self.canvas_proc, img)
-            self._draw_histogram(img, self.hist_frame_proc)
-
-        except Exception as e:
-            print(f"Error: {e}")
+            while True:
+                result = self.worker.results.get_nowait()  # Более ранние кадры устарели
+        except queue.Empty:
+            pass
+
+        if result is not None:
+            request_id, frame, error = result
+            if error is not None:
+                print(f"Error: {error}")
+            elif request_id > self._shown_request:
+                self._shown_request = request_id
+                self._show_frame(frame)
+
+        if self.worker.busy or not self.worker.results.empty():
+            self._poll_job = self.after(10, self._poll_worker)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""
+Фоновый исполнитель «побеждает последний запрос» для интерактивной обработки.
+
+Пока ползунок перетаскивается, окно шлет запросы быстрее, чем успевает
+обрабатываться кадр. LatestRequestWorker хранит только один ожидающий
+запрос: новый вытесняет еще не начатый, поэтому фон всегда работает над
+самыми свежими параметрами. Готовые кадры передаются через очередь —
+Tk не потокобезопасен, и окно забирает их само (через after), показывая
+только самый новый из готовых.
+"""
+import queue
+import threading
+
+
+class LatestRequestWorker:
+    """
+    Один фоновый поток. submit() возвращает номер запроса; в results
+    кладутся кортежи (номер, результат, исключение) выполненных запросов
+    в порядке возрастания номеров.
+    """
+
+    def __init__(self, name="latest-worker"):
+        self.results = queue.Queue()
+        self.latest = 0      # номер последнего отправленного запроса
+        self.dropped = 0     # запросы, вытесненные до начала выполнения
+        self._pending = None
+        self._running = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args):
+        """Ставит func(*args) в очередь вместо еще не начатого запроса."""
+        with self._cond:
+            self.latest += 1
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (self.latest, func, args)
+            self._cond.notify()
+            return self.latest
+
+    @property
+    def busy(self):
+        """Есть ли запрос, результат которого еще не выложен в results."""
+        with self._cond:
+            return self._pending is not None or self._running is not None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                request_id, func, args = self._pending
+                self._pending = None
+                self._running = request_id
+
+            result = error = None
+            try:
+                result = func(*args)
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._running = None
+                self.results.put((request_id, result, error))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._cond.notify()
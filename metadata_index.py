@@ -0,0 +1,166 @@
+"""
+Постоянный индекс метаданных для повторных сканирований (lab2.py).
+
+Индекс хранится в SQLite и связывает абсолютный путь файла с его размером,
+временем изменения и inode. При повторном сканировании строка таблицы
+берется из индекса, если эти три значения не изменились; заново
+открываются только новые и измененные файлы, а записи об удаленных
+файлах удаляются в конце сканирования. Там же хранятся хэши файлов для
+поиска дубликатов (image_hashes) — они пересчитываются только при
+изменении размера или mtime.
+"""
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "IMAGE_METADATA_INDEX",
+    os.path.join(os.path.expanduser("~"), ".cache", "image_metadata", "index.sqlite")
+)
+
+# Сколько записей копится перед фиксацией транзакции: прерванное
+# сканирование теряет не больше этого числа результатов.
+COMMIT_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL,
+    row      TEXT NOT NULL,
+    scan_id  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content  TEXT NOT NULL,
+    phash    TEXT
+)
+"""
+
+
+def file_signature(stat_result):
+    """Ключ актуальности записи: (размер, mtime в нс, inode)."""
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+
+def _folder_range(folder):
+    """Границы путей внутри папки для запроса по диапазону первичного ключа."""
+    prefix = os.path.join(os.path.abspath(folder), "")
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class MetadataIndex:
+    """
+    Соединение с индексом. Объект SQLite привязан к создавшему его потоку,
+    поэтому индекс открывается внутри потока сканирования.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_INDEX_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.scan_id = time.time_ns()
+        self._touched = []
+        self._stored = []
+        self._hashes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def lookup(self, path, stat_result):
+        """
+        Возвращает сохраненную строку таблицы, если файл не изменился,
+        иначе None. Найденная запись помечается как увиденная в этом скане.
+        """
+        path = os.path.abspath(path)
+        found = self.conn.execute(
+            "SELECT size, mtime_ns, inode, row FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if found is None or tuple(found[:3]) != file_signature(stat_result):
+            return None
+        self._touched.append((self.scan_id, path))
+        self._maybe_flush()
+        return tuple(json.loads(found[3]))
+
+    def store(self, path, stat_result, row):
+        """Сохраняет (или обновляет) строку таблицы для файла."""
+        self._stored.append(
+            (os.path.abspath(path), *file_signature(stat_result), json.dumps(row, ensure_ascii=False), self.scan_id)
+        )
+        self._maybe_flush()
+
+    def lookup_hashes(self, path, stat_result, perceptual=False):
+        """
+        Возвращает сохраненные (content_hash, phash), если размер и mtime
+        файла не изменились, иначе None. При perceptual=True запись без
+        перцептивного хэша тоже считается отсутствующей.
+        """
+        found = self.conn.execute(
+            "SELECT size, mtime_ns, content, phash FROM hashes WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        if found is None or tuple(found[:2]) != file_signature(stat_result)[:2]:
+            return None
+        if perceptual and found[3] is None:
+            return None
+        return found[2], found[3]
+
+    def store_hashes(self, path, stat_result, content, phash=None):
+        """Сохраняет хэши файла (ключ — путь, размер и mtime)."""
+        self._hashes.append(
+            (os.path.abspath(path), stat_result.st_size, stat_result.st_mtime_ns, content, phash)
+        )
+        self._maybe_flush()
+
+    def remove_missing(self, folder):
+        """
+        Удаляет записи файлов папки, не встреченных в текущем сканировании.
+        Возвращает число удаленных записей.
+        """
+        self.flush()
+        low, high = _folder_range(folder)
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM files WHERE path >= ? AND path < ? AND scan_id != ?", (low, high, self.scan_id)
+            )
+            self.conn.execute(
+                "DELETE FROM hashes WHERE path >= ? AND path < ? AND path NOT IN (SELECT path FROM files)",
+                (low, high)
+            )
+        return cursor.rowcount
+
+    def _maybe_flush(self):
+        if len(self._touched) + len(self._stored) + len(self._hashes) >= COMMIT_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Фиксирует накопленные изменения одной транзакцией."""
+        with self.conn:
+            if self._touched:
+                self.conn.executemany("UPDATE files SET scan_id = ? WHERE path = ?", self._touched)
+            if self._stored:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, row, scan_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", self._stored
+                )
+            if self._hashes:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, content, phash) "
+                    "VALUES (?, ?, ?, ?, ?)", self._hashes
+                )
+        self._touched.clear()
+        self._stored.clear()
+        self._hashes.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
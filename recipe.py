@@ -0,0 +1,182 @@
+"""
+Рецепты — цепочки операций ImageProcessorApp (lab3.py).
+
+Рецепт — упорядоченный список шагов, каждый шаг — параметры одной
+операции image_ops (поэлементная или морфологическая) или объединение
+с результатом более раннего шага:
+
+    {"mode": "recipe", "steps": [
+        {"mode": "morph", "morph_type": "Erosion", "kernel_shape": "Rect", "kernel_size": 5},
+        {"mode": "morph", "morph_type": "Dilation", "kernel_shape": "Rect", "kernel_size": 5},
+        {"mode": "combine", "op": "difference", "with": 0}
+    ]}
+
+Это top-hat: исходное изображение минус его открытие. "with" — номер
+этапа: 0 — исходное изображение, i — результат i-го шага (с единицы);
+"op" — difference (|a - b|), min или max. Соседние поэлементные шаги
+сливаются в одну таблицу (LUT) и применяются за один проход.
+
+RecipeRunner хранит результаты этапов последнего запуска: при изменении
+шага N пересчитываются только этапы с N-го. Везде, где принимаются
+параметры одной операции (batch_cli, tiled_engine, окно), принимается
+и рецепт — через process(), halo() и load_recipe().
+"""
+import json
+
+import cv2
+import numpy as np
+
+import image_ops
+
+MODE_RECIPE = "recipe"
+MODE_COMBINE = "combine"
+COMBINE_OPS = {"difference": cv2.absdiff, "min": cv2.min, "max": cv2.max}
+
+
+def _normalize_step(step, index):
+    if step.get("mode") != MODE_COMBINE:
+        return image_ops.normalize_params(step)
+    if step.get("op") not in COMBINE_OPS:
+        raise ValueError(f"Неизвестное объединение: {step.get('op')}")
+    source = int(step.get("with", 0))
+    if not 0 <= source < index:
+        raise ValueError(f"Шаг {index} может ссылаться только на этапы 0..{index - 1}, а не на {source}")
+    return {"mode": MODE_COMBINE, "op": step["op"], "with": source}
+
+
+def normalize(params):
+    """
+    Проверяет рецепт или параметры одной операции и приводит их к
+    каноническому виду (см. image_ops.normalize_params).
+    """
+    if params.get("mode") != MODE_RECIPE:
+        return image_ops.normalize_params(params)
+    steps = params.get("steps")
+    if not isinstance(steps, list):
+        raise ValueError("В рецепте должен быть список шагов steps")
+    return {"mode": MODE_RECIPE, "steps": [_normalize_step(step, i) for i, step in enumerate(steps, 1)]}
+
+
+def steps_of(params):
+    """Шаги рецепта; одиночная операция — рецепт из одного шага."""
+    return params["steps"] if params.get("mode") == MODE_RECIPE else [params]
+
+
+def load_recipe(path):
+    """Читает рецепт (JSON). Пресет одной операции и просто список шагов тоже принимаются."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"mode": MODE_RECIPE, "steps": data}
+    if not isinstance(data, dict):
+        raise ValueError(f"Рецепт должен быть JSON-объектом или списком шагов: {path}")
+    return normalize(data)
+
+
+def save_recipe(path, params):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(normalize(params), f, ensure_ascii=False, indent=2)
+
+
+def halo(params):
+    """
+    Ширина поля для плиточной обработки (tiled_engine): сумма радиусов
+    ядер морфологии — настолько далеко результат зависит от исходника.
+    """
+    return sum(
+        image_ops.kernel_size(step["kernel_size"]) // 2
+        for step in steps_of(params) if step["mode"] == image_ops.MODE_MORPH
+    )
+
+
+def _point_lut(step):
+    return image_ops.point_lut(float(step["contrast"]), float(step["brightness"]), bool(step["invert"]))
+
+
+def compile_steps(steps, fuse=True):
+    """
+    План выполнения: список этапов (вид, шаги этапа, номер последнего шага).
+    Подряд идущие поэлементные шаги объединяются в один этап "lut", если
+    fuse и на промежуточный результат не ссылается объединение.
+    """
+    referenced = {step["with"] for step in steps if step["mode"] == MODE_COMBINE}
+    stages = []
+    for index, step in enumerate(steps, 1):
+        if step["mode"] == image_ops.MODE_POINT and fuse:
+            if stages and stages[-1][0] == "lut" and index - 1 not in referenced:
+                stages[-1] = ("lut", stages[-1][1] + [step], index)
+            else:
+                stages.append(("lut", [step], index))
+        else:
+            stages.append((step["mode"], [step], index))
+    return stages
+
+
+def _run_stage(kind, steps, img, outputs, scale):
+    if kind == "lut":
+        if len(steps) == 1:
+            step = steps[0]  # одна операция: image_ops сам выберет самый быстрый способ
+            return image_ops.apply_point(img, step["contrast"], step["brightness"], step["invert"])
+        return cv2.LUT(img, image_ops.compose_luts(*(_point_lut(step) for step in steps)))
+    step = steps[0]
+    if kind == MODE_COMBINE:
+        return COMBINE_OPS[step["op"]](img, outputs[step["with"]])
+    return image_ops.process_image(img, step, scale)
+
+
+def derive_histograms(src, src_hists, params):
+    """
+    Гистограммы результата рецепта только из поэлементных шагов —
+    через общую таблицу, без прохода по пикселям; иначе None.
+    """
+    steps = steps_of(params)
+    if src_hists is None or src.dtype != np.uint8 or not steps:
+        return None
+    if any(step["mode"] != image_ops.MODE_POINT for step in steps):
+        return None
+    return image_ops.map_histograms(src_hists, image_ops.compose_luts(*(_point_lut(step) for step in steps)))
+
+
+class RecipeRunner:
+    """
+    Выполнение рецептов с кэшем этапов. Ключ этапа — source_key, масштаб
+    и все шаги до последнего шага этапа включительно, поэтому изменение
+    шага N делает недействительными только этапы с N-го. Не
+    потокобезопасен: используется одним фоновым исполнителем.
+    """
+
+    def __init__(self):
+        self._stages = []  # [(ключ, результат)] последнего запуска
+        self.computed = 0
+        self.reused = 0
+
+    def run(self, src, params, source_key=None, scale=1.0):
+        """
+        Результат рецепта для src. source_key однозначно определяет
+        исходное изображение; None отключает повторное использование.
+        """
+        steps = steps_of(params)
+        stages = compile_steps(steps, fuse=src.dtype == np.uint8)
+        outputs = {0: src}
+        img = src
+        prefix = (source_key, scale)
+        done = []
+        for n, (kind, stage_steps, last) in enumerate(stages):
+            key = prefix + tuple(json.dumps(step, sort_keys=True) for step in steps[:last])
+            if source_key is not None and n < len(self._stages) and self._stages[n][0] == key:
+                img = self._stages[n][1]
+                self.reused += 1
+            else:
+                img = _run_stage(kind, stage_steps, img, outputs, scale)
+                self.computed += 1
+            outputs[last] = img
+            done.append((key, img))
+        self._stages = done if source_key is not None else []
+        return img if img is not src else src.copy()
+
+
+def process(img, params, scale=1.0):
+    """Как image_ops.process_image, но принимает и рецепты (без кэша этапов)."""
+    if params.get("mode") != MODE_RECIPE:
+        return image_ops.process_image(img, params, scale)
+    return RecipeRunner().run(img, params, scale=scale)
@@ -0,0 +1,294 @@
+"""
+Таблица результатов сканирования для ImageMetadataApp (lab2.py).
+
+RowStore хранит строки по колонкам: повторяющиеся значения (размер, DPI,
+глубина, сжатие) кодируются словарем и занимают 4 байта на строку в
+array('I'), уникальные (имя файла) хранятся простым списком. Сортировка
+и фильтрация выполняются над хранилищем и дают порядок строк (view);
+сами строки не копируются.
+
+VirtualTable показывает хранилище через ttk.Treeview, в котором
+существуют только элементы видимого окна: при прокрутке меняются значения
+этих элементов, поэтому память и время отрисовки не зависят от числа строк.
+"""
+import re
+from array import array
+from tkinter import ttk
+
+import numpy as np
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(value):
+    """Ключ «естественной» сортировки: '640 x 480' < '1024 x 768'."""
+    parts = _DIGITS.split(str(value))
+    return [int(part) if i % 2 else part.casefold() for i, part in enumerate(parts)]
+
+
+def text_key(value):
+    return str(value).casefold()
+
+
+class _Column:
+    """
+    Колонка хранилища. При encoded=True значения кодируются словарем
+    (values — различные значения, codes — их номера по строкам), иначе
+    values — сами значения по строкам.
+    """
+
+    def __init__(self, encoded, key):
+        self.encoded = encoded
+        self.key = key
+        self.values = []
+        self.codes = array("I") if encoded else None
+        self._lookup = {} if encoded else None
+        self._folded = []  # значения в нижнем регистре для фильтра, строятся лениво
+
+    def append(self, value):
+        if not self.encoded:
+            self.values.append(value)
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def get(self, row):
+        return self.values[self.codes[row]] if self.encoded else self.values[row]
+
+    def row_codes(self):
+        """Номера значений по строкам (для некодированной колонки — номера строк)."""
+        if self.encoded:
+            return np.frombuffer(self.codes, dtype=np.uint32)
+        return np.arange(len(self.values), dtype=np.uint32)
+
+    def ranks(self):
+        """Ранг каждого различного значения в порядке сортировки."""
+        order = sorted(range(len(self.values)), key=lambda i: self.key(self.values[i]))
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        return ranks
+
+    def matches(self, needle):
+        """Булев массив по различным значениям: содержит ли значение подстроку."""
+        self._folded.extend(str(v).casefold() for v in self.values[len(self._folded):])
+        return np.fromiter((needle in v for v in self._folded), dtype=bool, count=len(self._folded))
+
+    def clear(self):
+        self.__init__(self.encoded, self.key)
+
+
+class RowStore:
+    """
+    Колоночное хранилище строк с сортировкой и фильтрацией.
+
+    columns: имена колонок;
+    unique:  колонки с почти уникальными значениями (не кодируются словарем);
+    keys:    словарь {колонка: функция ключа сортировки}, по умолчанию natural_key.
+    """
+
+    def __init__(self, columns, unique=(), keys=None):
+        keys = keys or {}
+        self.columns = tuple(columns)
+        self._columns = [_Column(name not in unique, keys.get(name, natural_key)) for name in self.columns]
+        self.count = 0
+        self.sort_column = None
+        self.descending = False
+        self.filter_text = ""
+        self.stale = False  # порядок устарел: строки добавлены при активной сортировке
+        self._view = None  # None — все строки в порядке добавления
+
+    def __len__(self):
+        """Число строк в текущем представлении."""
+        return self.count if self._view is None else len(self._view)
+
+    def append(self, row):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        index = self.count
+        self.count += 1
+        if self._view is not None and self._passes_filter(index):
+            self._view.append(index)
+            self.stale = self.stale or self.sort_column is not None
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def clear(self):
+        for column in self._columns:
+            column.clear()
+        self.count = 0
+        self.stale = False
+        self._view = None if self.sort_column is None and not self.filter_text else array("I")
+
+    def row(self, index):
+        """Строка хранилища по ее номеру."""
+        return tuple(column.get(index) for column in self._columns)
+
+    def row_at(self, position):
+        """Строка по позиции в текущем представлении."""
+        return self.row(position if self._view is None else self._view[position])
+
+    def rows(self, start, stop):
+        return [self.row_at(position) for position in range(start, min(stop, len(self)))]
+
+    def sort(self, column, descending=False):
+        """Сортирует представление по колонке (None — порядок добавления)."""
+        self.sort_column = column
+        self.descending = descending
+        self.refresh()
+
+    def set_filter(self, text):
+        """Оставляет в представлении строки, где хотя бы одна колонка содержит text."""
+        self.filter_text = text.strip().casefold()
+        self.refresh()
+
+    def refresh(self):
+        """Заново строит представление по текущим сортировке и фильтру."""
+        self.stale = False
+        if self.sort_column is None and not self.filter_text:
+            self._view = None
+            return
+        if self.filter_text:
+            selected = np.zeros(self.count, dtype=bool)
+            for column in self._columns:
+                selected |= column.matches(self.filter_text)[column.row_codes()]
+            indices = np.flatnonzero(selected)
+        else:
+            indices = np.arange(self.count)
+
+        if self.sort_column is not None:
+            column = self._columns[self.columns.index(self.sort_column)]
+            ranks = column.ranks()[column.row_codes()[indices]]
+            if self.descending:
+                ranks = -ranks
+            indices = indices[np.argsort(ranks, kind="stable")]
+
+        self._view = array("I")
+        self._view.frombytes(indices.astype(np.uint32).tobytes())
+
+    def _passes_filter(self, index):
+        if not self.filter_text:
+            return True
+        return any(self.filter_text in str(column.get(index)).casefold() for column in self._columns)
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Таблица над RowStore. В Treeview создается столько элементов, сколько
+    строк помещается в окно; вертикальная полоса прокрутки управляет
+    позицией окна в хранилище, а не самим Treeview.
+
+    headings: список (колонка, заголовок, ширина, stretch, anchor).
+    """
+
+    def __init__(self, master, store, headings, **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.top = 0
+        self._slots = []  # элементы Treeview и показанные в них строки
+        self._headings = {name: text for name, text, *_ in headings}
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, columns=store.columns, show="headings", selectmode="extended")
+        for name, text, width, stretch, anchor in headings:
+            self.tree.heading(name, text=text, anchor=anchor, command=lambda c=name: self.sort_by(c))
+            self.tree.column(name, width=width, stretch=stretch, anchor=anchor)
+
+        self.v_scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        h_scroll = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=h_scroll.set)
+
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        h_scroll.grid(row=1, column=0, sticky="ew")
+
+        self.tree.bind("<Configure>", lambda e: self.refresh())
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.page_size()))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.page_size()))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.store)))
+
+    def _row_height(self):
+        height = ttk.Style(self).lookup("Treeview", "rowheight")
+        try:
+            return max(1, int(height))
+        except (TypeError, ValueError):
+            return 20
+
+    def page_size(self):
+        """Сколько строк помещается в видимую область Treeview."""
+        header = self._row_height()
+        if self._slots:
+            bbox = self.tree.bbox(self._slots[0][0])
+            if bbox:
+                header = bbox[1]
+        return max(1, (self.tree.winfo_height() - header) // self._row_height())
+
+    def scroll(self, delta):
+        self.scroll_to(self.top + delta)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.store) - self.page_size()))
+        if top != self.top:
+            self.top = top
+            self.tree.selection_remove(*self.tree.selection())
+            self.refresh()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.store)))
+        elif unit == "pages":
+            self.scroll(int(amount) * self.page_size())
+        else:
+            self.scroll(int(amount))
+
+    def refresh(self):
+        """Показывает строки видимого окна; неизменившиеся элементы не трогаются."""
+        total = len(self.store)
+        page = self.page_size()
+        self.top = max(0, min(self.top, total - page))
+        rows = self.store.rows(self.top, self.top + page)
+
+        while len(self._slots) < len(rows):
+            self._slots.append([self.tree.insert("", "end"), None])
+        while len(self._slots) > len(rows):
+            self.tree.delete(self._slots.pop()[0])
+
+        for slot, row in zip(self._slots, rows):
+            if slot[1] != row:
+                self.tree.item(slot[0], values=row)
+                slot[1] = row
+
+        if total:
+            self.v_scroll.set(self.top / total, min(1.0, (self.top + page) / total))
+        else:
+            self.v_scroll.set(0.0, 1.0)
+
+    def sort_by(self, column):
+        """Сортирует по колонке; повторный щелчок меняет направление."""
+        descending = self.store.sort_column == column and not self.store.descending
+        self.store.sort(column, descending)
+        for name, text in self._headings.items():
+            arrow = (" ▼" if descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=text + arrow)
+        self.top = 0
+        self.refresh()
+
+    def set_filter(self, text):
+        self.store.set_filter(text)
+        self.top = 0
+        self.refresh()
+
+    def clear(self):
+        self.store.clear()
+        self.top = 0
+        self.refresh()
@@ -0,0 +1,267 @@
+"""
+Сканирование метаданных без графического интерфейса (для серверов без дисплея).
+
+Использует тот же конвейер, что и ImageMetadataApp (scan_engine.scan_folder,
+индекс metadata_index), и пишет строки по мере получения — в JSON Lines,
+CSV или Parquet. В памяти держится только пакет строк Parquet. Скорость
+(файлов/с, МБ/с) периодически выводится в stderr.
+
+Примеры:
+    python scan_cli.py /data/photos -o photos.jsonl --workers 8
+    python scan_cli.py /data/photos -o photos.csv --include "2023/*" --exclude "*/thumbs/*"
+    python scan_cli.py /data/photos -o photos.jsonl --resume   # продолжить прерванный скан
+    python scan_cli.py /data/photos -o photos.jsonl --hash perceptual   # + отчет о дубликатах
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+import image_metadata
+from file_selection import EXECUTORS, make_path_filter
+from image_hashes import HASH_MODES, DuplicateGroups
+from metadata_index import DEFAULT_INDEX_PATH, MetadataIndex
+from scan_engine import ExtractionEngine, scan_folder
+from scan_profile import ScanProfile
+
+FORMATS = ("jsonl", "csv", "parquet")
+FIELDS = ("path",) + image_metadata.COLUMNS
+HASH_FIELDS = ("content_hash", "phash")
+PARQUET_ROW_GROUP = 10_000
+REPORT_INTERVAL_S = 2.0
+
+
+class JsonlWriter:
+    def __init__(self, stream, fields=FIELDS):
+        self.stream = stream
+        self.fields = fields
+
+    def write(self, path, row):
+        record = dict(zip(self.fields, (path, *row)))
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class CsvWriter:
+    def __init__(self, stream, fields=FIELDS, header=True):
+        self.stream = stream
+        self.writer = csv.writer(stream)
+        if header:
+            self.writer.writerow(fields)
+
+    def write(self, path, row):
+        self.writer.writerow((path, *row))
+
+    def close(self):
+        self.stream.flush()
+
+
+class ParquetWriter:
+    """Пишет строки группами по PARQUET_ROW_GROUP; все колонки — строки."""
+
+    def __init__(self, path, fields=FIELDS):
+        import pyarrow as pa  # pyarrow нужен только для Parquet
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self.fields = fields
+        self.schema = pa.schema([(name, pa.string()) for name in fields])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.buffer = {name: [] for name in fields}
+
+    def write(self, path, row):
+        for name, value in zip(self.fields, (path, *row)):
+            self.buffer[name].append(None if value is None else str(value))
+        if len(self.buffer["path"]) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer["path"]:
+            self.writer.write_table(self._pa.table(self.buffer, schema=self.schema))
+            self.buffer = {name: [] for name in self.fields}
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def _drop_partial_line(path):
+    """Обрезает незавершенную последнюю строку, оставшуюся после прерывания записи."""
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        position = size
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            chunk = f.read(position - start)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def completed_paths(output, fmt):
+    """Пути, уже записанные в выходной файл прерванного сканирования."""
+    if not os.path.exists(output):
+        return set()
+    _drop_partial_line(output)
+    done = set()
+    with open(output, encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    done.add(json.loads(line)["path"])
+        else:
+            for record in csv.DictReader(f):
+                done.add(record["path"])
+    return done
+
+
+class Throughput:
+    """Счетчики скорости; отчет в stderr не чаще, чем раз в interval секунд."""
+
+    def __init__(self, stream=sys.stderr, interval=REPORT_INTERVAL_S):
+        self.stream = stream
+        self.interval = interval
+        self.total = None
+        self.files = 0
+        self.bytes = 0
+        self.start = self._last_report = time.perf_counter()
+
+    def add(self, path):
+        self.files += 1
+        try:
+            self.bytes += os.path.getsize(path)
+        except OSError:
+            pass
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, final=False):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        done = f"{self.files}" if self.total is None else f"{self.files}/{self.total}"
+        print(
+            f"{'Итого' if final else 'Обработано'}: {done} файлов за {elapsed:.1f} с — "
+            f"{self.files / elapsed:.1f} файлов/с, {self.bytes / elapsed / 1e6:.2f} МБ/с",
+            file=self.stream, flush=True
+        )
+
+
+def _open_writer(output, fmt, resume, fields):
+    if fmt == "parquet":
+        return ParquetWriter(output, fields)
+    if output is None:
+        stream = sys.stdout
+    else:
+        append = resume and os.path.exists(output) and os.path.getsize(output) > 0
+        stream = open(output, "a" if append else "w", encoding="utf-8", newline="")
+        if fmt == "csv":
+            return CsvWriter(stream, fields, header=not append)
+        return JsonlWriter(stream, fields)
+    return CsvWriter(stream, fields) if fmt == "csv" else JsonlWriter(stream, fields)
+
+
+def run(args):
+    folder = os.path.abspath(args.folder)
+    skip = completed_paths(args.output, args.format) if args.resume else set()
+    if skip:
+        print(f"Продолжение: пропускается {len(skip)} уже записанных файлов", file=sys.stderr)
+
+    path_filter = make_path_filter(folder, args.include, args.exclude, skip)
+    engine = ExtractionEngine(
+        workers=args.workers, executor=args.executor, batch_size=args.batch_size, hashing=args.hash
+    )
+    cancel_event = threading.Event()
+    fields = FIELDS + HASH_FIELDS if args.hash else FIELDS
+    writer = _open_writer(args.output, args.format, args.resume, fields)
+    duplicates = DuplicateGroups() if args.hash else None
+    profile = ScanProfile() if args.profile else None
+    hashes = {}
+    stats = Throughput()
+    index = None if args.no_index else MetadataIndex(args.index)
+    try:
+        for event in scan_folder(folder, engine, index, cancel_event, path_filter=path_filter, profile=profile):
+            if event[0] == "total":
+                _, stats.total, exact = event
+                if exact:
+                    print(f"Найдено файлов: {stats.total}", file=sys.stderr, flush=True)
+                continue
+            if event[0] == "hash":
+                _, path, content, phash = event
+                hashes[path] = (content, phash)
+                duplicates.add(path, content, phash)
+                continue
+            _, path, row = event
+            if duplicates is not None:
+                row = (*row, *hashes.pop(path, (None, None)))
+            writer.write(path, row)
+            stats.add(path)
+    except KeyboardInterrupt:
+        cancel_event.set()
+        print("Прервано; запустите с --resume, чтобы продолжить.", file=sys.stderr)
+        return 130
+    finally:
+        writer.close()
+        if index is not None:
+            index.close()
+        stats.report(final=True)
+        if profile is not None:
+            profile.finish()
+            profile.save_json(args.profile)
+            print(profile.summary(), file=sys.stderr)
+    if duplicates is not None:
+        print(duplicates.summary(), file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Извлечение метаданных изображений без GUI")
+    parser.add_argument("folder", help="папка для рекурсивного сканирования")
+    parser.add_argument("-o", "--output", help="выходной файл (по умолчанию stdout)")
+    parser.add_argument("-f", "--format", help="jsonl, csv или parquet (по умолчанию по расширению файла)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="число рабочих (по умолчанию — число ядер)")
+    parser.add_argument("--executor", choices=EXECUTORS, default="process", help="тип пула обработки")
+    parser.add_argument("--batch-size", type=int, default=16, help="файлов в одной задаче рабочего")
+    parser.add_argument("--include", action="append", default=[], help="glob относительного пути (можно повторять)")
+    parser.add_argument("--exclude", action="append", default=[], help="glob для исключения (можно повторять)")
+    parser.add_argument("--hash", choices=HASH_MODES, help="добавить хэши и отчет о дубликатах")
+    parser.add_argument("--profile", metavar="JSON", help="замерить этапы сканирования и сохранить профиль")
+    parser.add_argument("--resume", action="store_true", help="дописать в выходной файл, пропустив записанные пути")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="путь к индексу метаданных")
+    parser.add_argument("--no-index", action="store_true", help="не использовать индекс")
+    args = parser.parse_args(argv)
+
+    if args.format is None:
+        ext = os.path.splitext(args.output or "")[1].lower().lstrip(".")
+        args.format = {"json": "jsonl", "ndjson": "jsonl"}.get(ext, ext) if ext else "jsonl"
+    if args.format not in FORMATS:
+        parser.error(f"неизвестный формат: {args.format}")
+    if not os.path.isdir(args.folder):
+        parser.error(f"папка не найдена: {args.folder}")
+    if args.format == "parquet" and (args.output is None or args.resume):
+        parser.error("Parquet пишется только в файл и не поддерживает --resume")
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("для Parquet нужен пакет pyarrow")
+    if args.resume and args.output is None:
+        parser.error("--resume требует --output")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Параллельное извлечение метаданных для ImageMetadataApp (lab2.py).
+
+ExtractionEngine раздает пути файлов пулу процессов (разбор заголовков
+упирается в CPU и GIL) или пулу потоков (для сетевых/медленных хранилищ),
+держит в работе ограниченное число пакетов и отдает результаты по мере
+готовности — в исходном порядке или в порядке завершения.
+
+scan_folder связывает параллельный обход папки (dir_walker), индекс
+(metadata_index) и пул в один потоковый конвейер, общий для окна и
+режимов без графического интерфейса.
+"""
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import image_hashes
+import image_metadata
+import scan_profile
+from dir_walker import DEFAULT_WORKERS, DirectoryWalker
+from file_selection import EXECUTORS
+
+# Результаты по хэшу содержимого, уже полученные этим рабочим: копии
+# файла не декодируются повторно. Словарь ограничен MEMO_LIMIT записями.
+_decoded = {}
+MEMO_LIMIT = 4096
+
+
+def _extract_one(path, hashing, profiling=False):
+    """
+    Результат рабочего для файла: (path, row, hashes, profile), где hashes —
+    (content_hash, phash) или None, если хэши не запрошены, а profile —
+    scan_profile.FileProfile или None без профилирования.
+    """
+    profile = scan_profile.FileProfile() if profiling else None
+    if hashing is None:
+        return path, image_metadata.safe_extract_metadata(path, profile), None, profile
+    try:
+        with scan_profile.stage(profile, "hash"):
+            content = image_hashes.content_hash(path)
+    except OSError:
+        return path, image_metadata.safe_extract_metadata(path, profile), None, profile
+
+    known = _decoded.get(content)
+    if known is not None and (hashing == "content" or known[1] is not None):
+        row, phash = known[:2]
+        if profile is not None:
+            profile.format, profile.size = known[2], os.path.getsize(path)
+        return path, (os.path.basename(path), *row[1:]), (content, phash), profile
+
+    row = image_metadata.safe_extract_metadata(path, profile)
+    phash = None
+    if hashing == "perceptual":
+        with scan_profile.stage(profile, "phash"):
+            phash = image_hashes.perceptual_hash(path)
+    if image_metadata.is_error_row(row):
+        return path, row, (content, phash), profile
+    if len(_decoded) >= MEMO_LIMIT:
+        _decoded.clear()
+    _decoded[content] = (row, phash, profile.format if profile is not None else None)
+    return path, row, (content, phash), profile
+
+
+def _extract_batch(paths, hashing=None, profiling=False):
+    """Задача рабочего: извлекает метаданные (и при необходимости хэши) пакета файлов."""
+    return [_extract_one(path, hashing, profiling) for path in paths]
+
+
+class ExtractionEngine:
+    """
+    Пул извлечения метаданных.
+
+    workers:      число процессов/потоков (по умолчанию os.cpu_count());
+    executor:     'process' или 'thread';
+    batch_size:   сколько файлов передается рабочему за одну задачу —
+                  амортизирует накладные расходы межпроцессного обмена;
+    max_in_flight: максимум пакетов в работе одновременно (по умолчанию 4 на
+                  рабочего), чтобы не держать в памяти весь список задач;
+    ordered:      отдавать результаты в порядке входных путей;
+    hashing:      None, 'content' (хэш содержимого) или 'perceptual'
+                  (хэш содержимого и dHash), см. image_hashes.
+    """
+
+    def __init__(self, workers=None, executor="process", batch_size=16, max_in_flight=None, ordered=False,
+                 hashing=None):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Неизвестный тип пула: {executor}")
+        if hashing is not None and hashing not in image_hashes.HASH_MODES:
+            raise ValueError(f"Неизвестный режим хэширования: {hashing}")
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.executor = executor
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max_in_flight or self.workers * 4
+        self.ordered = ordered
+        self.hashing = hashing
+
+    def _make_executor(self):
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="metadata")
+
+    def run(self, paths, cancel_event=None):
+        """
+        Генератор пар (path, row) для итерируемого набора путей.
+        Ошибки отдельных файлов возвращаются строками-ошибками. Если
+        cancel_event установлен, ожидающие задачи отменяются и генератор
+        завершается.
+        """
+        for event in self.process((("extract", path) for path in paths), cancel_event):
+            if event[0] == "data":
+                yield event[1], event[2]
+
+    def process(self, events, cancel_event=None, profiling=False):
+        """
+        Потоковый вариант run для конвейера сканирования. Источник событий
+        читается лениво:
+            ("extract", path) — файл ставится в очередь на извлечение, а
+                                позже отдается событие ("data", path, row)
+                                (при hashing ему предшествует
+                                ("hash", path, content_hash, phash));
+            ("idle",)         — источник ждет данных: неполный пакет
+                                отправляется рабочим, не дожидаясь заполнения;
+        остальные события пропускаются дальше без изменений. Готовые
+        результаты отдаются между чтениями источника, без ожидания его конца.
+        При profiling=True перед строкой файла отдается
+        ("profile", path, FileProfile) с замерами этапов рабочего.
+        """
+        pool = self._make_executor()
+        pending = deque()
+        batch = []
+        try:
+            for event in events:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                if event[0] == "extract":
+                    batch.append(event[1])
+                elif event[0] != "idle":
+                    yield event
+                if batch and (len(batch) >= self.batch_size or event[0] == "idle"):
+                    pending.append(pool.submit(_extract_batch, batch, self.hashing, profiling))
+                    batch = []
+                yield from self._collect(pending, block=len(pending) >= self.max_in_flight)
+
+            if batch:
+                pending.append(pool.submit(_extract_batch, batch, self.hashing, profiling))
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield from self._collect(pending, block=True)
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _collect(self, pending, block):
+        """Отдает результаты готовых пакетов; при block=True ждет хотя бы один."""
+        if self.ordered:
+            while pending and (block or pending[0].done()):
+                block = False
+                yield from self._events(pending.popleft().result())
+            return
+        if block:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        else:
+            done = [future for future in pending if future.done()]
+        for future in done:
+            pending.remove(future)
+            yield from self._events(future.result())
+
+    @staticmethod
+    def _events(results):
+        for path, row, hashes, profile in results:
+            if profile is not None:
+                yield ("profile", path, profile)
+            if hashes is not None:
+                yield ("hash", path, *hashes)
+            yield ("data", path, row)
+
+
+def scan_folder(folder_path, engine, index=None, cancel_event=None,
+                extensions=image_metadata.SUPPORTED_EXTENSIONS, path_filter=None,
+                walker_workers=DEFAULT_WORKERS, follow_symlinks=False, profile=None):
+    """
+    Потоковый конвейер сканирования папки. Генерирует события:
+        ("total", n, exact)   — оценка числа файлов; уточняется по ходу обхода,
+                                exact=True — окончательное значение;
+        ("hash", path, content_hash, phash)
+                              — хэши файла (если engine.hashing задан),
+                                перед его строкой;
+        ("data", path, row)   — строка таблицы для файла.
+    Обход (dir_walker), проверка индекса и извлечение идут одновременно:
+    первые строки появляются, пока дерево еще читается. Файлы, не
+    изменившиеся с прошлого сканирования, отдаются из индекса без открытия;
+    остальные проходят через пул извлечения и сохраняются в индекс вместе
+    с хэшами. После полного (не отмененного и не отфильтрованного) прохода
+    из индекса удаляются записи исчезнувших файлов.
+
+    profile — необязательный scan_profile.ScanProfile: в него собираются
+    замеры обхода, индекса и этапов рабочих.
+    """
+    walker = DirectoryWalker(folder_path, extensions, path_filter, walker_workers, follow_symlinks)
+    changed = {}
+
+    def source():
+        for event in walker.walk(cancel_event, profile):
+            if event[0] != "file":
+                yield event
+                continue
+            path = event[1]
+            row = hashes = None
+            with scan_profile.stage(profile, "index"):
+                try:
+                    stat_result = os.stat(path)
+                except OSError as e:
+                    row = image_metadata.error_row(path, e)
+                if row is None and index is not None:
+                    row = index.lookup(path, stat_result)
+                    if row is not None and image_metadata.is_error_row(row):
+                        row = None  # Запись из старого индекса: ошибка могла быть временной
+                    if row is not None and engine.hashing is not None:
+                        hashes = index.lookup_hashes(path, stat_result, engine.hashing == "perceptual")
+                        if hashes is None:
+                            row = None  # Хэшей еще нет — файл проходит через пул целиком
+            if row is None:
+                changed[path] = stat_result
+                yield ("extract", path)
+                continue
+            if hashes is not None:
+                yield ("hash", path, *hashes)
+            yield ("data", path, row)
+
+    for event in engine.process(source(), cancel_event, profiling=profile is not None):
+        if event[0] == "profile":
+            profile.add_file(event[1], event[2])
+            continue
+        stat_result = changed.get(event[1]) if event[0] in ("hash", "data") else None
+        if index is not None and stat_result is not None:
+            if event[0] == "hash":
+                index.store_hashes(event[1], stat_result, event[2], event[3])
+            elif not image_metadata.is_error_row(event[2]):
+                # Строки-ошибки не сохраняются: в следующий раз файл читается заново
+                index.store(event[1], stat_result, event[2])
+        if event[0] == "data":
+            changed.pop(event[1], None)
+        yield event
+
+    # При отборе файлов часть папки не просматривалась — ее записи не трогаем
+    if index is not None and path_filter is None and not (cancel_event is not None and cancel_event.is_set()):
+        index.remove_missing(folder_path)
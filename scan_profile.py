@@ -0,0 +1,182 @@
+"""
+Профилирование конвейера сканирования метаданных (lab2.py, scan_cli.py).
+
+Этапы:
+    walk   — чтение каталога (os.scandir, dir_walker);
+    index  — stat и поиск в индексе метаданных;
+    open   — открытие файла и чтение первых байт;
+    header — разбор заголовка (image_headers или Image.open);
+    exif   — разбор EXIF;
+    fields — вычисление колонок таблицы;
+    hash, phash — хэш содержимого и перцептивный хэш.
+
+Рабочие процессы замеряют этапы каждого файла в FileProfile и возвращают
+его вместе с результатом; ScanProfile собирает гистограммы времен,
+разбивку по форматам и самые медленные файлы. Без профилирования
+stage() возвращает общий пустой контекст, и замеров не происходит.
+"""
+import contextlib
+import heapq
+import json
+import math
+import time
+
+STAGES = ("walk", "index", "open", "header", "exif", "fields", "hash", "phash")
+# Гистограмма по степеням двойки микросекунд: [1 мкс, 2 мкс), [2, 4), ...
+HISTOGRAM_BUCKETS = 24
+SLOWEST_FILES = 20
+
+_NO_PROFILE = contextlib.nullcontext()
+
+
+class _Timer:
+    __slots__ = ("target", "name", "start")
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.target.add_stage(self.name, time.perf_counter() - self.start)
+
+
+def stage(profile, name):
+    """Контекст замера этапа; при profile=None ничего не делает."""
+    return _NO_PROFILE if profile is None else _Timer(profile, name)
+
+
+class FileProfile:
+    """Замеры одного файла в рабочем процессе (сериализуется через pickle)."""
+
+    __slots__ = ("stages", "format", "size")
+
+    def __init__(self):
+        self.stages = {}
+        self.format = None
+        self.size = 0
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+
+class StageStats:
+    """Счетчик времени этапа с логарифмической гистограммой."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        microseconds = seconds * 1e6
+        bucket = int(math.log2(microseconds)) if microseconds >= 1 else 0
+        self.buckets[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(1000 * self.total / self.count, 4) if self.count else 0.0,
+            "max_ms": round(1000 * self.max, 4),
+            "histogram_us": {f"<{2 ** (i + 1)}": n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class ScanProfile:
+    """Сводка профилирования одного сканирования."""
+
+    def __init__(self, slowest=SLOWEST_FILES):
+        self.stages = {}
+        self.formats = {}
+        self.files = 0
+        self.bytes = 0
+        self.slowest_limit = slowest
+        self._slowest = []  # min-куча (время, путь)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add_stage(self, name, seconds):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.add(seconds)
+
+    def add_file(self, path, file_profile):
+        """Учитывает замеры файла, обработанного рабочим."""
+        for name, seconds in file_profile.stages.items():
+            self.add_stage(name, seconds)
+        total = file_profile.total
+        self.files += 1
+        self.bytes += file_profile.size
+
+        fmt = self.formats.setdefault(file_profile.format or "?", {"files": 0, "bytes": 0, "total_s": 0.0})
+        fmt["files"] += 1
+        fmt["bytes"] += file_profile.size
+        fmt["total_s"] += total
+
+        item = (total, path)
+        if len(self._slowest) < self.slowest_limit:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return max((self.finished or time.perf_counter()) - self.started, 1e-9)
+
+    def slowest(self):
+        return sorted(self._slowest, reverse=True)
+
+    def to_dict(self):
+        ordered = [name for name in STAGES if name in self.stages]
+        ordered += sorted(set(self.stages) - set(STAGES))
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "files": self.files,
+            "bytes": self.bytes,
+            "files_per_s": round(self.files / self.elapsed, 2),
+            "mb_per_s": round(self.bytes / self.elapsed / 1e6, 3),
+            "stages": {name: self.stages[name].to_dict() for name in ordered},
+            "formats": {
+                name: {**fmt, "total_s": round(fmt["total_s"], 6)} for name, fmt in sorted(self.formats.items())
+            },
+            "slowest": [{"path": path, "total_ms": round(1000 * total, 3)} for total, path in self.slowest()],
+        }
+
+    def save_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def summary(self, slowest=5):
+        """Текстовая сводка для панели окна и stderr."""
+        data = self.to_dict()
+        lines = [
+            f"Файлов: {data['files']} за {data['elapsed_s']:.1f} с — "
+            f"{data['files_per_s']:.1f} файлов/с, {data['mb_per_s']:.2f} МБ/с (извлеченные файлы)"
+        ]
+        for name, stats in data["stages"].items():
+            lines.append(
+                f"{name:>7}: {stats['count']:>8} × {stats['mean_ms']:8.3f} мс, "
+                f"макс. {stats['max_ms']:9.3f} мс, всего {stats['total_s']:8.3f} с"
+            )
+        for name, fmt in data["formats"].items():
+            lines.append(f"{name:>7}: {fmt['files']} файлов, {fmt['bytes'] / 1e6:.1f} МБ, {fmt['total_s']:.3f} с")
+        for item in data["slowest"][:slowest]:
+            lines.append(f"  медленный: {item['total_ms']:.1f} мс — {item['path']}")
+        return "\n".join(lines)
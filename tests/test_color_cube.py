@@ -0,0 +1,30 @@
+"""Куб color_cube совпадает с формулами color_engine в пределах точности float16."""
+import numpy as np
+import pytest
+
+import color_cube
+import color_engine
+
+
+@pytest.mark.parametrize("target", sorted(color_cube.TARGETS))
+def test_cube_matches_engine(tmp_path, target):
+    cube = color_cube.ConversionCube(target, cache_dir=str(tmp_path))
+    rgb = np.random.default_rng(0).integers(0, 256, size=(64, 48, 3), dtype=np.uint8)
+
+    result = cube.lookup(rgb)
+    expected = color_cube.TARGETS[target][1](rgb)
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, rtol=color_cube.CUBE_RTOL, atol=color_cube.CUBE_ATOL)
+    assert cube.verify() < 0.1
+
+
+def test_cube_file_is_reused(tmp_path, monkeypatch):
+    color_cube.ConversionCube("xyz", cache_dir=str(tmp_path)).lookup(np.zeros((1, 3), dtype=np.uint8))
+
+    def no_rebuild(self):
+        raise AssertionError("готовый куб собирается заново")
+
+    monkeypatch.setattr(color_cube.ConversionCube, "build", no_rebuild)
+    cube = color_cube.ConversionCube("xyz", cache_dir=str(tmp_path))
+    white = cube.lookup(np.array([[255, 255, 255]], dtype=np.uint8))
+    np.testing.assert_allclose(white, color_engine.rgb_to_xyz([[255, 255, 255]]), rtol=color_cube.CUBE_RTOL)
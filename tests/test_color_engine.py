@@ -0,0 +1,101 @@
+"""color_engine дает те же результаты, что исходные скалярные формулы ColorConverterApp (lab1.py)."""
+import numpy as np
+import pytest
+
+import color_engine
+
+
+# --- Исходные скалярные методы lab1.py (до перехода на color_engine) ---
+
+def _rgb_to_cmyk(r, g, b):
+    if r == 0 and g == 0 and b == 0: return 0, 0, 0, 100
+    r_, g_, b_ = r / 255, g / 255, b / 255
+    k = 1 - max(r_, g_, b_)
+    if k == 1: return 0, 0, 0, 100
+    c = (1 - r_ - k) / (1 - k)
+    m = (1 - g_ - k) / (1 - k)
+    y = (1 - b_ - k) / (1 - k)
+    return c * 100, m * 100, y * 100, k * 100
+
+
+def _cmyk_to_rgb(c, m, y, k):
+    c, m, y, k = c / 100, m / 100, y / 100, k / 100
+    return 255 * (1 - c) * (1 - k), 255 * (1 - m) * (1 - k), 255 * (1 - y) * (1 - k)
+
+
+def _rgb_to_xyz(r, g, b):
+    r, g, b = r / 255, g / 255, b / 255
+
+    def linearize(val):
+        return ((val + 0.055) / 1.055) ** 2.4 if val > 0.04045 else val / 12.92
+
+    r_lin, g_lin, b_lin = map(linearize, [r, g, b])
+    x = r_lin * 0.4124564 + g_lin * 0.3575761 + b_lin * 0.1804375
+    y = r_lin * 0.2126729 + g_lin * 0.7151522 + b_lin * 0.0721750
+    z = r_lin * 0.0193339 + g_lin * 0.1191920 + b_lin * 0.9503041
+    return x * 100, y * 100, z * 100
+
+
+def _xyz_to_rgb(x, y, z):
+    x, y, z = x / 100, y / 100, z / 100
+    r_lin = x * 3.2404542 - y * 1.5371385 - z * 0.4985314
+    g_lin = x * -0.9692660 + y * 1.8760108 + z * 0.0415560
+    b_lin = x * 0.0556434 - y * 0.2040259 + z * 1.0572252
+
+    def correct_gamma(val):
+        return (1.055 * val ** (1 / 2.4) - 0.055) if val > 0.0031308 else 12.92 * val
+
+    out_of_gamut = False
+    result = []
+    for val in map(correct_gamma, [r_lin, g_lin, b_lin]):
+        if val < 0 or val > 1:
+            out_of_gamut = True
+        result.append(min(max(val, 0), 1) * 255)
+    return tuple(result), out_of_gamut
+
+
+def _scalar(func, colors):
+    return np.array([func(*map(float, color)) for color in colors])
+
+
+@pytest.fixture(scope="module")
+def rgb_8bit():
+    rng = np.random.default_rng(0)
+    corners = [[r, g, b] for r in (0, 255) for g in (0, 255) for b in (0, 255)]
+    grays = [[v, v, v] for v in range(256)]
+    return np.concatenate([rng.integers(0, 256, size=(3000, 3)), corners, grays]).astype(np.uint8)
+
+
+def test_rgb_to_cmyk(rgb_8bit):
+    np.testing.assert_allclose(color_engine.rgb_to_cmyk(rgb_8bit), _scalar(_rgb_to_cmyk, rgb_8bit), atol=1e-9)
+
+
+def test_cmyk_to_rgb():
+    cmyk = np.random.default_rng(1).uniform(0, 100, size=(3000, 4))
+    np.testing.assert_allclose(color_engine.cmyk_to_rgb(cmyk), _scalar(_cmyk_to_rgb, cmyk), atol=1e-9)
+
+
+def test_rgb_to_xyz_8bit_lut(rgb_8bit):
+    np.testing.assert_allclose(color_engine.rgb_to_xyz(rgb_8bit), _scalar(_rgb_to_xyz, rgb_8bit), atol=1e-9)
+
+
+def test_rgb_to_xyz_float():
+    rgb = np.random.default_rng(2).uniform(0, 255, size=(3000, 3))
+    np.testing.assert_allclose(color_engine.rgb_to_xyz(rgb), _scalar(_rgb_to_xyz, rgb), atol=1e-9)
+
+
+def test_xyz_to_rgb_and_gamut_flag():
+    # Диапазон шире охвата sRGB: часть цветов обрезается
+    xyz = np.random.default_rng(3).uniform(-10, 120, size=(3000, 3))
+    rgb, out_of_gamut = color_engine.xyz_to_rgb(xyz)
+    expected = [_xyz_to_rgb(*color) for color in xyz]
+    np.testing.assert_allclose(rgb, np.array([e[0] for e in expected]), atol=1e-9)
+    np.testing.assert_array_equal(out_of_gamut, [e[1] for e in expected])
+    assert out_of_gamut.any() and not out_of_gamut.all()
+
+
+def test_image_shape_matches_palette(rgb_8bit):
+    image = rgb_8bit[:3000].reshape(50, 60, 3)
+    np.testing.assert_array_equal(
+        color_engine.convert(image, "rgb", "cmyk").reshape(-1, 4), color_engine.convert(rgb_8bit[:3000], "rgb", "cmyk")
+    )
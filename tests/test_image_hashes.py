@@ -0,0 +1,106 @@
+"""Поиск похожих изображений DuplicateGroups.similar против попарного сравнения."""
+import random
+
+import pytest
+
+import image_hashes
+from image_hashes import DuplicateGroups, hamming
+
+BITS = 64
+
+
+def _hex(value):
+    return f"{value:0{BITS // 4}x}"
+
+
+def _flip(value, count, rng):
+    for bit in rng.sample(range(BITS), count):
+        value ^= 1 << bit
+    return value
+
+
+def _random_hashes(rng, threshold, clusters=40, per_cluster=6, singles=200):
+    """Кластеры вокруг случайных центров (до threshold + 2 бит от центра) и одиночные хэши."""
+    values = []
+    for _ in range(clusters):
+        center = rng.getrandbits(BITS)
+        values.append(center)
+        values += [_flip(center, rng.randint(0, threshold + 2), rng) for _ in range(per_cluster)]
+    values += [rng.getrandbits(BITS) for _ in range(singles)]
+    # Хэши с ведущими нулями: длина hex-строки сохраняется
+    values += [rng.getrandbits(8), 0, 1 << (BITS - 1)]
+    return [_hex(value) for value in values]
+
+
+def _brute_force(groups):
+    """Компоненты связности графа «расстояние <= threshold» попарным сравнением O(n²)."""
+    contents = list(groups.phashes)
+    parent = list(range(len(contents)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(contents)):
+        for j in range(i + 1, len(contents)):
+            if hamming(groups.phashes[contents[i]], groups.phashes[contents[j]]) <= groups.threshold:
+                parent[find(j)] = find(i)
+    components = {}
+    for i, content in enumerate(contents):
+        components.setdefault(find(i), []).append(content)
+    return sorted(
+        sorted(path for content in members for path in groups.by_content[content])
+        for members in components.values() if len(members) > 1
+    )
+
+
+def _groups(hashes, threshold, copies=()):
+    groups = DuplicateGroups(threshold)
+    for n, phash in enumerate(hashes):
+        groups.add(f"img{n:04d}.jpg", f"content{n}", phash)
+    for n in copies:  # точная копия: тот же content, хэш берется у первого файла
+        groups.add(f"copy{n:04d}.jpg", f"content{n}", hashes[n])
+    return groups
+
+
+@pytest.mark.parametrize("threshold", [0, 1, 3, image_hashes.PHASH_THRESHOLD, 10, 15])
+@pytest.mark.parametrize("seed", range(4))
+def test_similar_matches_brute_force(threshold, seed):
+    rng = random.Random(seed * 100 + threshold)
+    hashes = _random_hashes(rng, threshold)
+    groups = _groups(hashes, threshold, copies=range(0, len(hashes), 17))
+    expected = _brute_force(groups)
+    assert sorted(groups.similar()) == expected
+    assert expected  # в данных есть похожие пары
+
+
+@pytest.mark.parametrize("threshold", [0, 1, 5, image_hashes.PHASH_THRESHOLD, 13])
+def test_threshold_boundary(threshold):
+    rng = random.Random(threshold)
+    for _ in range(50):
+        base = rng.getrandbits(BITS)
+        at = _hex(_flip(base, threshold, rng))
+        beyond = _hex(_flip(base, threshold + 1, rng))
+        assert [sorted(group) for group in _groups([_hex(base), at], threshold).similar()] == [
+            ["img0000.jpg", "img0001.jpg"]]
+        assert _groups([_hex(base), beyond], threshold).similar() == []
+
+
+def test_chain_is_transitive():
+    # a~b и b~c при расстоянии a-c больше порога: одна группа, как у попарного поиска
+    a = 0
+    b = (1 << 6) - 1
+    c = (1 << 12) - 1
+    groups = _groups([_hex(a), _hex(b), _hex(c)], 6)
+    assert hamming(_hex(a), _hex(c)) > 6
+    assert groups.similar() == [["img0000.jpg", "img0001.jpg", "img0002.jpg"]]
+    assert groups.similar() == _brute_force(groups)
+
+
+def test_exact_copies_are_not_similar():
+    groups = DuplicateGroups()
+    groups.add("a.jpg", "same", "00ff00ff00ff00ff")
+    groups.add("b.jpg", "same", "00ff00ff00ff00ff")
+    assert groups.exact() == [["a.jpg", "b.jpg"]]
+    assert groups.similar() == []
@@ -0,0 +1,205 @@
+"""Разбор заголовков image_headers против Pillow (тот же путь, что image_metadata без заголовка)."""
+import io
+import struct
+
+import cv2
+import numpy as np
+import pytest
+from PIL import ExifTags, Image, PngImagePlugin
+
+import image_headers
+import image_metadata
+
+W, H = 37, 23
+
+
+def _image(mode):
+    rng = np.random.default_rng(0)
+    if mode == "1":
+        return Image.fromarray(rng.integers(0, 2, size=(H, W), dtype=np.uint8) * 255).convert("1")
+    if mode == "I;16":
+        return Image.fromarray(rng.integers(0, 65536, size=(H, W), dtype=np.uint16))
+    rgba = Image.fromarray(rng.integers(0, 256, size=(H, W, 4), dtype=np.uint8), "RGBA")
+    if mode == "P":
+        return rgba.convert("RGB").quantize(64)
+    return rgba.convert(mode)
+
+
+def _pil(fmt, mode, **save):
+    def write(path):
+        _image(mode).save(path, fmt, **save)
+    return write
+
+
+def _cv2_16bit(channels):
+    def write(path):
+        img = np.random.default_rng(1).integers(0, 65536, size=(H, W, channels), dtype=np.uint16)
+        assert cv2.imwrite(path, img)
+    return write
+
+
+def _exif(orientation):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = orientation
+    exif[ExifTags.Base.Make] = "test"
+    return exif
+
+
+def _png_info():
+    info = PngImagePlugin.PngInfo()
+    info.add(b"gAMA", struct.pack(">I", 45455))
+    info.add(b"sRGB", b"\x00")
+    return info
+
+
+def _gif_gray(path):
+    Image.fromarray(np.arange(H * W, dtype=np.uint8).reshape(H, W)).save(path, "GIF")
+
+
+# (имя, расширение, запись, бит на отсчет)
+CASES = [
+    ("jpeg-L", ".jpg", _pil("JPEG", "L"), 8),
+    ("jpeg-RGB-dpi", ".jpg", _pil("JPEG", "RGB", dpi=(300, 300)), 8),
+    ("jpeg-CMYK", ".jpg", _pil("JPEG", "CMYK"), 8),
+    ("jpeg-progressive", ".jpg", _pil("JPEG", "RGB", progressive=True, quality=80), 8),
+    ("jpeg-exif-orientation", ".jpg", _pil("JPEG", "RGB", exif=_exif(6)), 8),
+    ("jpeg-exif-dpi", ".jpg", _pil("JPEG", "RGB", exif=_exif(3), dpi=(96, 96)), 8),
+    ("png-1", ".png", _pil("PNG", "1"), 1),
+    ("png-L", ".png", _pil("PNG", "L"), 8),
+    ("png-I16", ".png", _pil("PNG", "I;16"), 16),
+    ("png-P", ".png", _pil("PNG", "P"), 8),
+    ("png-LA", ".png", _pil("PNG", "LA"), 8),
+    ("png-RGB-dpi-gamma", ".png", _pil("PNG", "RGB", dpi=(72, 72), pnginfo=_png_info()), 8),
+    ("png-RGBA", ".png", _pil("PNG", "RGBA"), 8),
+    ("png-RGB16", ".png", _cv2_16bit(3), 16),
+    ("png-RGBA16", ".png", _cv2_16bit(4), 16),
+    ("gif-P", ".gif", _pil("GIF", "P"), 8),
+    ("gif-L", ".gif", _gif_gray, 8),
+    ("bmp-1", ".bmp", _pil("BMP", "1"), 8),
+    ("bmp-L", ".bmp", _pil("BMP", "L"), 8),
+    ("bmp-P", ".bmp", _pil("BMP", "P"), 8),
+    ("bmp-RGB-dpi", ".bmp", _pil("BMP", "RGB", dpi=(150, 150)), 8),
+    ("pcx-1", ".pcx", _pil("PCX", "1"), 8),
+    ("pcx-L", ".pcx", _pil("PCX", "L"), 8),
+    ("pcx-P", ".pcx", _pil("PCX", "P"), 8),
+    ("pcx-RGB", ".pcx", _pil("PCX", "RGB"), 8),
+    ("tiff-1", ".tif", _pil("TIFF", "1"), 1),
+    ("tiff-L", ".tif", _pil("TIFF", "L"), 8),
+    ("tiff-I16", ".tif", _pil("TIFF", "I;16"), 16),
+    ("tiff-P", ".tif", _pil("TIFF", "P"), 8),
+    ("tiff-RGB-lzw-dpi", ".tif", _pil("TIFF", "RGB", compression="tiff_lzw", dpi=(200, 200)), 8),
+    ("tiff-RGBA", ".tif", _pil("TIFF", "RGBA"), 8),
+    ("tiff-CMYK", ".tif", _pil("TIFF", "CMYK"), 8),
+    ("tiff-RGB16", ".tif", _cv2_16bit(3), 16),
+]
+
+
+def _pillow_row(path):
+    with Image.open(path) as img:
+        return image_metadata._build_row(path, img)
+
+
+@pytest.fixture(params=CASES, ids=[case[0] for case in CASES])
+def sample(request, tmp_path):
+    name, ext, write, bits = request.param
+    path = str(tmp_path / f"{name}{ext}")
+    write(path)
+    return path, bits
+
+
+def test_header_matches_pillow(sample):
+    path, bits = sample
+    header = image_headers.read_header(path)
+    assert header is not None, "заголовок должен разбираться без Pillow"
+    with Image.open(path) as img:
+        assert (header.format, header.width, header.height, header.mode) == (
+            img.format, img.width, img.height, img.mode)
+    assert header.sample_bits == bits
+    assert image_metadata._build_row(path, header) == _pillow_row(path)
+    assert image_metadata.extract_metadata(path) == _pillow_row(path)
+
+
+def _decodes(path):
+    try:
+        with Image.open(path) as img:
+            img.load()
+        return True
+    except OSError:
+        return False
+
+
+def _prefix_lengths(size):
+    return sorted(set(range(0, min(size, 160))) | set(range(160, size, 97)))
+
+
+def test_truncated_headers_fall_back(sample, tmp_path):
+    path, _ = sample
+    with open(path, "rb") as f:
+        data = f.read()
+    cut_path = str(tmp_path / ("cut" + path[path.rindex("."):]))
+    for n in _prefix_lengths(len(data)):
+        with open(cut_path, "wb") as f:
+            f.write(data[:n])
+        header = image_headers.read_header(cut_path)  # не должен бросать исключение
+        if header is None:
+            # Разбор переходит к Pillow; тот может и сам отказать — тогда строка-ошибка
+            row = image_metadata.safe_extract_metadata(cut_path)
+            assert len(row) == len(image_metadata.COLUMNS)
+        else:
+            row, expected = image_metadata._build_row(cut_path, header), _pillow_row(cut_path)
+            if header.format == "GIF" and not _decodes(cut_path):
+                # getpalette() у Pillow декодирует кадр: при обрезанных данных
+                # палитры в доп. колонке нет, а заголовок ее знает
+                row, expected = row[:-1], expected[:-1]
+            assert row == expected
+
+
+def test_corrupt_headers_fall_back(sample, tmp_path):
+    path, _ = sample
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    bad_path = str(tmp_path / ("bad" + path[path.rindex("."):]))
+    rng = np.random.default_rng(7)
+    for _ in range(60):
+        corrupt = bytearray(data)
+        pos = int(rng.integers(2, min(len(data), 200)))
+        corrupt[pos] = int(rng.integers(0, 256))
+        with open(bad_path, "wb") as f:
+            f.write(corrupt)
+        header = image_headers.read_header(bad_path)  # не должен бросать исключение
+        row = image_metadata.safe_extract_metadata(bad_path)
+        assert len(row) == len(image_metadata.COLUMNS)
+        try:
+            expected = _pillow_row(bad_path)
+        except Exception:
+            continue  # Pillow файл отвергает; заголовок его мог и принять
+        if header is not None:
+            assert image_metadata._build_row(bad_path, header) == expected
+
+
+def test_png_crc_error_falls_back(tmp_path):
+    path = str(tmp_path / "crc.png")
+    _image("RGB").save(path)
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    data[16] ^= 0x01  # ширина в IHDR: CRC чанка больше не сходится
+    with open(path, "wb") as f:
+        f.write(data)
+    assert image_headers.read_header(path) is None
+
+
+def test_unknown_format_falls_back(tmp_path):
+    path = str(tmp_path / "image.webp")
+    _image("RGB").save(path, "WEBP")
+    assert image_headers.read_header(path) is None
+    assert image_metadata.extract_metadata(path) == _pillow_row(path)
+
+
+def test_jpeg_with_xmp_and_exif_uses_pillow(tmp_path):
+    buffer = io.BytesIO()
+    _image("RGB").save(buffer, "JPEG", exif=_exif(1), xmp=b"<x:xmpmeta/>")
+    path = str(tmp_path / "xmp.jpg")
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+    assert image_headers.read_header(path) is None
+    assert image_metadata.extract_metadata(path) == _pillow_row(path)
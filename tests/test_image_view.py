@@ -0,0 +1,56 @@
+"""Масштабирование для ImageView заполняет 8-битные буферы при любой глубине исходника."""
+import cv2
+import numpy as np
+import pytest
+
+from image_view import fit_size, lanczos, scale_into
+
+
+def _buffers(size, channels):
+    w, h = size
+    return np.zeros((h, w) + channels, dtype=np.uint8), np.zeros((h, w, 4), dtype=np.uint8)
+
+
+def _address(array):
+    return array.__array_interface__["data"][0]
+
+
+@pytest.mark.parametrize("channels", [(), (3,)])
+@pytest.mark.parametrize("display", [(80, 60), (400, 300)], ids=["down", "up"])
+def test_16_bit_source_fills_buffers(channels, display):
+    rng = np.random.default_rng(0)
+    src8 = cv2.resize(rng.integers(0, 256, size=(20, 30) + channels, dtype=np.uint8), (240, 180))
+    src16 = src8.astype(np.uint16) * 257  # те же значения в 16-битной шкале
+    bgr8, rgba8 = _buffers(display, channels)
+    bgr16, rgba16 = _buffers(display, channels)
+    addresses = _address(bgr16), _address(rgba16)
+
+    scale_into(src8, bgr8, rgba8)
+    scale_into(src16, bgr16, rgba16)
+    assert (_address(bgr16), _address(rgba16)) == addresses and bgr16.dtype == np.uint8
+    assert np.abs(bgr16.astype(int) - bgr8).max() <= 1
+    assert np.abs(rgba16.astype(int) - rgba8).max() <= 1
+    assert (rgba16[..., 3] == 255).all()
+
+    # Второй кадр пишется в те же буферы: значения — от нового исходника
+    scale_into(65535 - src16, bgr16, rgba16)
+    assert (_address(bgr16), _address(rgba16)) == addresses
+    assert np.abs(bgr16.astype(int) - (255 - bgr8.astype(int))).max() <= 1
+    gray = rgba16[..., 0] if not channels else rgba16[..., 2]
+    expected = 255 - bgr8.astype(int) if not channels else 255 - bgr8[..., 0].astype(int)
+    assert np.abs(gray.astype(int) - expected).max() <= 1
+
+
+def test_float_source_is_scaled_from_unit_range():
+    src = np.full((50, 50, 3), 0.5, dtype=np.float32)
+    bgr, rgba = _buffers((25, 25), (3,))
+    scale_into(src, bgr, rgba)
+    assert (bgr == 128).all()
+
+
+def test_lanczos_accepts_16_bit():
+    src = np.full((90, 120, 3), 65535, dtype=np.uint16)
+    size = fit_size(120, 90, 40, 40)
+    image = lanczos(src, size)
+    assert image.size == size
+    assert image.getpixel((0, 0)) == (255, 255, 255, 255)
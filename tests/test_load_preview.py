@@ -0,0 +1,69 @@
+"""Превью (image_ops.load_preview) против сохранения в полном разрешении (tiled_engine.process_path)."""
+import cv2
+import numpy as np
+import pytest
+
+import image_headers
+import image_ops
+import tiled_engine
+
+W, H = 480, 320
+MAX_SIDE = 100
+# Масштаб 1/257 переводит 16-битный диапазон в 8-битный без насыщения
+SCALE_16 = {"mode": "point", "contrast": 1 / 257, "brightness": 0.0, "invert": False}
+IDENTITY = {"mode": "point", "contrast": 1.0, "brightness": 0.0, "invert": False}
+
+
+def _gradient(dtype, channels):
+    top = np.iinfo(dtype).max
+    x = np.linspace(0, top, W)[None, :]
+    y = np.linspace(0, top, H)[:, None]
+    planes = [x + 0 * y, y + 0 * x, (x + y) / 2, np.full((H, W), top * 0.75)][:channels]
+    img = np.stack(planes, axis=2) if channels > 1 else planes[0]
+    return np.round(img).astype(dtype)
+
+
+def _preview_and_saved(tmp_path, img, params, ext=".png"):
+    src = str(tmp_path / f"src{ext}")
+    dst = str(tmp_path / "dst.png")
+    assert cv2.imwrite(src, img)
+    preview, scale, full_size = image_ops.load_preview(src, MAX_SIDE)
+    assert full_size == (W, H)
+    tiled_engine.process_path(src, dst, params, workers=2)
+    saved = cv2.imread(dst, cv2.IMREAD_UNCHANGED)
+    shown = image_ops.process_image(preview, params, scale)
+    reduced = cv2.resize(saved, shown.shape[1::-1], interpolation=cv2.INTER_AREA)
+    return preview, shown, reduced
+
+
+@pytest.mark.parametrize("channels", [1, 3, 4])
+@pytest.mark.parametrize("ext", [".png", ".tif"])
+def test_16bit_preview_matches_saved(tmp_path, channels, ext):
+    img = _gradient(np.uint16, channels)
+    preview, shown, reduced = _preview_and_saved(tmp_path, img, SCALE_16, ext)
+    assert image_headers.read_header(str(tmp_path / f"src{ext}")).sample_bits == 16
+    assert preview.dtype == np.uint16
+    assert shown.dtype == reduced.dtype == np.uint8
+    assert abs(float(shown.mean()) - float(reduced.mean())) < 1.0
+    assert np.abs(shown.astype(int) - reduced.astype(int)).max() <= 2
+
+
+@pytest.mark.parametrize("channels", [1, 3])
+def test_16bit_identity_saturates_like_saved(tmp_path, channels):
+    img = _gradient(np.uint16, channels)
+    _, shown, reduced = _preview_and_saved(tmp_path, img, IDENTITY)
+    assert abs(float(shown.mean()) - float(reduced.mean())) < 1.0
+
+
+@pytest.mark.parametrize("channels", [1, 3])
+def test_8bit_preview_uses_reduced_decode(tmp_path, channels):
+    img = _gradient(np.uint8, channels)
+    path = str(tmp_path / "src.png")
+    cv2.imwrite(path, img)
+    assert image_headers.read_header(path).sample_bits == 8
+    preview, _, _ = image_ops.load_preview(path, MAX_SIDE)
+    assert preview.dtype == np.uint8
+    # Уменьшенное декодирование в 8 раз, без досжатия до max_side
+    assert preview.shape[:2] == (H // 8, W // 8)
+    _, shown, reduced = _preview_and_saved(tmp_path, img, IDENTITY)
+    assert np.abs(shown.astype(int) - reduced.astype(int)).max() <= 2
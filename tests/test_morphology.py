@@ -0,0 +1,67 @@
+"""morphology.apply побитно совпадает с cv2.erode/cv2.dilate исходным двумерным ядром."""
+import cv2
+import numpy as np
+import pytest
+
+import morphology
+
+SHAPES = {"rect": cv2.MORPH_RECT, "cross": cv2.MORPH_CROSS, "ellipse": cv2.MORPH_ELLIPSE}
+# Нечетные и четные размеры по обе стороны порогов разложения и ван Херка / Гиля — Вермана
+SIZES = [1, 2, 3, 4, 7, 16, 17, 30, 31, 32, 45, 160, 161, 162, 201]
+MORPH_TYPES = [morphology.ERODE, morphology.DILATE]
+
+
+def _reference(img, morph_type, shape, size):
+    kernel = cv2.getStructuringElement(shape, (size, size))
+    return cv2.erode(img, kernel) if morph_type == morphology.ERODE else cv2.dilate(img, kernel)
+
+
+def _image(shape, dtype=np.uint8):
+    rng = np.random.default_rng(sum(shape))
+    return rng.integers(0, np.iinfo(dtype).max, size=shape, dtype=dtype, endpoint=True)
+
+
+@pytest.mark.parametrize("morph_type", MORPH_TYPES)
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("shape", SHAPES.values(), ids=SHAPES.keys())
+def test_matches_opencv(shape, size, morph_type):
+    img = _image((53, 71))
+    expected = _reference(img, morph_type, shape, size)
+    np.testing.assert_array_equal(morphology.apply(img, morph_type, shape, size), expected)
+
+
+@pytest.mark.parametrize("channels", [(3,), (4,)])
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+@pytest.mark.parametrize("size", [5, 31, 163])
+@pytest.mark.parametrize("shape", SHAPES.values(), ids=SHAPES.keys())
+def test_channels_and_dtypes(shape, size, dtype, channels):
+    img = _image((37, 44) + channels, dtype)
+    for morph_type in MORPH_TYPES:
+        result = morphology.apply(img, morph_type, shape, size)
+        assert result.dtype == img.dtype
+        np.testing.assert_array_equal(result, _reference(img, morph_type, shape, size))
+
+
+@pytest.mark.parametrize("image_shape", [(1, 1), (1, 9), (9, 1), (2, 3), (5, 5)])
+@pytest.mark.parametrize("size", [3, 4, 17, 31, 161])
+@pytest.mark.parametrize("shape", SHAPES.values(), ids=SHAPES.keys())
+def test_tiny_images(shape, size, image_shape):
+    img = _image(image_shape)
+    for morph_type in MORPH_TYPES:
+        np.testing.assert_array_equal(
+            morphology.apply(img, morph_type, shape, size), _reference(img, morph_type, shape, size)
+        )
+
+
+def test_result_is_not_the_input():
+    img = _image((10, 10))
+    out = morphology.apply(img, morphology.ERODE, cv2.MORPH_RECT, 1)
+    assert out is not img
+    np.testing.assert_array_equal(out, img)
+
+
+def test_cached_kernels_are_shared_and_read_only():
+    kernel = morphology.structuring_element(cv2.MORPH_ELLIPSE, 9)
+    assert kernel is morphology.structuring_element(cv2.MORPH_ELLIPSE, 9)
+    with pytest.raises(ValueError):
+        kernel[0, 0] = 1
@@ -0,0 +1,77 @@
+"""Конвейер сканирования (scan_engine.scan_folder) с индексом metadata_index."""
+import errno
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_metadata
+import scan_engine
+from metadata_index import MetadataIndex
+
+
+@pytest.fixture
+def folder(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    for value, name in enumerate(("a.png", "b.png")):
+        Image.fromarray(np.full((8, 8), value, dtype=np.uint8)).save(images / name)
+    return images
+
+
+@pytest.fixture
+def flaky_extract(monkeypatch):
+    """extract_metadata, который падает для a.png, пока state["failures"] > 0; opened — открытые файлы."""
+    scan_engine._decoded.clear()
+    extract = image_metadata.extract_metadata
+    state = {"failures": 0, "opened": []}
+
+    def flaky(path, profile=None):
+        state["opened"].append(os.path.basename(path))
+        if path.endswith("a.png") and state["failures"] > 0:
+            state["failures"] -= 1
+            raise OSError(errno.EAGAIN, "Resource temporarily unavailable")
+        return extract(path, profile)
+
+    monkeypatch.setattr(image_metadata, "extract_metadata", flaky)
+    return state
+
+
+def _scan(folder, index_path, hashing=None):
+    engine = scan_engine.ExtractionEngine(workers=2, executor="thread", hashing=hashing)
+    with MetadataIndex(str(index_path)) as index:
+        events = scan_engine.scan_folder(str(folder), engine, index, extensions=(".png",))
+        return {os.path.basename(event[1]): event[2] for event in events if event[0] == "data"}
+
+
+@pytest.mark.parametrize("hashing", [None, "content"])
+def test_error_rows_are_not_cached(folder, tmp_path, flaky_extract, hashing):
+    index_path = tmp_path / "index.sqlite"
+    flaky_extract["failures"] = 1
+    rows = _scan(folder, index_path, hashing)
+    assert image_metadata.is_error_row(rows["a.png"])
+    assert "Resource temporarily unavailable" in rows["a.png"][1]
+    assert not image_metadata.is_error_row(rows["b.png"])
+
+    # Ошибка не сохранена ни в индексе, ни в памяти рабочего: a.png читается заново
+    flaky_extract["opened"].clear()
+    rows = _scan(folder, index_path, hashing)
+    assert flaky_extract["opened"] == ["a.png"]
+    assert not image_metadata.is_error_row(rows["a.png"])
+
+    # Теперь обе строки берутся из индекса без открытия файлов
+    flaky_extract["opened"].clear()
+    rows = _scan(folder, index_path, hashing)
+    assert flaky_extract["opened"] == []
+    assert sorted(rows) == ["a.png", "b.png"]
+
+
+def test_error_rows_from_old_index_are_ignored(folder, tmp_path, flaky_extract):
+    index_path = tmp_path / "index.sqlite"
+    path = str(folder / "a.png")
+    with MetadataIndex(str(index_path)) as index:
+        index.store(path, os.stat(path), image_metadata.error_row(path, OSError("временный сбой")))
+    rows = _scan(folder, index_path)
+    assert "a.png" in flaky_extract["opened"]
+    assert not image_metadata.is_error_row(rows["a.png"])
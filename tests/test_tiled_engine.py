@@ -0,0 +1,50 @@
+"""Плиточная обработка совпадает с обработкой целого кадра."""
+import cv2
+import numpy as np
+import pytest
+
+import image_ops
+import tiled_engine
+
+PARAMS = [
+    {"mode": "point", "contrast": 1.7, "brightness": -20, "invert": True},
+    {"mode": "morph", "morph_type": "Erosion", "kernel_shape": "Ellipse", "kernel_size": 9},
+    {"mode": "morph", "morph_type": "Dilation", "kernel_shape": "Cross", "kernel_size": 6},
+    {"mode": "morph", "morph_type": "Erosion", "kernel_shape": "Rect", "kernel_size": 31},
+]
+
+
+def _image(dtype, channels):
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, np.iinfo(dtype).max, size=(30, 40) + channels, dtype=dtype)
+    return cv2.resize(small, (173, 131), interpolation=cv2.INTER_LINEAR)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+@pytest.mark.parametrize("channels", [(), (3,)])
+@pytest.mark.parametrize("params", PARAMS, ids=lambda p: p["mode"] + str(p.get("kernel_size", "")))
+@pytest.mark.parametrize("tile_size", [32, 57])
+def test_tiled_matches_full_frame(dtype, channels, params, tile_size):
+    src = _image(dtype, channels)
+    expected = image_ops.process_image(src, params)
+    result = tiled_engine.process_tiled(src, params, tile_size=tile_size, workers=2)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("ext", [".png", ".tif", ".npy"])
+def test_process_path_keeps_16_bit(tmp_path, ext):
+    src = _image(np.uint16, (3,))
+    src_path = tmp_path / "src.png"
+    cv2.imwrite(str(src_path), src)
+    params = PARAMS[1]
+    dst_path = tmp_path / f"dst{ext}"
+    tiled_engine.process_path(str(src_path), str(dst_path), params, tile_size=48, workers=2)
+
+    if ext == ".npy":
+        result = np.load(dst_path)
+    else:
+        result = cv2.imread(str(dst_path), cv2.IMREAD_UNCHANGED)
+    expected = image_ops.process_image(src, params)
+    assert result.dtype == np.uint16
+    np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,199 @@
+"""
+Плиточная обработка больших изображений для ImageProcessorApp (lab3.py).
+
+Изображение делится на плитки, каждая читается с полем (halo) в радиус
+ядер морфологии и обрабатывается теми же функциями image_ops, что и
+целый кадр; от результата остается только сама плитка. Внутри поля
+ядро видит те же пиксели, что и при обработке целиком, а на краях
+изображения поле обрезается, и OpenCV достраивает границу так же, как
+для целого кадра, — поэтому результат совпадает побитно.
+
+Исходник и результат в форматах .npy и TIFF отображаются в память
+(image_ops.open_mapped, np.lib.format.open_memmap) или пишутся плиточным
+TIFF, так что одновременно в памяти находятся только обрабатываемые
+плитки. Плитки обрабатываются пулом потоков: OpenCV отпускает GIL.
+
+tifffile — необязательная зависимость (pip install tifffile): без нее TIFF
+не отображается в память и не пишется плитками, а читается и сохраняется
+OpenCV целиком; .npy и остальные форматы работают без нее.
+
+    python tiled_engine.py scan.tif out.tif --mode morph --morph-type Erosion --kernel-size 15
+    python tiled_engine.py scan.tif out.tif --recipe tophat.json
+"""
+import argparse
+import collections
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import image_ops
+import recipe
+
+TILE_SIZE = 1024
+DEFAULT_WORKERS = os.cpu_count() or 4
+# Плитки TIFF должны быть кратны 16 пикселям
+TIFF_TILE_ALIGN = 16
+# Начиная с этого размера данных TIFF пишется в формате BigTIFF
+BIGTIFF_BYTES = 2 ** 32 - 2 ** 25
+
+
+def halo(params):
+    """Ширина поля вокруг плитки: сумма радиусов ядер морфологии (рецепта), для поэлементных операций 0."""
+    return recipe.halo(params)
+
+
+def tile_boxes(height, width, tile_size=TILE_SIZE):
+    """Плитки (y0, y1, x0, x1) построчно слева направо."""
+    return [
+        (y, min(y + tile_size, height), x, min(x + tile_size, width))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+
+def process_tile(src, box, params, pad=0):
+    """Обрабатывает плитку box изображения src с полем pad и возвращает ее без поля."""
+    y0, y1, x0, x1 = box
+    h, w = src.shape[:2]
+    top, left = max(0, y0 - pad), max(0, x0 - pad)
+    bottom, right = min(h, y1 + pad), min(w, x1 + pad)
+    out = recipe.process(np.ascontiguousarray(src[top:bottom, left:right]), params)
+    return out[y0 - top:y1 - top, x0 - left:x1 - left]
+
+
+def iter_tiles(src, params, tile_size=TILE_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Генератор (box, плитка) в порядке tile_boxes. Плитки считаются
+    параллельно, но вперед обрабатывается не больше 2 * workers плиток —
+    память ограничена независимо от размера изображения.
+    """
+    pad = halo(params)
+    workers = max(1, workers)
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tile") as pool:
+        for box in tile_boxes(*src.shape[:2], tile_size):
+            pending.append((box, pool.submit(process_tile, src, box, params, pad)))
+            if len(pending) >= 2 * workers:
+                box, future = pending.popleft()
+                yield box, future.result()
+        while pending:
+            box, future = pending.popleft()
+            yield box, future.result()
+
+
+def output_dtype(src, params):
+    """
+    Тип результата операции над src: поэлементные операции дают uint8,
+    морфология сохраняет тип исходника (например, uint16). Определяется
+    обработкой одного пикселя теми же функциями.
+    """
+    return recipe.process(np.ascontiguousarray(src[:1, :1]), params).dtype
+
+
+def process_tiled(src, params, dst=None, tile_size=TILE_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Обрабатывает src плитками и записывает результат в dst (например,
+    np.memmap той же формы); без dst результат создается в памяти.
+    """
+    if dst is None:
+        dst = np.empty(src.shape, dtype=output_dtype(src, params))
+    for (y0, y1, x0, x1), tile in iter_tiles(src, params, tile_size, workers):
+        dst[y0:y1, x0:x1] = tile
+    return dst
+
+
+def _swap_rb(img):
+    """RGB <-> BGR (и RGBA <-> BGRA); серое изображение не меняется."""
+    if img.ndim == 2:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR if img.shape[2] == 3 else cv2.COLOR_RGBA2BGRA)
+
+
+def _write_tiff(path, src, src_rgb, params, tile_size, workers):
+    import tifffile
+
+    tile_size = -(-tile_size // TIFF_TILE_ALIGN) * TIFF_TILE_ALIGN
+    dtype = output_dtype(src, params)
+
+    def tiles():
+        for _, tile in iter_tiles(src, params, tile_size, workers):
+            if not src_rgb:
+                tile = _swap_rb(tile)
+            if tile.shape[:2] != (tile_size, tile_size):
+                # Крайние плитки TIFF хранятся целиком, лишнее заполняется нулями
+                full = np.zeros((tile_size, tile_size) + tile.shape[2:], dtype=dtype)
+                full[:tile.shape[0], :tile.shape[1]] = tile
+                tile = full
+            yield tile
+
+    tifffile.imwrite(
+        path, tiles(), shape=src.shape, dtype=dtype, tile=(tile_size, tile_size),
+        photometric="minisblack" if src.ndim == 2 else "rgb", bigtiff=src.nbytes >= BIGTIFF_BYTES,
+    )
+
+
+def process_path(src_path, dst_path, params, tile_size=TILE_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Обрабатывает файл в полном разрешении. .npy и TIFF читаются и пишутся
+    через память на диске (TIFF — если установлен tifffile); остальные
+    форматы декодируются и кодируются целиком (OpenCV), но обработка все
+    равно идет параллельными плитками.
+    """
+    mapped = image_ops.open_mapped(src_path)
+    if mapped is not None:
+        src, src_rgb = mapped
+    else:
+        src, src_rgb = image_ops.load_full(src_path), False
+        if src is None:
+            raise ValueError(f"Не удалось прочитать изображение: {src_path}")
+
+    ext = os.path.splitext(dst_path)[1].lower()
+    if ext == ".npy":
+        dst = np.lib.format.open_memmap(dst_path, mode="w+", dtype=output_dtype(src, params), shape=src.shape)
+        for (y0, y1, x0, x1), tile in iter_tiles(src, params, tile_size, workers):
+            dst[y0:y1, x0:x1] = _swap_rb(tile) if src_rgb else tile
+        dst.flush()
+        del dst
+    elif ext in (".tif", ".tiff") and importlib.util.find_spec("tifffile") is not None:
+        _write_tiff(dst_path, src, src_rgb, params, tile_size, workers)
+    else:
+        img = process_tiled(src, params, tile_size=tile_size, workers=workers)
+        image_ops.save_image(dst_path, _swap_rb(img) if src_rgb else img)
+
+
+def _params_from_args(args):
+    if args.recipe:
+        return recipe.load_recipe(args.recipe)
+    if args.mode == image_ops.MODE_POINT:
+        return {"mode": args.mode, "contrast": args.contrast, "brightness": args.brightness, "invert": args.invert}
+    return {"mode": args.mode, "morph_type": args.morph_type, "kernel_shape": args.kernel_shape,
+            "kernel_size": args.kernel_size}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Плиточная обработка больших изображений (лаб. №3)")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--mode", choices=(image_ops.MODE_POINT, image_ops.MODE_MORPH), default=image_ops.MODE_POINT)
+    parser.add_argument("--contrast", type=float, default=1.0)
+    parser.add_argument("--brightness", type=float, default=0)
+    parser.add_argument("--invert", action="store_true")
+    parser.add_argument("--morph-type", choices=("Erosion", "Dilation"), default="Erosion")
+    parser.add_argument("--kernel-shape", choices=tuple(image_ops.KERNEL_SHAPES), default="Rect")
+    parser.add_argument("--kernel-size", type=int, default=3)
+    parser.add_argument("--recipe", help="JSON-рецепт или пресет (заменяет параметры операции выше)")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        process_path(args.input, args.output, _params_from_args(args), args.tile_size, args.workers)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Ошибка: {e}")
+    print(f"Готово за {time.perf_counter() - start:.2f} с: {args.output}")
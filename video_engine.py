@@ -0,0 +1,302 @@
+"""
+Обработка видео и последовательностей кадров для ImageProcessorApp (lab3.py).
+
+Источник открывается cv2.VideoCapture: видеофайл, номер камеры ("0")
+или последовательность кадров — имя ее первого кадра (frame_0001.png,
+нумерация продолжается по возрастанию). К каждому кадру применяется
+операция или рецепт (recipe.process). Конвейер ограниченный:
+
+    декодирование — поток читает кадры и отправляет их в пул обработки;
+    обработка     — пул потоков (OpenCV отпускает GIL);
+    кодирование   — поток забирает результаты по порядку и пишет их
+                    cv2.VideoWriter (видео или кадры по шаблону out_%04d.png).
+
+Между стадиями в работе не больше FRAMES_PER_WORKER кадров на поток
+обработки, поэтому память не растет с длиной видео. Если обработка не
+успевает за живым источником (камера, realtime=True), декодер пропускает
+кадры, а не копит их; при чтении файла он ждет. Окно получает для
+просмотра только самый новый готовый кадр — остальные считаются
+пропущенными просмотром. Скорость (FPS) — средняя за весь прогон и за
+последние FPS_WINDOW кадров.
+
+    python video_engine.py clip.mp4 out.mp4 --preset tophat.json
+    python video_engine.py scans/frame_0001.png out/frame_%04d.png --preset contrast.json
+"""
+import argparse
+import collections
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+import recipe
+
+DEFAULT_WORKERS = os.cpu_count() or 4
+# Сколько кадров на обработчик может находиться между декодированием и записью
+FRAMES_PER_WORKER = 2
+# По скольким последним кадрам считается текущая скорость
+FPS_WINDOW = 30
+# Частота результата, если источник ее не сообщает (камеры, последовательности)
+DEFAULT_FPS = 25.0
+FOURCC = {".mp4": "mp4v", ".m4v": "mp4v", ".mov": "mp4v", ".avi": "MJPG", ".mkv": "MJPG"}
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def is_sequence(path):
+    """Путь — кадр последовательности (изображение с номером в имени)?"""
+    name, ext = os.path.splitext(os.path.basename(path))
+    return ext.lower() in IMAGE_EXTENSIONS and re.search(r"\d+$", name) is not None
+
+
+def open_capture(source):
+    """cv2.VideoCapture для номера камеры, видеофайла или первого кадра последовательности."""
+    if str(source).isdigit():
+        capture = cv2.VideoCapture(int(source))
+    elif is_sequence(source):
+        capture = cv2.VideoCapture(source, cv2.CAP_IMAGES)
+    else:
+        capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Не удалось открыть источник: {source}")
+    return capture
+
+
+def check_output(path):
+    """Проверяет, что результат — видео (FOURCC) или шаблон кадров с %d (out_%04d.png)."""
+    if "%" not in os.path.basename(path) and os.path.splitext(path)[1].lower() not in FOURCC:
+        raise ValueError(f"Неподдерживаемый формат результата: {path} "
+                         f"(видео {', '.join(FOURCC)} или шаблон кадров вида out_%04d.png)")
+
+
+def open_writer(path, fps, size, is_color=True):
+    """cv2.VideoWriter по расширению или шаблону (см. check_output)."""
+    check_output(path)
+    if "%" in os.path.basename(path):
+        writer = cv2.VideoWriter(path, cv2.CAP_IMAGES, 0, fps, size, is_color)
+    else:
+        fourcc = cv2.VideoWriter_fourcc(*FOURCC[os.path.splitext(path)[1].lower()])
+        writer = cv2.VideoWriter(path, fourcc, fps, size, is_color)
+    if not writer.isOpened():
+        raise ValueError(f"Не удалось открыть запись: {path}")
+    return writer
+
+
+class VideoStats:
+    """Счетчики конвейера; обновляются его потоками, читаются окном."""
+
+    def __init__(self, total=0):
+        self.total = total           # кадров в источнике (0 — неизвестно)
+        self.decoded = 0
+        self.processed = 0
+        self.written = 0
+        self.dropped = 0             # пропущены декодером: обработка не успевала за живым источником
+        self.preview_skipped = 0     # обработаны, но не показаны: окно забирает только новейший
+        self.started = time.perf_counter()
+        self.finished = None
+        self._recent = collections.deque(maxlen=FPS_WINDOW)
+        self._lock = threading.Lock()
+
+    def frame_done(self):
+        """Отмечает обработанный кадр (вызывается из потоков пула)."""
+        with self._lock:
+            self.processed += 1
+            self._recent.append(time.perf_counter())
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def fps(self):
+        """Средняя скорость за весь прогон."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def recent_fps(self):
+        """Скорость по последним FPS_WINDOW кадрам."""
+        recent = list(self._recent)
+        if len(recent) < 2 or recent[-1] == recent[0]:
+            return self.fps
+        return (len(recent) - 1) / (recent[-1] - recent[0])
+
+    def summary(self):
+        total = f"/{self.total}" if self.total else ""
+        return (
+            f"Кадров {self.processed}{total}, {self.fps:.1f} кадр/с (сейчас {self.recent_fps:.1f}), "
+            f"пропущено источника {self.dropped}, просмотра {self.preview_skipped}"
+        )
+
+    def as_dict(self):
+        return {
+            "total": self.total, "decoded": self.decoded, "processed": self.processed,
+            "written": self.written, "dropped": self.dropped, "preview_skipped": self.preview_skipped,
+            "seconds": round(self.elapsed, 3), "fps": round(self.fps, 2),
+        }
+
+
+class VideoPipeline:
+    """
+    Конвейер декодирование → обработка → кодирование в отдельных потоках.
+    params можно менять на ходу (set_params): новые значения применяются
+    к следующим декодированным кадрам. output=None — только просмотр.
+    """
+
+    def __init__(self, source, params, output=None, workers=DEFAULT_WORKERS, realtime=None, preview=True):
+        self.source = source
+        self.output = output
+        self.workers = max(1, workers)
+        if output is not None:
+            check_output(output)
+        self.capture = open_capture(source)
+        total = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps >= 1 else DEFAULT_FPS
+        # Живой источник не ждет: если обработка отстает, кадры пропускаются
+        self.realtime = str(source).isdigit() if realtime is None else realtime
+        self.stats = VideoStats(max(total, 0))
+        self.error = None
+        self._params = params
+        self._preview = preview
+        self._latest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._frames = queue.Queue(maxsize=self.workers * FRAMES_PER_WORKER)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="video")
+        self._threads = [
+            threading.Thread(target=self._decode, name="video-decode", daemon=True),
+            threading.Thread(target=self._encode, name="video-encode", daemon=True),
+        ]
+
+    def start(self):
+        self.stats.started = time.perf_counter()
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def set_params(self, params):
+        with self._lock:
+            self._params = params
+
+    def stop(self):
+        """Прерывает конвейер; уже отправленные в обработку кадры дописываются."""
+        self._stop.set()
+
+    @property
+    def done(self):
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+        return self.stats
+
+    def take_preview(self):
+        """Самый новый готовый кадр (номер, исходный, результат) или None, если нового нет."""
+        with self._lock:
+            latest, self._latest = self._latest, None
+            return latest
+
+    def _process(self, frame, params):
+        out = recipe.process(frame, params)
+        self.stats.frame_done()
+        return out
+
+    def _decode(self):
+        """Стадия декодирования: читает кадры и ставит их обработку в очередь по порядку."""
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                self.stats.decoded += 1
+                if self.realtime and self._frames.full():
+                    self.stats.dropped += 1
+                    continue
+                with self._lock:
+                    params = self._params
+                future = self._pool.submit(self._process, frame, params)
+                # Ограниченная очередь: при чтении файла декодер ждет кодировщик
+                while not self._stop.is_set():
+                    try:
+                        self._frames.put((self.stats.decoded, frame, future), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.capture.release()
+            self._frames.put(None)
+
+    def _encode(self):
+        """Стадия кодирования: результаты по порядку в VideoWriter и в слот просмотра."""
+        writer = None
+        try:
+            while True:
+                item = self._frames.get()
+                if item is None:
+                    break
+                index, frame, future = item
+                out = future.result()
+                if self.output is not None:
+                    if writer is None:
+                        h, w = out.shape[:2]
+                        writer = open_writer(self.output, self.fps, (w, h), out.ndim == 3)
+                    writer.write(out)
+                    self.stats.written += 1
+                if self._preview:
+                    with self._lock:
+                        if self._latest is not None:
+                            self.stats.preview_skipped += 1
+                        self._latest = (index, frame, out)
+        except Exception as e:
+            self.error = e
+            self._stop.set()
+            # Освобождает декодер, если он ждет места в очереди
+            while self._frames.get() is not None:
+                pass
+        finally:
+            if writer is not None:
+                writer.release()
+            self._pool.shutdown(wait=True)
+            self.stats.finished = time.perf_counter()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обработка видео и последовательностей кадров (лаб. №3)")
+    parser.add_argument("source", help="видеофайл, первый кадр последовательности или номер камеры")
+    parser.add_argument("output", help="видео (.mp4, .avi, ...) или шаблон кадров (out_%%04d.png)")
+    parser.add_argument("-p", "--preset", required=True, help="JSON-пресет параметров или рецепт")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="число потоков обработки")
+    parser.add_argument("--realtime", action="store_true", help="пропускать кадры, если обработка не успевает")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не печатать ход обработки")
+    args = parser.parse_args(argv)
+
+    try:
+        params = recipe.load_recipe(args.preset)
+        pipeline = VideoPipeline(args.source, params, args.output, args.workers,
+                                 realtime=args.realtime or None, preview=False).start()
+    except (OSError, ValueError) as e:
+        sys.exit(f"Ошибка: {e}")
+    try:
+        while not pipeline.done:
+            time.sleep(0.5)
+            if not args.quiet:
+                print(f"\r{pipeline.stats.summary()}", end="", flush=True)
+    except KeyboardInterrupt:
+        pipeline.stop()
+    stats = pipeline.join()
+    if not args.quiet:
+        print()
+    if pipeline.error is not None:
+        sys.exit(f"Ошибка: {pipeline.error}")
+    print(f"Готово за {stats.elapsed:.2f} с: {stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()